@@ -3,6 +3,8 @@ Error Tracker - Model Hata Takibi ve Performans Analizi
 
 Bu modül yapay zekanın tahminlerini gerçek değerlerle karşılaştırır
 ve model performansını izler.
+Hata geçmişi varsayılan olarak JSON dosyasında, NILUFER_STORAGE_BACKEND=sqlite
+ile paylaşılan SQLite veritabanında tutulur.
 """
 
 import pandas as pd
@@ -11,8 +13,10 @@ import os
 import json
 from datetime import datetime, timedelta
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from .predict import predict_occupancy
-from utils.data_aggregator import aggregator
+from .predict import predict_occupancy_batch
+from utils.visitor_store import real_visitor_store
+from .features import FEATURES
+from utils.storage import get_storage, use_sqlite
 
 class ErrorTracker:
     def __init__(self):
@@ -38,6 +42,38 @@ class ErrorTracker:
         with open(self.error_log_file, 'w', encoding='utf-8') as f:
             json.dump(self.error_history, f, indent=2, ensure_ascii=False)
 
+    def _store_errors(self, records):
+        """Hata kayıtlarını geçmişe ekler ve dosyayı bir kez yazar"""
+        self.error_history.extend(records)
+        self._save_error_history()
+
+    def _errors_since(self, cutoff_date):
+        """cutoff_date sonrasındaki hata kayıtları"""
+        return [
+            error for error in self.error_history
+            if datetime.fromisoformat(error["timestamp"]) >= cutoff_date
+        ]
+
+    def _error_count(self):
+        """Toplam hata kaydı sayısı"""
+        return len(self.error_history)
+
+    def _last_error_values(self, n):
+        """Son n kaydın hata değerleri"""
+        return [e["error"] for e in self.error_history[-n:]]
+
+    @staticmethod
+    def _make_error_record(tesis_id, predicted_value, actual_value, context=None):
+        """Tahmin ve gerçek değerden hata kaydı oluşturur"""
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "tesis_id": tesis_id,
+            "predicted": round(predicted_value, 1),
+            "actual": round(actual_value, 1),
+            "error": round(abs(predicted_value - actual_value), 1),
+            "context": context or {}
+        }
+
     def track_prediction_error(self, tesis_id, predicted_value, actual_value, context=None):
         """
         Tek bir tahmin hatasını kaydeder
@@ -48,20 +84,9 @@ class ErrorTracker:
             actual_value (float): Gerçek değer (%)
             context (dict): Ek bağlam bilgileri
         """
-        error = abs(predicted_value - actual_value)
-        timestamp = datetime.now().isoformat()
-
-        error_record = {
-            "timestamp": timestamp,
-            "tesis_id": tesis_id,
-            "predicted": round(predicted_value, 1),
-            "actual": round(actual_value, 1),
-            "error": round(error, 1),
-            "context": context or {}
-        }
-
-        self.error_history.append(error_record)
-        self._save_error_history()
+        error_record = self._make_error_record(tesis_id, predicted_value, actual_value, context)
+        error = error_record["error"]
+        self._store_errors([error_record])
 
         print(f"[ERROR TRACKER] Hata kaydedildi - Tesis: {tesis_id}, Tahmin: {predicted_value:.1f}%, Gerçek: {actual_value:.1f}%, Hata: {error:.1f}%")
 
@@ -78,64 +103,63 @@ class ErrorTracker:
             dict: Karşılaştırma sonuçları
         """
         try:
+            # Gerçek veriyi yalnızca ilgili tarih bölümlerinden oku
             if date is None:
                 # Son 24 saat
                 cutoff_date = datetime.now() - timedelta(hours=24)
-                date_filter = lambda ts: datetime.fromisoformat(ts) >= cutoff_date
+                real_df = real_visitor_store.read(start=cutoff_date.date())
+                filtered_real = real_df[real_df["timestamp"] >= cutoff_date]
             else:
                 # Belirli tarih
                 target_date = pd.to_datetime(date).date()
-                date_filter = lambda ts: pd.to_datetime(ts).date() == target_date
-
-            # Gerçek veriyi al
-            real_data_file = os.path.join(self.data_dir, "gercek_ziyaretci.csv")
-            if not os.path.exists(real_data_file):
-                return {"error": "Gerçek veri dosyası bulunamadı"}
-
-            real_df = pd.read_csv(real_data_file)
-
-            # Tarih filtresi
-            real_df["datetime"] = pd.to_datetime(real_df["timestamp"])
-            filtered_real = real_df[real_df["datetime"].apply(lambda ts: date_filter(ts.isoformat()))]
+                filtered_real = real_visitor_store.read(start=target_date, end=target_date)
 
             if filtered_real.empty:
                 return {"error": "Belirtilen tarih için gerçek veri bulunamadı"}
 
             comparison_results = []
+            error_records = []
+
+            # Tüm kayıtlar için tek seferde tahmin al. Kayıtta bulunan özellikler
+            # (saat, hafta sonu, hava durumu...) bağlam olarak kullanılır.
+            feature_cols = [c for c in FEATURES if c != "tesis_id" and c in filtered_real.columns]
+            contexts = [
+                {k: v for k, v in row.items() if pd.notna(v)}
+                for row in filtered_real[feature_cols].to_dict("records")
+            ]
+            try:
+                tahminler = predict_occupancy_batch(filtered_real["tesis_id"].astype(int).tolist(), contexts)
+            except Exception as e:
+                return {"error": f"Tahmin hatası: {e}"}
 
-            for _, real_record in filtered_real.iterrows():
+            for (_, real_record), predicted_value in zip(filtered_real.iterrows(), tahminler):
                 tesis_id = int(real_record["tesis_id"])
                 saat = int(real_record["saat"])
                 actual_occupancy = real_record["doluluk_orani"]
-
-                # Model tahmini al (simüle edilmiş tarih ile)
-                # Gerçek uygulamada tarih bilgisi kullanılacak
-                try:
-                    prediction = predict_occupancy(tesis_id)
-                    predicted_value = float(prediction["doluluk"].replace('%', ''))
-
-                    # Hata kaydı
-                    error_record = self.track_prediction_error(
-                        tesis_id,
-                        predicted_value,
-                        actual_occupancy,
-                        {
-                            "saat": saat,
-                            "timestamp": real_record["timestamp"]
-                        }
-                    )
-
-                    comparison_results.append({
-                        "tesis_id": tesis_id,
+                predicted_value = round(float(predicted_value), 1)
+
+                # Hata kaydı (tümü döngü sonunda tek seferde yazılır)
+                error_record = self._make_error_record(
+                    tesis_id,
+                    predicted_value,
+                    actual_occupancy,
+                    {
                         "saat": saat,
-                        "predicted": predicted_value,
-                        "actual": actual_occupancy,
-                        "error": error_record["error"]
-                    })
-
-                except Exception as e:
-                    print(f"[ERROR TRACKER] Tahmin hatası - Tesis {tesis_id}: {e}")
-                    continue
+                        "timestamp": real_record["timestamp"].isoformat()
+                    }
+                )
+                error_records.append(error_record)
+
+                comparison_results.append({
+                    "tesis_id": tesis_id,
+                    "saat": saat,
+                    "predicted": predicted_value,
+                    "actual": actual_occupancy,
+                    "error": error_record["error"]
+                })
+
+            self._store_errors(error_records)
+            print(f"[ERROR TRACKER] {len(error_records)} hata kaydı eklendi")
 
             return {
                 "status": "success",
@@ -181,10 +205,7 @@ class ErrorTracker:
         try:
             cutoff_date = datetime.now() - timedelta(days=days)
 
-            recent_errors = [
-                error for error in self.error_history
-                if datetime.fromisoformat(error["timestamp"]) >= cutoff_date
-            ]
+            recent_errors = self._errors_since(cutoff_date)
 
             if not recent_errors:
                 return {"error": f"Son {days} günde hata kaydı bulunamadı"}
@@ -223,11 +244,11 @@ class ErrorTracker:
                 return {"error": "Yeterli veri yok"}
 
             # Tüm hata geçmişini analiz et
-            all_errors = [e["error"] for e in self.error_history[-1000:]]  # Son 1000 hata
+            all_errors = self._last_error_values(1000)  # Son 1000 hata
 
             report = {
                 "generated_at": datetime.now().isoformat(),
-                "total_predictions": len(self.error_history),
+                "total_predictions": self._error_count(),
                 "recent_performance": {
                     "30_day_trend": trends_30d,
                     "accuracy_assessment": self._assess_accuracy(trends_30d["overall_average_error"])
@@ -290,8 +311,77 @@ class ErrorTracker:
 
         return recommendations
 
+class SQLiteErrorTracker(ErrorTracker):
+    """
+    ErrorTracker ile aynı arayüz, SQLite arka ucu.
+    Hata kayıtları eklenerek yazılır (dosya yeniden yazılmaz); tarih aralığı
+    sorguları timestamp indeksini kullanır.
+    """
+
+    def __init__(self, storage=None):
+        self.data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+        self.error_log_file = os.path.join(self.data_dir, "model_errors.json")
+        self.performance_file = os.path.join(self.data_dir, "model_performance.json")
+        self.storage = storage or get_storage()
+
+        self._migrate_from_json()
+
+    def _migrate_from_json(self):
+        """model_errors.json içeriğini bir kez veritabanına aktarır"""
+        with self.storage.transaction() as conn:
+            if self.storage.is_migrated(conn, "model_hatalari"):
+                return
+
+            records = self._load_error_history()
+            self._insert(conn, records)
+            self.storage.mark_migrated(conn, "model_hatalari", len(records))
+
+    @staticmethod
+    def _insert(conn, records):
+        conn.executemany(
+            "INSERT INTO model_hatalari (timestamp, tesis_id, predicted, actual, error, context) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (r["timestamp"], r.get("tesis_id"), r.get("predicted"), r.get("actual"),
+                 r.get("error"), json.dumps(r.get("context") or {}, ensure_ascii=False))
+                for r in records
+            ]
+        )
+
+    @property
+    def error_history(self):
+        """Tüm hata geçmişi (eklenme sırasıyla)"""
+        return self._select("1")
+
+    def _select(self, where, params=()):
+        rows = self.storage.query(
+            "SELECT timestamp, tesis_id, predicted, actual, error, context FROM model_hatalari "
+            f"WHERE {where} ORDER BY sira", params
+        )
+        for row in rows:
+            row["context"] = json.loads(row["context"]) if row["context"] else {}
+        return rows
+
+    def _store_errors(self, records):
+        if records:
+            with self.storage.transaction() as conn:
+                self._insert(conn, records)
+
+    def _errors_since(self, cutoff_date):
+        return self._select("timestamp >= ?", (cutoff_date.isoformat(),))
+
+    def _error_count(self):
+        return self.storage.scalar("SELECT COUNT(*) FROM model_hatalari")
+
+    def _last_error_values(self, n):
+        rows = self.storage.query(
+            "SELECT error FROM (SELECT sira, error FROM model_hatalari ORDER BY sira DESC LIMIT ?) "
+            "ORDER BY sira", (n,)
+        )
+        return [row["error"] for row in rows]
+
 # Global instance
-error_tracker = ErrorTracker()
+error_tracker = SQLiteErrorTracker() if use_sqlite() else ErrorTracker()
 
 def track_error(tesis_id, predicted, actual, context=None):
     """Kolay kullanım için global fonksiyon"""
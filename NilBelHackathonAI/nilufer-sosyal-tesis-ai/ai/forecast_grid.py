@@ -0,0 +1,358 @@
+"""
+Forecast Grid - Önceden Hesaplanmış (Tesis, Tarih, Saat) Doluluk Tablosu
+
+Bu modül:
+- Tüm tesisler x rezervasyon ufku (FORECAST_GRID_DAYS gün) x açılış saatleri için doluluk
+  tahminlerini tek model çağrısıyla hesaplayıp bellekte bir NumPy dizisinde tutar
+- Tabloyu data/forecast_grid.npz dosyasına atomik olarak yazar; süreç yeniden başladığında
+  veya başka bir uvicorn işçisi tabloyu yenilediğinde bu anlık görüntü yüklenir
+- Arka plan işçisi tabloyu şu durumlarda yeniler:
+  - Yeni model devreye girdiğinde veya etkinlikler değiştiğinde (tüm tablo)
+  - Rezervasyon oluşturulup iptal edildiğinde (yalnızca ilgili tesis-gün satırı)
+  - Saatlik hava tahmini / anlık hava okuması değiştiğinde ve gün döndüğünde (tüm tablo)
+- Kısa aralıklarla gelen değişiklikleri FORECAST_GRID_DEBOUNCE_SECONDS boyunca birleştirir
+- Okuyucular (/tum-tesisler-tahmin, akıllı sıralama, yük dengeleme) hesaplama yapmadan
+  dizi indeksleyerek okur; tablo hazır değilse veya saat tablo dışındaysa None döner ve
+  çağıran canlı tahmine düşer
+
+Tablo tek bir referans ataması ile değiştirilir; okuyucular hiçbir zaman yarım güncellenmiş
+bir tablo görmez.
+"""
+
+import os
+import threading
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+
+import numpy as np
+
+from ai.model_registry import model_registry
+from ai.predict import slot_features, predict_slot_matrix
+from utils.tesisler import TESISLER, ACILIS_SAATI, KAPANIS_SAATI
+from utils.weather_service import get_hourly_forecast_for
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+GRID_PATH = os.path.join(DATA_DIR, "forecast_grid.npz")
+
+FORECAST_GRID_DAYS = int(os.getenv("FORECAST_GRID_DAYS", "31"))  # Bugün + 30 günlük rezervasyon ufku
+FORECAST_GRID_CHECK_SECONDS = float(os.getenv("FORECAST_GRID_CHECK_SECONDS", "60"))
+FORECAST_GRID_DEBOUNCE_SECONDS = float(os.getenv("FORECAST_GRID_DEBOUNCE_SECONDS", "1"))
+
+SAATLER = list(range(ACILIS_SAATI, KAPANIS_SAATI))
+
+
+class ForecastGrid:
+    def __init__(self, path=GRID_PATH, days=FORECAST_GRID_DAYS, check_interval=FORECAST_GRID_CHECK_SECONDS,
+                 debounce=FORECAST_GRID_DEBOUNCE_SECONDS, tesis_ids=None):
+        self.path = path
+        self.days = days
+        self.check_interval = check_interval
+        self.debounce = debounce
+        self.tesis_ids = [t["tesis_id"] for t in TESISLER] if tesis_ids is None else list(tesis_ids)
+        self._index = {tesis_id: f for f, tesis_id in enumerate(self.tesis_ids)}
+
+        self._grid = None              # Güncel tablo (dict); yalnızca referans ataması ile değişir
+        self._written_stamp = None     # Bu sürecin yazdığı anlık görüntünün damgası
+        self._cond = threading.Condition()
+        self._dirty_all = None         # Tüm tablo yenileme nedeni
+        self._dirty_rows = set()       # (tesis_id, "YYYY-MM-DD") satırları
+        self._dirty_since = None
+        self._stopping = False
+        self._thread = None
+
+        self.stats = {"tam_yenileme": 0, "satir_yenileme": 0, "anlik_goruntu_yukleme": 0}
+
+    # ------------------------------------------------------------------ okuma
+
+    def lookup(self, tesis_ids=None, when=None):
+        """
+        Verilen saat için tesislerin tahmini doluluğu (hesaplama yapmaz)
+
+        Args:
+            tesis_ids (list): Tesis ID listesi (None: tüm tesisler)
+            when (datetime): Saat (None: şimdi)
+
+        Returns:
+            np.ndarray: Tesis başına doluluk (%0-100) veya tablo hazır değilse /
+                        saat tablo dışındaysa (kapalı saat, ufuk dışı) None
+        """
+        self.start()
+        grid = self._grid
+        if grid is None:
+            return None
+
+        when = when or datetime.now()
+        gun = (when.date() - grid["baslangic"]).days
+        saat = when.hour - ACILIS_SAATI
+        if not (0 <= gun < grid["doluluk"].shape[1] and 0 <= saat < len(SAATLER)):
+            return None
+
+        tesis_ids = self.tesis_ids if tesis_ids is None else tesis_ids
+        try:
+            idx = [self._index[tesis_id] for tesis_id in tesis_ids]
+        except KeyError:
+            return None
+        return grid["doluluk"][idx, gun, saat].astype(float)
+
+    def get_status(self):
+        grid = self._grid
+        return {
+            "hazir": grid is not None,
+            "baslangic": grid["baslangic"].isoformat() if grid else None,
+            "gun_sayisi": int(grid["doluluk"].shape[1]) if grid else 0,
+            "olusturulma": grid["olusturulma"] if grid else None,
+            "model_versiyonu": grid["model_versiyonu"] if grid else None,
+            **self.stats
+        }
+
+    # ------------------------------------------------------------------ geçersiz kılma
+
+    def invalidate(self, reason="manuel"):
+        """Tüm tablonun yenilenmesini ister (model, etkinlik değişikliği)"""
+        with self._cond:
+            self._dirty_all = self._dirty_all or reason
+            self._dirty_since = self._dirty_since or time.monotonic()
+            self._cond.notify_all()
+
+    def invalidate_slot(self, tesis_id, tarih):
+        """Tek bir tesis-gün satırının yenilenmesini ister (rezervasyon değişikliği)"""
+        with self._cond:
+            self._dirty_rows.add((tesis_id, tarih))
+            self._dirty_since = self._dirty_since or time.monotonic()
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------ hesaplama
+
+    def _slot_times(self, gunler):
+        return [datetime.combine(gun, dt_time(saat)) for gun in gunler for saat in SAATLER]
+
+    def _build(self, hava=None):
+        """Tüm tabloyu hesaplar (tek model çağrısı)"""
+        data = model_registry.get()
+        if data is None:
+            raise FileNotFoundError("HATA: model.pkl yok!")
+
+        baslangic = date.today()
+        gunler = [baslangic + timedelta(days=d) for d in range(self.days)]
+        saatler = self._slot_times(gunler)
+        D, S, F = len(gunler), len(SAATLER), len(self.tesis_ids)
+
+        hava = hava or get_hourly_forecast_for(saatler)
+        rezervasyon, etkinlik = slot_features(self.tesis_ids, saatler)
+        tahmin = predict_slot_matrix(data, self.tesis_ids, saatler, rezervasyon, etkinlik, hava)
+
+        # (D·S) x F -> F x D x S
+        return {
+            "baslangic": baslangic,
+            "doluluk": tahmin.reshape(D, S, F).transpose(2, 0, 1).astype(np.float32),
+            "rezervasyon": rezervasyon.reshape(D, S, F).transpose(2, 0, 1).astype(np.int32),
+            "sicaklik": np.array([w["hava_sicakligi"] for w in hava], dtype=np.float32).reshape(D, S),
+            "yagis": np.array([w["yagis_var"] for w in hava], dtype=np.int8).reshape(D, S),
+            "model_versiyonu": data["version"],
+            "model_damgasi": _model_stamp(data),
+            "olusturulma": datetime.now().isoformat()
+        }
+
+    def _update_rows(self, grid, rows):
+        """Verilen tesis-gün satırlarını yeniden hesaplar (hava durumu tablodakiyle aynı kalır)"""
+        data = model_registry.get()
+        if data is None:
+            raise FileNotFoundError("HATA: model.pkl yok!")
+
+        doluluk = grid["doluluk"].copy()
+        rezervasyon_tablosu = grid["rezervasyon"].copy()
+        for tesis_id, tarih in sorted(rows):
+            f = self._index.get(tesis_id)
+            gun = (date.fromisoformat(tarih) - grid["baslangic"]).days
+            if f is None or not 0 <= gun < doluluk.shape[1]:
+                continue
+            saatler = self._slot_times([grid["baslangic"] + timedelta(days=gun)])
+            hava = [{"hava_sicakligi": float(t), "yagis_var": int(y)}
+                    for t, y in zip(grid["sicaklik"][gun], grid["yagis"][gun])]
+            rezervasyon, etkinlik = slot_features([tesis_id], saatler)
+            doluluk[f, gun] = predict_slot_matrix(data, [tesis_id], saatler, rezervasyon, etkinlik, hava)[:, 0]
+            rezervasyon_tablosu[f, gun] = rezervasyon[:, 0]
+
+        return dict(grid, doluluk=doluluk, rezervasyon=rezervasyon_tablosu, model_versiyonu=data["version"],
+                    model_damgasi=_model_stamp(data), olusturulma=datetime.now().isoformat())
+
+    def _weather_changed(self, grid):
+        """Tablodaki hava durumu güncel tahminden farklıysa yeni tahmini döndürür, aynıysa None"""
+        gunler = [grid["baslangic"] + timedelta(days=d) for d in range(grid["doluluk"].shape[1])]
+        hava = get_hourly_forecast_for(self._slot_times(gunler))
+        sicaklik = np.array([w["hava_sicakligi"] for w in hava], dtype=np.float32).reshape(grid["sicaklik"].shape)
+        yagis = np.array([w["yagis_var"] for w in hava], dtype=np.int8).reshape(grid["yagis"].shape)
+        if np.array_equal(sicaklik, grid["sicaklik"]) and np.array_equal(yagis, grid["yagis"]):
+            return None
+        return hava
+
+    # ------------------------------------------------------------------ anlık görüntü
+
+    def _save(self, grid):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, doluluk=grid["doluluk"], rezervasyon=grid["rezervasyon"],
+                         sicaklik=grid["sicaklik"], yagis=grid["yagis"],
+                         tesis_ids=np.array(self.tesis_ids), saatler=np.array(SAATLER),
+                         baslangic=np.array(grid["baslangic"].isoformat()),
+                         model_damgasi=np.array(grid["model_damgasi"]),
+                         olusturulma=np.array(grid["olusturulma"]))
+            os.replace(tmp_path, self.path)
+            self._written_stamp = self._file_stamp()
+        except OSError as e:
+            print(f"[FORECAST GRID] Anlık görüntü kaydedilemedi: {e}")
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _load_snapshot(self):
+        """Başka bir süreçte (veya önceki çalıştırmada) güncel modelle yazılmış bugünkü tabloyu yükler"""
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._written_stamp:
+            return None
+        data = model_registry.get()
+        if data is None:
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as f:
+                if (f["tesis_ids"].tolist() != self.tesis_ids or f["saatler"].tolist() != SAATLER
+                        or str(f["baslangic"]) != date.today().isoformat()
+                        or str(f["model_damgasi"]) != _model_stamp(data)):
+                    return None
+                grid = {
+                    "baslangic": date.fromisoformat(str(f["baslangic"])),
+                    "doluluk": f["doluluk"],
+                    "rezervasyon": f["rezervasyon"],
+                    "sicaklik": f["sicaklik"],
+                    "yagis": f["yagis"],
+                    "model_versiyonu": data["version"],
+                    "model_damgasi": str(f["model_damgasi"]),
+                    "olusturulma": str(f["olusturulma"])
+                }
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[FORECAST GRID] Anlık görüntü okunamadı: {e}")
+            return None
+
+        self._written_stamp = stamp
+        self.stats["anlik_goruntu_yukleme"] += 1
+        return grid
+
+    # ------------------------------------------------------------------ işçi
+
+    def _take_work(self):
+        """Yapılacak işi alır: ("tam", neden), ("satir", satırlar) veya periyodik kontrol için None"""
+        with self._cond:
+            deadline = time.monotonic() + self.check_interval
+            while not self._stopping:
+                if self._dirty_since is not None:
+                    delay = self._dirty_since + self.debounce - time.monotonic()
+                    if delay <= 0:
+                        reason, rows = self._dirty_all, self._dirty_rows
+                        self._dirty_all, self._dirty_rows, self._dirty_since = None, set(), None
+                        return ("tam", reason) if reason else ("satir", rows)
+                else:
+                    delay = deadline - time.monotonic()
+                    if delay <= 0:
+                        return None
+                self._cond.wait(delay)
+            return False
+
+    def refresh(self, work=None):
+        """Bir yenileme adımı çalıştırır (işçi thread'i tarafından çağrılır)"""
+        grid = self._grid
+        loaded = self._load_snapshot()
+        if loaded is not None:
+            grid = self._grid = loaded
+
+        hava = None
+        if grid is None or grid["baslangic"] != date.today():
+            work = ("tam", "ilk yükleme" if grid is None else "gün dönümü")
+        elif work is None or work[0] == "satir":
+            hava = self._weather_changed(grid)
+            if hava is not None:
+                work = ("tam", "hava durumu")
+
+        if work is None:
+            return False
+
+        started = time.perf_counter()
+        if work[0] == "tam":
+            new_grid = self._build(hava)
+            self.stats["tam_yenileme"] += 1
+            detail = f"tüm tablo ({work[1]})"
+        else:
+            new_grid = self._update_rows(grid, work[1])
+            self.stats["satir_yenileme"] += 1
+            detail = f"{len(work[1])} satır"
+
+        self._grid = new_grid
+        self._save(new_grid)
+        print(f"[FORECAST GRID] {detail} yenilendi ({(time.perf_counter() - started) * 1000:.1f} ms)")
+        return True
+
+    def _run(self):
+        work = None
+        while True:
+            try:
+                self.refresh(work)
+            except Exception as e:
+                print(f"[FORECAST GRID] Yenileme hatası, mevcut tablo korunuyor: {e}")
+            work = self._take_work()
+            if work is False:
+                return
+
+    def start(self):
+        """İşçi thread'ini (çalışmıyorsa) başlatır; ilk tablo arka planda hesaplanır"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+
+def _model_stamp(data):
+    """Tabloyu üreten modelin süreçler arasında karşılaştırılabilir kimliği (eğitim zamanı)"""
+    return str(data.get("training_info", {}).get("trained_at", ""))
+
+
+# Global instance
+forecast_grid = ForecastGrid()
+
+
+def _on_model_reloaded(version):
+    if version > 1:
+        forecast_grid.invalidate(f"model versiyon {version}")
+
+model_registry.add_listener(_on_model_reloaded)
+
+
+def lookup_forecast(tesis_ids=None, when=None):
+    """Kolay kullanım için global fonksiyon"""
+    return forecast_grid.lookup(tesis_ids, when)
+
+
+def invalidate_forecast_grid(reason="manuel"):
+    """Kolay kullanım için global fonksiyon"""
+    forecast_grid.invalidate(reason)
+
+
+def invalidate_forecast_slot(tesis_id, tarih):
+    """Kolay kullanım için global fonksiyon"""
+    forecast_grid.invalidate_slot(tesis_id, tarih)
@@ -0,0 +1,268 @@
+"""
+Incremental Trainer - Yeterli İstatistiklerle Artımlı Model Güncellemesi
+
+Ağırlıklı doğrusal regresyonun (StandardScaler + LinearRegression) çözümü için tüm
+veriye gerek yoktur; z = [x, y] vektörünün ağırlıklı ortalaması ve merkezlenmiş
+çapraz çarpım matrisi (Σ w (z - z̄)(z - z̄)ᵀ) yeterlidir. Bu modül:
+- Ziyaretçi deposunun her bölümü (gün) için bu istatistikleri data/model_stats.json
+  dosyasında tutar
+- Yeniden eğitimde yalnızca daha önce işlenmemiş parça dosyalarını okuyup istatistiklere
+  katlar; bir bölümün dosyaları sıkıştırma vb. ile değiştiyse yalnızca o bölümü yeniden hesaplar
+- Bölüm istatistiklerini birleştirip (gerçek veri 3x ağırlıkla) normal denklemleri
+  d×d boyutunda çözer; eğitim maliyeti toplam geçmişten bağımsızdır
+- Sonucu train_model ile aynı biçimde model.pkl ve model_kernel.json olarak yazar
+
+İstatistikler sayısal kararlılık için ham toplamlar yerine (n, ortalama, M2) olarak tutulur
+ve Chan'ın paralel birleştirme formülüyle birleştirilir.
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+
+from ai.features import FEATURES, TARGET
+from ai.linear_kernel import KERNEL_PATH, fold_linear_model, save_kernel
+from ai.model_registry import MODEL_PATH, save_model_atomic
+from utils.visitor_store import real_visitor_store, synthetic_visitor_store
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+STATS_PATH = os.path.join(DATA_DIR, "model_stats.json")
+
+# Gerçek veri satırlarının sentetik veriye göre ağırlığı (train_hybrid_model ile aynı)
+REAL_DATA_WEIGHT = 3.0
+
+
+class SufficientStats:
+    """z = [x, y] satırları için (ağırlık toplamı, ortalama, merkezlenmiş çapraz çarpım)"""
+
+    def __init__(self, n=0.0, mean=None, m2=None, k=len(FEATURES) + 1):
+        self.n = float(n)
+        self.mean = np.zeros(k) if mean is None else np.asarray(mean, dtype=float)
+        self.m2 = np.zeros((k, k)) if m2 is None else np.asarray(m2, dtype=float)
+
+    @classmethod
+    def from_frame(cls, df):
+        """DataFrame'deki (FEATURES + TARGET) satırlardan istatistik üretir"""
+        Z = df[FEATURES + [TARGET]].to_numpy(dtype=float)
+        Z = Z[~np.isnan(Z).any(axis=1)]
+        if len(Z) == 0:
+            return cls()
+        mean = Z.mean(axis=0)
+        centered = Z - mean
+        return cls(len(Z), mean, centered.T @ centered)
+
+    def merge(self, other, w_self=1.0, w_other=1.0):
+        """
+        İki istatistiği birleştirir (Chan). w_self / w_other her tarafın satır ağırlığıdır;
+        sonuçtaki n ağırlık toplamıdır.
+        """
+        n_a, n_b = self.n * w_self, other.n * w_other
+        if n_b == 0:
+            return SufficientStats(n_a, self.mean, self.m2 * w_self)
+        if n_a == 0:
+            return SufficientStats(n_b, other.mean, other.m2 * w_other)
+
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        mean = self.mean + delta * (n_b / n)
+        m2 = self.m2 * w_self + other.m2 * w_other + np.outer(delta, delta) * (n_a * n_b / n)
+        return SufficientStats(n, mean, m2)
+
+    def to_dict(self):
+        return {"n": self.n, "mean": self.mean.tolist(), "m2": self.m2.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["n"], d["mean"], d["m2"])
+
+
+def merge_all(stats_list):
+    total = SufficientStats()
+    for stats in stats_list:
+        total = total.merge(stats)
+    return total
+
+
+def solve(synthetic, real, real_weight=REAL_DATA_WEIGHT):
+    """
+    Birleşik istatistiklerden StandardScaler + LinearRegression parametrelerini çözer.
+    Sonuç, aynı veriye sample_weight ile fit edilen sklearn modeliyle aynıdır
+    (ölçekleyici ağırlıksız, regresyon ağırlıklı istatistikleri kullanır).
+
+    Returns:
+        dict: {"mean", "var", "scale", "coef", "intercept", "r2", "n"} veya veri yoksa None
+    """
+    d = len(FEATURES)
+    unweighted = synthetic.merge(real)
+    if unweighted.n == 0:
+        return None
+
+    # Yalnızca tek kaynak varsa ağırlıklar sabittir ve çözümü etkilemez
+    w_real = real_weight if synthetic.n > 0 and real.n > 0 else 1.0
+    weighted = synthetic.merge(real, 1.0, w_real)
+
+    mean = unweighted.mean[:d]
+    var = np.diag(unweighted.m2)[:d] / unweighted.n
+    scale = np.sqrt(var)
+    scale[scale < 10 * np.finfo(float).eps] = 1.0  # sklearn: sabit sütunlar ölçeklenmez
+
+    Cxx = weighted.m2[:d, :d] / np.outer(scale, scale)
+    cxy = weighted.m2[:d, d] / scale
+    coef = np.linalg.lstsq(Cxx, cxy, rcond=None)[0]
+    intercept = weighted.mean[d] - np.dot((weighted.mean[:d] - mean) / scale, coef)
+
+    # Ağırlıklı R²: 1 - SSE / SST (SSE = Syy - 2 βᵀ cxy + βᵀ Cxx β)
+    syy = weighted.m2[d, d]
+    sse = syy - 2 * np.dot(coef, cxy) + coef @ Cxx @ coef
+    r2 = 1 - sse / syy if syy > 0 else 0.0
+
+    return {"mean": mean, "var": var, "scale": scale, "coef": coef,
+            "intercept": float(intercept), "r2": float(r2), "n": int(unweighted.n)}
+
+
+class IncrementalTrainer:
+    def __init__(self, stats_path=STATS_PATH, stores=None, real_weight=REAL_DATA_WEIGHT):
+        self.stats_path = stats_path
+        self.real_weight = real_weight
+        self.stores = stores or {"sentetik": synthetic_visitor_store, "gercek": real_visitor_store}
+
+    def _load_state(self):
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get("features") == FEATURES + [TARGET]:
+                return state
+            print("[INCREMENTAL] Özellik listesi değişmiş, istatistikler yeniden hesaplanacak")
+        except (OSError, ValueError):
+            pass
+        return {"features": FEATURES + [TARGET], "kaynaklar": {}}
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(os.path.abspath(self.stats_path)), exist_ok=True)
+        tmp_path = f"{self.stats_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.stats_path)
+
+    def update(self, state):
+        """
+        Depolardaki yeni parça dosyalarını istatistiklere katlar
+
+        Returns:
+            int: İşlenen yeni satır sayısı
+        """
+        columns = FEATURES + [TARGET]
+        new_rows = 0
+
+        for source, store in self.stores.items():
+            old_parts = state["kaynaklar"].get(source, {})
+            parts = {}
+            for partition, files in store.list_parts().items():
+                previous = old_parts.get(partition)
+                known = set(previous["dosyalar"]) if previous else set()
+
+                if previous and known.issubset(files):
+                    # Yalnızca eklenen dosyalar okunur
+                    added = [f for f in files if f not in known]
+                    stats = SufficientStats.from_dict(previous)
+                else:
+                    # Yeni bölüm veya dosyaları değişmiş (sıkıştırılmış / yeniden yazılmış) bölüm
+                    added = files
+                    stats = SufficientStats()
+
+                if added:
+                    batch = SufficientStats.from_frame(store.read_parts(partition, added, columns))
+                    stats = stats.merge(batch)
+                    new_rows += int(batch.n)
+
+                parts[partition] = dict(stats.to_dict(), dosyalar=list(files))
+            state["kaynaklar"][source] = parts
+
+        return new_rows
+
+    def totals(self, state):
+        """Kaynak başına birleşik istatistikler"""
+        return {
+            source: merge_all(SufficientStats.from_dict(p) for p in state["kaynaklar"].get(source, {}).values())
+            for source in self.stores
+        }
+
+    def train(self, model_path=MODEL_PATH, kernel_path=KERNEL_PATH):
+        """
+        İstatistikleri günceller, modeli çözer ve model dosyalarını atomik olarak yazar
+
+        Returns:
+            dict: model_data (train_hybrid_model ile aynı biçim) veya veri yoksa None
+        """
+        started = time.perf_counter()
+        state = self._load_state()
+        new_rows = self.update(state)
+        updated = time.perf_counter()
+
+        totals = self.totals(state)
+        result = solve(totals["sentetik"], totals["gercek"], self.real_weight)
+        solved = time.perf_counter()
+        if result is None:
+            print("[INCREMENTAL] HATA: Eğitim için hiç veri bulunamadı!")
+            return None
+
+        model_data = {
+            "model": _linear_regression(result),
+            "scaler": _standard_scaler(result),
+            "features": FEATURES,
+            "training_info": {
+                "total_samples": result["n"],
+                "synthetic_samples": int(totals["sentetik"].n),
+                "real_samples": int(totals["gercek"].n),
+                "sample_weighting": "enabled",
+                "training_mode": "incremental",
+                "new_samples": new_rows,
+                "r2_score": round(result["r2"], 4),
+                "trained_at": datetime.now().isoformat()
+            }
+        }
+
+        save_model_atomic(model_data, model_path)
+        kernel = fold_linear_model(model_data["model"], model_data["scaler"], FEATURES)
+        save_kernel(kernel, kernel_path, source_path=model_path, training_info=model_data["training_info"])
+        self._save_state(state)
+
+        print(f"[INCREMENTAL] {new_rows} yeni kayıt katlandı ({(updated - started) * 1000:.1f} ms), "
+              f"model çözüldü ({(solved - updated) * 1e6:.0f} µs) - "
+              f"toplam {result['n']} kayıt, R² {result['r2']:.4f}")
+        return model_data
+
+
+def _standard_scaler(result):
+    """Çözülen ortalama/varyansla eğitilmiş StandardScaler eşdeğeri"""
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    scaler.mean_ = result["mean"]
+    scaler.var_ = result["var"]
+    scaler.scale_ = result["scale"]
+    scaler.n_samples_seen_ = result["n"]
+    scaler.n_features_in_ = len(FEATURES)
+    scaler.feature_names_in_ = np.array(FEATURES, dtype=object)
+    return scaler
+
+
+def _linear_regression(result):
+    """Çözülen katsayılarla eğitilmiş LinearRegression eşdeğeri"""
+    from sklearn.linear_model import LinearRegression
+    model = LinearRegression()
+    model.coef_ = result["coef"]
+    model.intercept_ = result["intercept"]
+    model.n_features_in_ = len(FEATURES)
+    return model
+
+
+# Global instance
+incremental_trainer = IncrementalTrainer()
+
+
+def train_incremental_model():
+    """Kolay kullanım için global fonksiyon"""
+    return incremental_trainer.train()
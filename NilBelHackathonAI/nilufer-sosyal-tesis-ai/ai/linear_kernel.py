@@ -0,0 +1,97 @@
+"""
+Linear Kernel - Saf NumPy Tahmin Çekirdeği
+
+StandardScaler + LinearRegression ikilisinin tahmini
+    ((x - mean) / scale) · coef + intercept
+ifadesine eşittir. Ölçekleyici katsayılara katlanarak bu ifade
+    x · w + b
+şeklinde tek bir matris çarpımına indirgenir. Böylece tahmin anında
+pandas DataFrame kurulumu ve sklearn girdi doğrulaması gerekmez.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+KERNEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_kernel.json")
+
+
+def fold_linear_model(model, scaler, features):
+    """
+    Ölçekleyiciyi doğrusal model katsayılarına katlar
+
+    Args:
+        model: coef_ ve intercept_ alanları olan doğrusal model
+        scaler: StandardScaler (mean_ ve scale_ alanları)
+        features (list): Özellik sırası
+
+    Returns:
+        dict: {"features", "weights", "bias"} veya model doğrusal değilse None
+    """
+    coef = getattr(model, "coef_", None)
+    intercept = getattr(model, "intercept_", None)
+    if coef is None or intercept is None:
+        return None
+
+    coef = np.asarray(coef, dtype=float).ravel()
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    mean = np.zeros_like(coef) if mean is None else np.asarray(mean, dtype=float)
+    scale = np.ones_like(coef) if scale is None else np.asarray(scale, dtype=float)
+
+    weights = coef / scale
+    bias = float(np.asarray(intercept, dtype=float).ravel()[0] - np.dot(weights, mean))
+
+    return {"features": list(features), "weights": weights, "bias": bias}
+
+
+def predict_linear(kernel, X):
+    """Katlanmış çekirdek ile tahmin: X · w + b"""
+    return np.asarray(X, dtype=float) @ kernel["weights"] + kernel["bias"]
+
+
+def file_sha256(path):
+    """Dosyanın SHA-256 özetini döndürür"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_kernel(kernel, path=KERNEL_PATH, source_path=None, training_info=None):
+    """
+    Çekirdeği JSON olarak atomik yazar
+
+    Args:
+        kernel (dict): fold_linear_model çıktısı
+        path (str): Hedef dosya
+        source_path (str): Çekirdeğin türetildiği model.pkl (özet karşılaştırması için)
+        training_info (dict): Eğitim bilgileri
+    """
+    payload = {
+        "features": kernel["features"],
+        "weights": [float(w) for w in kernel["weights"]],
+        "bias": kernel["bias"],
+        "source_sha256": file_sha256(source_path) if source_path else None,
+        "training_info": training_info or {}
+    }
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_kernel(path=KERNEL_PATH):
+    """JSON çekirdeği okur, katsayıları NumPy dizisine çevirir"""
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+
+    payload["weights"] = np.asarray(payload["weights"], dtype=float)
+    payload["bias"] = float(payload["bias"])
+    return payload
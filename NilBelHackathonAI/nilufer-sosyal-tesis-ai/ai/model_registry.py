@@ -0,0 +1,174 @@
+"""
+Model Registry - Eğitilmiş Modelin Süreç Genelinde Yönetimi
+
+Bu modül:
+- Modeli süreç başına bir kez yükler ve bellekte tutar
+- Öncelikle saf NumPy çekirdeğini (model_kernel.json) kullanır; sklearn/pandas
+  yalnızca çekirdek yoksa veya güncel değilse model.pkl üzerinden yüklenir
+- Dosyaların mtime/boyut damgasını izleyerek yeniden eğitilen modeli fark eder
+- Yeni modeli arka planda yükler ve tek bir referans ataması ile devreye alır
+- Yarım yazılmış / bozuk dosyalarda eski modeli kullanmaya devam eder
+"""
+
+import os
+import pickle
+import threading
+import time
+
+from ai.linear_kernel import KERNEL_PATH, fold_linear_model, load_kernel, file_sha256
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model.pkl")
+
+
+class ModelRegistry:
+    def __init__(self, model_path=MODEL_PATH, kernel_path=KERNEL_PATH, check_interval=2.0):
+        self.model_path = model_path
+        self.kernel_path = kernel_path
+        self.check_interval = check_interval  # Dosya damgası kontrol aralığı (saniye)
+
+        self._lock = threading.Lock()
+        self._model_data = None
+        self._stamp = None
+        self._version = 0
+        self._last_check = 0.0
+        self._loading = False
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Yeni model devreye alındığında çağrılacak fonksiyonu kaydeder: callback(version)"""
+        self._listeners.append(callback)
+
+    def _read_stamp(self):
+        """Model dosyalarının değişiklik damgasını döndürür ((mtime, boyut) çiftleri)"""
+        stamps = []
+        for path in (self.model_path, self.kernel_path):
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamps.append(None)
+
+        if stamps == [None, None]:
+            raise FileNotFoundError(self.model_path)
+        return tuple(stamps)
+
+    def _read_model_files(self):
+        """
+        Çekirdek güncelse yalnızca onu okur (sklearn import edilmez).
+        Aksi halde model.pkl açılır ve doğrusal modelse çekirdek bellekte üretilir.
+        """
+        if os.path.exists(self.kernel_path):
+            kernel = load_kernel(self.kernel_path)
+            pickle_var = os.path.exists(self.model_path)
+            if not pickle_var or kernel.get("source_sha256") == file_sha256(self.model_path):
+                return {
+                    "features": kernel["features"],
+                    "kernel": kernel,
+                    "training_info": kernel.get("training_info", {})
+                }
+            print("[MODEL REGISTRY] Çekirdek model.pkl ile uyuşmuyor, pickle kullanılacak")
+
+        with open(self.model_path, "rb") as f:
+            data = dict(pickle.load(f))
+        data["kernel"] = fold_linear_model(data["model"], data["scaler"], data["features"])
+        return data
+
+    def _load(self, stamp):
+        """Modeli diskten okur, başarılıysa referansı atomik olarak değiştirir"""
+        try:
+            data = self._read_model_files()
+        except Exception as e:
+            print(f"[MODEL REGISTRY] Model yüklenemedi, mevcut model korunuyor: {e}")
+            return False
+
+        with self._lock:
+            data["version"] = self._version + 1
+            self._model_data = data
+            self._stamp = stamp
+            self._version += 1
+
+        print(f"[MODEL REGISTRY] Model yüklendi (versiyon {self._version})")
+        for callback in self._listeners:
+            try:
+                callback(self._version)
+            except Exception as e:
+                print(f"[MODEL REGISTRY] Dinleyici hatası: {e}")
+        return True
+
+    def _load_in_background(self, stamp):
+        """Yeni modeli tahminleri bekletmeden arka planda yükler"""
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+
+        def job():
+            try:
+                self._load(stamp)
+            finally:
+                with self._lock:
+                    self._loading = False
+
+        threading.Thread(target=job, daemon=True).start()
+
+    def get(self):
+        """
+        Güncel model verisini döndürür
+
+        Returns:
+            dict: {"features", "kernel", "training_info"} (+ pickle'dan yüklendiyse
+                  "model", "scaler") veya model yoksa None
+        """
+        now = time.monotonic()
+        if self._model_data is not None and now - self._last_check < self.check_interval:
+            return self._model_data
+        self._last_check = now
+
+        try:
+            stamp = self._read_stamp()
+        except OSError:
+            return self._model_data
+
+        if stamp != self._stamp:
+            if self._model_data is None:
+                # İlk yükleme: başka çare yok, senkron yükle
+                self._load(stamp)
+            else:
+                self._load_in_background(stamp)
+
+        return self._model_data
+
+    def reload(self):
+        """Modeli hemen (senkron) yeniden yükler"""
+        try:
+            stamp = self._read_stamp()
+        except OSError:
+            return False
+        return self._load(stamp)
+
+    @property
+    def version(self):
+        """Yüklenen modelin süreç içi versiyon numarası"""
+        return self._version
+
+
+def save_model_atomic(model_data, path=MODEL_PATH):
+    """
+    Model verisini önce geçici dosyaya yazar, ardından os.replace ile yerine koyar.
+    Okuyucular hiçbir zaman yarım yazılmış bir pickle görmez.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(model_data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Global instance
+model_registry = ModelRegistry()
+
+
+def get_model():
+    """Kolay kullanım için global fonksiyon"""
+    return model_registry.get()
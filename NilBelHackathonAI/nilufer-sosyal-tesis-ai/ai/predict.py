@@ -1,58 +1,319 @@
-import pickle
-import pandas as pd
+import numpy as np
 import os
 import sys
-from datetime import datetime
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 # Yolları ayarla
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.weather_service import get_weather_data
+from utils.weather_service import get_weather_data, aget_weather_data, get_hourly_forecast
 from utils.tesisler import TESISLER
+from utils.feature_service import feature_service
+from utils.calendar_service import calendar_service
+from ai.model_registry import model_registry
+from ai.linear_kernel import predict_linear
+from ai.prediction_cache import PredictionCache, prediction_cache, quantize_features
 
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "model.pkl")
+# Doluluk eğrileri: saat başına bir kez hesaplanır (anahtar içinde o anki saat bulunur)
+CURVE_CACHE_SIZE = int(os.getenv("CURVE_CACHE_SIZE", "256"))
+CURVE_MAX_HOURS = 5 * 24  # OpenWeather tahmin ufku
+curve_cache = PredictionCache(max_size=CURVE_CACHE_SIZE)
 
-def predict_occupancy(tesis_id, rezervasyon=10, sinav_vakti=0):
-    if not os.path.exists(MODEL_PATH):
-        return "HATA: model.pkl yok!"
+def _on_model_reloaded(version):
+    """Yeni model devreye girince eski sürümün sonuçlarını bellekten atar"""
+    if version > 1:
+        prediction_cache.invalidate(f"model versiyon {version}")
+        curve_cache.invalidate()
 
-    # 1. Modeli ve Özellik Listesini Yükle
-    with open(MODEL_PATH, "rb") as f:
-        data = pickle.load(f)
-    
-    model, scaler, features = data["model"], data["scaler"], data["features"]
+model_registry.add_listener(_on_model_reloaded)
 
-    # 2. Canlı Verileri Topla
-    weather = get_weather_data()
-    simdi = datetime.now()
-    
-    # 3. Veriyi Model Formatına Getir (Hata almamak için kolon isimleri train ile aynı olmalı)
-    input_df = pd.DataFrame([{
-        "tesis_id": tesis_id,
-        "saat": simdi.hour,
-        "hafta_sonu": 1 if simdi.weekday() >= 5 else 0,
-        "resmi_tatil": 0,
-        "etkinlik_var": 0,
-        "sinav_haftasi": sinav_vakti,
-        "rezervasyon_sayisi": rezervasyon,
-        "sicaklik": weather["hava_sicakligi"], # Servisten gelen veriyi modelin beklediği isme atadık
-        "yagis_var": weather["yagis_var"]
-    }])
+WEATHER_FEATURES = {"sicaklik": "hava_sicakligi", "yagis_var": "yagis_var"}
+
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", "4"))
+_executor = None
+
+def predict_occupancy_batch(tesis_ids, contexts=None, use_cache=True):
+    """
+    Birden fazla tesis için tek bir model çağrısı ile doluluk tahmini yapar
+
+    Args:
+        tesis_ids (list): Tesis ID listesi
+        contexts (dict | list): Tüm tesislere uygulanacak ortak bağlam sözlüğü ya da
+            tesis başına bir bağlam sözlüğü listesi. Anahtarlar model özellik isimleridir
+            (ör. {"rezervasyon_sayisi": 10, "sinav_haftasi": 0}); verilmeyenler anlık
+            hava durumundan ve özellik servisinden (o saatteki rezerve kişi sayısı,
+            etkinlik ve takvim bayrakları) doldurulur.
+        use_cache (bool): Sonuçları tahmin önbelleğinden kullan / önbelleğe yaz
+
+    Returns:
+        numpy.ndarray: tesis_ids sırasıyla %0-100 arası doluluk tahminleri
+    """
+    data = model_registry.get()
+    if data is None:
+        raise FileNotFoundError("HATA: model.pkl yok!")
+
+    features = data["features"]
+
+    tesis_ids = list(tesis_ids)
+    if not tesis_ids:
+        return np.empty(0)
+    if contexts is None or isinstance(contexts, dict):
+        contexts = [contexts or {}] * len(tesis_ids)
+    if len(contexts) != len(tesis_ids):
+        raise ValueError("tesis_ids ve contexts uzunlukları eşit olmalı")
+
+    # Tek bir özellik matrisi (satır: tesis, sütun: modelin beklediği FEATURES sırası).
+    # Bağlamda eksik özellik varsa zaman ve hava durumu yalnızca bir kez alınır.
+    simdi = None
+    live = {}
+    weather = None
+    X = np.empty((len(tesis_ids), len(features)), dtype=float)
+    for i, (tesis_id, context) in enumerate(zip(tesis_ids, contexts)):
+        for j, feature in enumerate(features):
+            if feature == "tesis_id":
+                X[i, j] = tesis_id
+            elif feature in context:
+                X[i, j] = context[feature]
+            elif feature in WEATHER_FEATURES:
+                if weather is None:
+                    weather = get_weather_data()
+                X[i, j] = weather[WEATHER_FEATURES[feature]] # Servisten gelen veriyi modelin beklediği isme atadık
+            else:
+                if tesis_id not in live:
+                    simdi = simdi or datetime.now()
+                    live[tesis_id] = feature_service.context(tesis_id, simdi)
+                X[i, j] = live[tesis_id][feature]
+
+    if not use_cache:
+        return _predict_matrix(data, X)
+
+    # Önbellek: (model versiyonu, kovalanmış özellikler) anahtarı ile sonuçları yeniden kullan
+    X = quantize_features(X, features)
+    version = data["version"]
+    keys = [prediction_cache.make_key(version, row) for row in X.tolist()]
+
+    tahminler = np.empty(len(keys))
+    eksik = []
+    for i, key in enumerate(keys):
+        value = prediction_cache.get(key)
+        if value is None:
+            eksik.append(i)
+        else:
+            tahminler[i] = value
+
+    if eksik:
+        hesaplanan = _predict_matrix(data, X[eksik])
+        for i, value in zip(eksik, hesaplanan):
+            tahminler[i] = value
+            prediction_cache.put(keys[i], float(value))
+
+    return tahminler
+
+def _predict_matrix(data, X):
+    """Özellik matrisini tek çağrıda tahmin eder, %0-100 arasına sınırlar"""
+    # Tek matris çarpımı (ölçekleyici katsayılara katlanmış saf NumPy çekirdeği)
+    kernel = data.get("kernel")
+    if kernel is not None:
+        tahminler = predict_linear(kernel, X)
+    else:
+        # Yedek yol: doğrusal olmayan modeller için sklearn
+        import pandas as pd
+        X_scaled = data["scaler"].transform(pd.DataFrame(X, columns=data["features"]))
+        tahminler = data["model"].predict(X_scaled)
+    return np.clip(tahminler, 0, 100) # %0-100 arası sınırla
+
+def _get_executor():
+    """CPU yoğun model işleri için sınırlı iş parçacığı havuzu"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PREDICT_WORKERS, thread_name_prefix="predict")
+    return _executor
+
+def shutdown_executor():
+    """Uygulama kapanırken tahmin havuzunu kapatır"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+async def predict_occupancy_batch_async(tesis_ids, contexts=None, weather=None):
+    """
+    predict_occupancy_batch'in asenkron karşılığı
+
+    Hava durumu olay döngüsünü bloklamadan (önbellek / paylaşılan HTTP havuzu) alınır,
+    model hesabı sınırlı iş parçacığı havuzunda çalıştırılır.
+
+    Returns:
+        (numpy.ndarray, dict): Tahminler ve kullanılan hava durumu
+    """
+    tesis_ids = list(tesis_ids)
+    if weather is None:
+        weather = await aget_weather_data()
+
+    if contexts is None or isinstance(contexts, dict):
+        contexts = [contexts or {}] * len(tesis_ids)
+    weather_context = {f: weather[key] for f, key in WEATHER_FEATURES.items()}
+    contexts = [{**weather_context, **context} for context in contexts]
+
+    loop = asyncio.get_running_loop()
+    tahminler = await loop.run_in_executor(_get_executor(), predict_occupancy_batch, tesis_ids, contexts)
+    return tahminler, weather
+
+async def predict_occupancy_async(tesis_id, rezervasyon=None, sinav_vakti=None):
+    """predict_occupancy'nin asenkron karşılığı"""
+    context = {}
+    if sinav_vakti is not None:
+        context["sinav_haftasi"] = sinav_vakti
+    if rezervasyon is not None:
+        context["rezervasyon_sayisi"] = rezervasyon
+    tahminler, weather = await predict_occupancy_batch_async([tesis_id], context)
+    return format_prediction(tesis_id, tahminler[0], weather)
+
+def slot_features(tesis_ids, saatler):
+    """
+    Saat x tesis rezervasyon ve etkinlik matrisleri (özellik servisinden)
 
-    # 4. Sadece modelin beklediği FEATURES listesini, doğru sırayla seç ve ölçeklendir
-    X_scaled = scaler.transform(input_df[features])
-    
-    # 5. Tahmin
-    tahmin = model.predict(X_scaled)[0]
-    tahmin = max(0, min(100, tahmin)) # %0-100 arası sınırla
+    Returns:
+        (np.ndarray, np.ndarray): rezerve kişi sayıları ve etkinlik bayrakları (H x F)
+    """
+    return feature_service.slot_matrices(tesis_ids, saatler)
 
+def predict_slot_matrix(data, tesis_ids, saatler, rezervasyon, etkinlik, hava, sinav_vakti=None):
+    """
+    Saat x tesis doluluk matrisi (tek model çağrısı)
+
+    Args:
+        data: model_registry.get() çıktısı
+        tesis_ids (list): F tesis
+        saatler (list): H saat (datetime; ardışık olması gerekmez)
+        rezervasyon, etkinlik (np.ndarray): H x F matrisler (slot_features)
+        hava (list): Saat başına {"hava_sicakligi", "yagis_var"}
+        sinav_vakti (int): Sınav haftası bayrağı (None: takvim servisinden, saat başına)
+
+    Returns:
+        np.ndarray: H x F, %0-100
+    """
+    # Satır düzeni: saat-major (satır = h * F + f)
+    H, F = len(saatler), len(tesis_ids)
+    saat_basina = {
+        "saat": [when.hour for when in saatler],
+        "hafta_sonu": [1 if when.weekday() >= 5 else 0 for when in saatler],
+        "resmi_tatil": calendar_service.holidays(saatler),
+        "sinav_haftasi": calendar_service.exam_weeks(saatler) if sinav_vakti is None else [sinav_vakti] * H,
+        "sicaklik": [w["hava_sicakligi"] for w in hava],
+        "yagis_var": [w["yagis_var"] for w in hava],
+    }
+    X = np.zeros((H * F, len(data["features"])), dtype=float)
+    for j, feature in enumerate(data["features"]):
+        if feature == "tesis_id":
+            X[:, j] = np.tile(tesis_ids, H)
+        elif feature in saat_basina:
+            X[:, j] = np.repeat(saat_basina[feature], F)
+        elif feature == "rezervasyon_sayisi":
+            X[:, j] = rezervasyon.ravel()
+        elif feature == "etkinlik_var":
+            X[:, j] = etkinlik.ravel()
+
+    return _predict_matrix(data, X).reshape(H, F)
+
+def predict_occupancy_curve(tesis_ids=None, baslangic=None, saat_sayisi=24, sinav_vakti=None, use_cache=True):
+    """
+    Bir veya tüm tesisler için saatlik doluluk eğrisi (ör. önümüzdeki 24 saat veya N gün)
+
+    Tüm saatler x tesisler tek bir özellik matrisinde toplanır ve tek model çağrısıyla
+    tahmin edilir. Her saat için tahmini hava durumu, her (tesis, saat) için o saatteki
+    rezerve kişi sayısı ve günlük etkinlik bayrağı kullanılır.
+
+    Args:
+        tesis_ids (list): Tesis ID listesi (None: tüm tesisler)
+        baslangic (datetime): Eğrinin ilk saati (None: içinde bulunulan saat)
+        saat_sayisi (int): Saat sayısı (en fazla CURVE_MAX_HOURS)
+        sinav_vakti (int): Sınav haftası bayrağı (None: takvimden)
+        use_cache (bool): Sonucu eğri önbelleğinden kullan / önbelleğe yaz
+
+    Returns:
+        dict: {"baslangic", "saatler", "hava_durumu", "tesisler": [{"tesis_id", "isim", "doluluk"}], ...}
+    """
+    data = model_registry.get()
+    if data is None:
+        raise FileNotFoundError("HATA: model.pkl yok!")
+
+    if not 1 <= saat_sayisi <= CURVE_MAX_HOURS:
+        raise ValueError(f"saat_sayisi 1 ile {CURVE_MAX_HOURS} arasında olmalı")
+
+    simdiki_saat = datetime.now().replace(minute=0, second=0, microsecond=0)
+    baslangic = (baslangic or simdiki_saat).replace(minute=0, second=0, microsecond=0)
+    tesis_ids = [t["tesis_id"] for t in TESISLER] if tesis_ids is None else list(tesis_ids)
+    saatler = [baslangic + timedelta(hours=h) for h in range(saat_sayisi)]
+
+    # Rezervasyon ve etkinlikler her çağrıda okunur (ucuz); değiştilerse anahtar da değişir
+    rezervasyon, etkinlik = slot_features(tesis_ids, saatler)
+    key = (data["version"], simdiki_saat, baslangic, saat_sayisi, tuple(tesis_ids), sinav_vakti,
+           rezervasyon.tobytes(), etkinlik.tobytes())
+    if use_cache:
+        cached = curve_cache.get(key)
+        if cached is not None:
+            return cached
+
+    hava = get_hourly_forecast(baslangic, saat_sayisi)
+    tahminler = predict_slot_matrix(data, tesis_ids, saatler, rezervasyon, etkinlik, hava, sinav_vakti)
+    H = len(saatler)
+
+    isimler = {t["tesis_id"]: t["isim"] for t in TESISLER}
+    result = {
+        "baslangic": baslangic.isoformat(),
+        "saat_sayisi": H,
+        "saatler": [when.isoformat() for when in saatler],
+        "hava_durumu": hava,
+        "model_versiyonu": data["version"],
+        "tesisler": [
+            {
+                "tesis_id": tesis_id,
+                "isim": isimler.get(tesis_id, "Bilinmeyen Tesis"),
+                "doluluk": [round(float(v), 1) for v in tahminler[:, f]],
+                "rezerve_kisi": [int(v) for v in rezervasyon[:, f]]
+            }
+            for f, tesis_id in enumerate(tesis_ids)
+        ]
+    }
+
+    if use_cache:
+        curve_cache.put(key, result)
+    return result
+
+def format_prediction(tesis_id, tahmin, weather):
+    """Sayısal tahmini API'nin kullandığı sözlük formatına çevirir"""
     tesis_adi = next((t["isim"] for t in TESISLER if t["tesis_id"] == tesis_id), "Bilinmeyen Tesis")
-    
+
     return {
         "tesis": tesis_adi,
         "doluluk": f"%{tahmin:.0f}",
         "sicaklik": f"{weather['hava_sicakligi']}°C"
     }
 
+def predict_occupancy(tesis_id, rezervasyon=None, sinav_vakti=None):
+    # 1. Modelin varlığını kontrol et (süreç başına bir kez yüklenir, değişince yenilenir)
+    if model_registry.get() is None:
+        return "HATA: model.pkl yok!"
+
+    # 2. Canlı Verileri Topla
+    weather = get_weather_data()
+
+    # 3. Tek satırlık toplu tahmin (rezervasyon / sınav haftası verilmezse o saatteki gerçek
+    # rezerve kişi sayısı ve takvim)
+    context = {
+        "sicaklik": weather["hava_sicakligi"],
+        "yagis_var": weather["yagis_var"]
+    }
+    if sinav_vakti is not None:
+        context["sinav_haftasi"] = sinav_vakti
+    if rezervasyon is not None:
+        context["rezervasyon_sayisi"] = rezervasyon
+    tahmin = predict_occupancy_batch([tesis_id], context)[0]
+
+    return format_prediction(tesis_id, tahmin, weather)
+
 if __name__ == "__main__":
     print("\n--- Nilüfer Sosyal Tesis Canlı Tahmin ---")
     try:
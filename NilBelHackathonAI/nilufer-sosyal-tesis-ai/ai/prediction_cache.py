@@ -0,0 +1,100 @@
+"""
+Prediction Cache - Doluluk Tahmin Sonuçları İçin LRU Önbellek
+
+Tahmin yalnızca saat, hafta sonu, tatil/etkinlik/sınav bayrakları, hava durumu ve
+rezervasyon sayısı ile değişir. Bu modül sonuçları
+    (model versiyonu, tesis_id, saat, hafta sonu, ..., sıcaklık kovası, yağış)
+anahtarıyla saklar:
+- Sıcaklık ve rezervasyon sayısı kovalara yuvarlanır (tekrar kullanılabilirlik için)
+- En az kullanılan kayıtlar kapasite dolunca atılır (LRU)
+- Model yeniden yüklendiğinde veya etkinlikler değiştiğinde önbellek boşaltılır
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+
+# Özellik bazında kova genişlikleri (değer kovanın temsilcisine yuvarlanır)
+BUCKET_SIZES = {
+    "sicaklik": float(os.getenv("PREDICTION_CACHE_SICAKLIK_KOVASI", "1.0")),      # °C
+    "rezervasyon_sayisi": float(os.getenv("PREDICTION_CACHE_REZERVASYON_KOVASI", "1")),
+}
+
+
+def quantize_features(X, features):
+    """
+    Özellik matrisini önbellek kovalarına yuvarlar (yerinde değil, kopya döner).
+    Tahmin kovanın temsilci değeriyle yapıldığından önbellekten gelen ve yeni
+    hesaplanan sonuçlar birebir aynıdır.
+    """
+    X = np.array(X, dtype=float)
+    for j, feature in enumerate(features):
+        size = BUCKET_SIZES.get(feature)
+        if size:
+            X[:, j] = np.round(X[:, j] / size) * size
+    return X
+
+
+class PredictionCache:
+    def __init__(self, max_size=PREDICTION_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self.stats = {"hit": 0, "miss": 0, "eviction": 0, "invalidation": 0}
+
+    @staticmethod
+    def make_key(model_version, row):
+        """Model versiyonu + (kovalanmış) özellik satırından anahtar üretir"""
+        return (model_version,) + tuple(row)
+
+    def get(self, key):
+        """Kayıt varsa değeri döndürür (ve en yeni olarak işaretler), yoksa None"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.stats["miss"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats["hit"] += 1
+            return value
+
+    def put(self, key, value):
+        """Kaydı ekler, kapasite aşılırsa en eski kaydı atar"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.stats["eviction"] += 1
+
+    def invalidate(self, reason=""):
+        """Önbelleği tamamen boşaltır (model yeniden eğitimi, etkinlik değişikliği vb.)"""
+        with self._lock:
+            self._data.clear()
+            self.stats["invalidation"] += 1
+        if reason:
+            print(f"[PREDICTION CACHE] Önbellek temizlendi: {reason}")
+
+    def get_stats(self):
+        """Önbellek istatistikleri"""
+        with self._lock:
+            toplam = self.stats["hit"] + self.stats["miss"]
+            return {
+                **self.stats,
+                "kayit_sayisi": len(self._data),
+                "kapasite": self.max_size,
+                "isabet_orani": round(self.stats["hit"] / toplam, 4) if toplam else 0.0
+            }
+
+
+# Global instance
+prediction_cache = PredictionCache()
+
+
+def invalidate_predictions(reason=""):
+    """Kolay kullanım için global fonksiyon"""
+    prediction_cache.invalidate(reason)
@@ -0,0 +1,279 @@
+"""
+Retrain Worker - Arka Planda, Tekilleştirilmiş Model Yeniden Eğitimi
+
+Bu modül:
+- Yeniden eğitim isteklerini bir kuyruğa alır ve istek yapan kodu (QR okuma, yönetici
+  isteği) bekletmeden bir iş numarası döndürür
+- Tek bir arka plan işçisi eğitimi ayrı bir süreçte (python ai/train_model.py --incremental)
+  çalıştırır; API sürecinin belleği ve GIL'i eğitimden etkilenmez
+- Kısa aralıklarla gelen tetiklemeleri birleştirir (debounce): son tetiklemeden sonra
+  RETRAIN_DEBOUNCE_SECONDS boyunca yeni istek gelmezse (veya RETRAIN_MAX_DELAY_SECONDS
+  dolunca) eğitim başlar; bekleyen iş varken gelen istekler aynı işe eklenir
+- Eğitim sürerken gelen istekler bir sonraki işe toplanır (eğitimler asla üst üste binmez;
+  birden çok uvicorn işçisi arasında data/retrain.lock dosya kilidi kullanılır)
+- İş durumlarını data/retrain_jobs/<iş_no>.json dosyalarında tutar; durum sorgusu hangi
+  işçiye düşerse düşsün yanıtlanır
+- Eğitim bitince modeli model_registry üzerinden tek referans ataması ile devreye alır
+  (train_model.py model.pkl ve model_kernel.json dosyalarını atomik olarak yazar)
+"""
+
+import os
+import sys
+import json
+import uuid
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.join(BASE_DIR, "..")
+DATA_DIR = os.path.join(PROJECT_DIR, "data")
+JOBS_DIR = os.path.join(DATA_DIR, "retrain_jobs")
+LOCK_PATH = os.path.join(DATA_DIR, "retrain.lock")
+TRAIN_SCRIPT = os.path.join(BASE_DIR, "train_model.py")
+
+RETRAIN_DEBOUNCE_SECONDS = float(os.getenv("RETRAIN_DEBOUNCE_SECONDS", "30"))
+RETRAIN_MAX_DELAY_SECONDS = float(os.getenv("RETRAIN_MAX_DELAY_SECONDS", "300"))
+RETRAIN_TIMEOUT_SECONDS = float(os.getenv("RETRAIN_TIMEOUT_SECONDS", "1800"))
+RETRAIN_JOB_HISTORY = int(os.getenv("RETRAIN_JOB_HISTORY", "50"))
+
+# İş durumları
+BEKLIYOR = "bekliyor"
+CALISIYOR = "calisiyor"
+TAMAMLANDI = "tamamlandi"
+HATA = "hata"
+
+
+class RetrainWorker:
+    def __init__(self, debounce=RETRAIN_DEBOUNCE_SECONDS, max_delay=RETRAIN_MAX_DELAY_SECONDS,
+                 timeout=RETRAIN_TIMEOUT_SECONDS, jobs_dir=JOBS_DIR, lock_path=LOCK_PATH,
+                 command=None):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.jobs_dir = jobs_dir
+        self.lock_path = lock_path
+        self.command = command or [sys.executable, TRAIN_SCRIPT, "--incremental"]
+
+        self._cond = threading.Condition()
+        self._pending = None     # Henüz başlamamış (tetiklemeleri toplayan) iş
+        self._running = None     # Çalışan iş
+        self._stopping = False
+        self._thread = None
+
+    # ------------------------------------------------------------------ kuyruk
+
+    def submit(self, reason="manuel"):
+        """
+        Yeniden eğitim ister; bekleyen bir iş varsa ona eklenir
+
+        Args:
+            reason: Tetikleme nedeni (ör. "yonetici", "kayit_esigi:100")
+
+        Returns:
+            dict: İşin güncel durumu ("job_id" ile sorgulanabilir)
+        """
+        now = time.time()
+        with self._cond:
+            job = self._pending
+            if job is None:
+                job = {
+                    "job_id": uuid.uuid4().hex[:12],
+                    "durum": BEKLIYOR,
+                    "nedenler": [],
+                    "tetikleme_sayisi": 0,
+                    "olusturulma": datetime.now().isoformat(),
+                    "baslama": None,
+                    "bitis": None,
+                    "sure_saniye": None,
+                    "model_versiyonu": None,
+                    "hata": None,
+                    "_ilk_tetikleme": now,
+                }
+                self._pending = job
+
+            job["tetikleme_sayisi"] += 1
+            if reason not in job["nedenler"]:
+                job["nedenler"].append(reason)
+            job["_son_tetikleme"] = now
+            self._save_job(job)
+            self._cond.notify_all()
+
+        self.start()
+        return self._public(job)
+
+    def _next_start_time(self, job):
+        """Bekleyen işin başlama zamanı: son tetiklemeden debounce sonra, en geç max_delay"""
+        return min(job["_son_tetikleme"] + self.debounce, job["_ilk_tetikleme"] + self.max_delay)
+
+    def _take_due_job(self):
+        """Başlama zamanı gelen işi alır; gelmediyse uygun süre bekler (Condition üzerinde)"""
+        with self._cond:
+            while not self._stopping:
+                job = self._pending
+                if job is None:
+                    self._cond.wait()
+                    continue
+                delay = self._next_start_time(job) - time.time()
+                if delay <= 0:
+                    self._pending = None
+                    self._running = job
+                    return job
+                self._cond.wait(delay)
+            return None
+
+    # ------------------------------------------------------------------ işçi
+
+    def _run(self):
+        while True:
+            job = self._take_due_job()
+            if job is None:
+                return
+            try:
+                self._execute(job)
+            finally:
+                with self._cond:
+                    self._running = None
+
+    def _execute(self, job):
+        job["durum"] = CALISIYOR
+        job["baslama"] = datetime.now().isoformat()
+        self._save_job(job)
+        print(f"[RETRAIN WORKER] İş {job['job_id']} başladı ({job['tetikleme_sayisi']} tetikleme: {', '.join(job['nedenler'])})")
+
+        started = time.monotonic()
+        try:
+            with self._training_lock():
+                result = subprocess.run(self.command, cwd=PROJECT_DIR, capture_output=True,
+                                        text=True, timeout=self.timeout)
+            if result.returncode != 0:
+                output = (result.stderr or result.stdout).strip()[-2000:]
+                raise RuntimeError(f"Eğitim süreci {result.returncode} koduyla çıktı: {output}")
+
+            job["model_versiyonu"] = self._publish()
+            job["durum"] = TAMAMLANDI
+            print(f"[RETRAIN WORKER] İş {job['job_id']} tamamlandı (model versiyonu {job['model_versiyonu']})")
+        except Exception as e:
+            job["durum"] = HATA
+            job["hata"] = str(e) or e.__class__.__name__
+            print(f"[RETRAIN WORKER] İş {job['job_id']} başarısız: {job['hata']}")
+        finally:
+            job["bitis"] = datetime.now().isoformat()
+            job["sure_saniye"] = round(time.monotonic() - started, 2)
+            self._save_job(job)
+            self._cleanup_jobs()
+
+    def _publish(self):
+        """Yeni model dosyalarını bu süreçte hemen devreye alır (diğer süreçler damgadan fark eder)"""
+        from ai.model_registry import model_registry
+        model_registry.reload()
+        return model_registry.version
+
+    @contextmanager
+    def _training_lock(self):
+        """Süreçler arası eğitim kilidi: aynı anda yalnızca bir eğitim çalışır"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def start(self):
+        """İşçi thread'ini (çalışmıyorsa) başlatır"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """İşçiyi durdurur (çalışan eğitim süreci tamamlanana kadar beklemez)"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    # ------------------------------------------------------------------ durum
+
+    @staticmethod
+    def _public(job):
+        return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _save_job(self, job):
+        try:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            path = self._job_path(job["job_id"])
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._public(job), f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[RETRAIN WORKER] İş durumu kaydedilemedi: {e}")
+
+    def _cleanup_jobs(self):
+        """En yeni RETRAIN_JOB_HISTORY iş dışındakileri siler"""
+        try:
+            paths = [os.path.join(self.jobs_dir, f) for f in os.listdir(self.jobs_dir) if f.endswith(".json")]
+            paths.sort(key=os.path.getmtime, reverse=True)
+            for path in paths[RETRAIN_JOB_HISTORY:]:
+                os.remove(path)
+        except OSError:
+            pass
+
+    def get_job(self, job_id):
+        """İş durumunu döndürür (bu süreçte veya başka bir işçide oluşturulmuş olabilir)"""
+        with self._cond:
+            for job in (self._pending, self._running):
+                if job is not None and job["job_id"] == job_id:
+                    return self._public(job)
+
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._job_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list_jobs(self, limit=10):
+        """En son işler (yeniden eskiye)"""
+        try:
+            paths = [os.path.join(self.jobs_dir, f) for f in os.listdir(self.jobs_dir) if f.endswith(".json")]
+        except OSError:
+            return []
+        paths.sort(key=os.path.getmtime, reverse=True)
+
+        jobs = []
+        for path in paths[:limit]:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    jobs.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return jobs
+
+
+# Global instance
+retrain_worker = RetrainWorker()
+
+
+def request_retraining(reason="manuel"):
+    """Kolay kullanım için global fonksiyon"""
+    return retrain_worker.submit(reason)
@@ -4,14 +4,18 @@ from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.utils.class_weight import compute_sample_weight
-import pickle
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ai.model_registry import save_model_atomic
+from ai.linear_kernel import KERNEL_PATH, fold_linear_model, save_kernel
+from utils.visitor_store import real_visitor_store, synthetic_visitor_store
+from ai.incremental_trainer import train_incremental_model
 
 # Dosya yolları
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "..", "data")
-SENTETIC_DATA_PATH = os.path.join(DATA_DIR, "sentetik_ziyaretci.csv")
-REAL_DATA_PATH = os.path.join(DATA_DIR, "gercek_ziyaretci.csv")
 MODEL_PATH = os.path.join(BASE_DIR, "model.pkl")
 
 def train_hybrid_model():
@@ -22,18 +26,18 @@ def train_hybrid_model():
     print("--- Hibrit Model Eğitimi Başlatıldı ---")
 
     # 1. Sentetik veriyi yükle (baseline)
-    synthetic_df = None
-    if os.path.exists(SENTETIC_DATA_PATH):
-        synthetic_df = pd.read_csv(SENTETIC_DATA_PATH)
+    synthetic_df = synthetic_visitor_store.read()
+    if len(synthetic_df) > 0:
         print(f"Sentetik veri yüklendi: {len(synthetic_df)} kayıt")
     else:
-        print(f"UYARI: Sentetik veri bulunamadı: {SENTETIC_DATA_PATH}")
+        synthetic_df = None
+        print(f"UYARI: Sentetik veri bulunamadı: {synthetic_visitor_store.root}")
 
     # 2. Gerçek veriyi yükle
     real_df = None
-    if os.path.exists(REAL_DATA_PATH):
+    if real_visitor_store.count() > 0:
         try:
-            real_df = pd.read_csv(REAL_DATA_PATH)
+            real_df = real_visitor_store.read()
             # Veri formatını kontrol et
             required_cols = {"tesis_id", "saat", "sicaklik", "doluluk_orani"}
             if not required_cols.issubset(set(real_df.columns)):
@@ -134,8 +138,11 @@ def train_hybrid_model():
         }
     }
 
-    with open(MODEL_PATH, "wb") as f:
-        pickle.dump(model_data, f)
+    # Atomik yazım: çalışan API süreçleri yarım yazılmış dosyayı asla görmez
+    save_model_atomic(model_data, MODEL_PATH)
+
+    # Saf NumPy tahmin çekirdeğini dışa aktar (ölçekleyici katsayılara katlanır)
+    export_kernel(model_data)
 
     # 10. Performans değerlendirmesi
     y_pred = model.predict(X_scaled)
@@ -157,27 +164,51 @@ def train_hybrid_model():
 
     return model_data
 
+def export_kernel(model_data=None):
+    """
+    Ölçekleyiciyi doğrusal model katsayılarına katlayarak model_kernel.json üretir.
+    model_data verilmezse mevcut model.pkl okunur (yeniden eğitim yapılmaz).
+    """
+    if model_data is None:
+        import pickle
+        with open(MODEL_PATH, "rb") as f:
+            model_data = pickle.load(f)
+
+    kernel = fold_linear_model(model_data["model"], model_data["scaler"], model_data["features"])
+    if kernel is None:
+        print("UYARI: Model doğrusal değil, çekirdek üretilmedi (sklearn yolu kullanılacak)")
+        return None
+
+    save_kernel(kernel, KERNEL_PATH, source_path=MODEL_PATH,
+                training_info=model_data.get("training_info"))
+    print(f"Tahmin çekirdeği kaydedildi: {KERNEL_PATH}")
+    return kernel
+
 def retrain_if_needed():
     """
     Gerektiğinde modeli yeniden eğitir (örneğin yeni gerçek veri eklendiğinde)
     """
-    real_data_path = os.path.join(DATA_DIR, "gercek_ziyaretci.csv")
+    try:
+        # Her 50 yeni gerçek veri için yeniden eğit (eşik bir kez sahiplenilir, atlanmaz)
+        esik = real_visitor_store.claim_threshold("retrain", 50)
+        if esik:
+            print(f"[RETRAIN] {esik} gerçek veri kaydı - Otomatik yeniden eğitim başlatılıyor...")
+            train_incremental_model()
+            print("[RETRAIN] Model başarıyla güncellendi!")
 
-    if os.path.exists(real_data_path):
-        try:
-            real_df = pd.read_csv(real_data_path)
-            record_count = len(real_df)
+    except Exception as e:
+        print(f"[RETRAIN] Hata: {e}")
 
-            # Her 50 yeni gerçek veri için yeniden eğit
-            if record_count > 0 and record_count % 50 == 0:
-                print(f"[RETRAIN] {record_count} gerçek veri kaydı - Otomatik yeniden eğitim başlatılıyor...")
-                train_hybrid_model()
-                print("[RETRAIN] Model başarıyla güncellendi!")
+if __name__ == "__main__":
+    if "--export-kernel" in sys.argv:
+        # Sadece mevcut model.pkl'den çekirdek üret
+        export_kernel()
+        sys.exit(0)
 
-        except Exception as e:
-            print(f"[RETRAIN] Hata: {e}")
+    if "--incremental" in sys.argv:
+        # Yalnızca yeni veriyi yeterli istatistiklere katlayıp modeli yeniden çöz
+        sys.exit(0 if train_incremental_model() is not None else 1)
 
-if __name__ == "__main__":
     # Ana eğitim
     train_hybrid_model()
 
@@ -2,15 +2,37 @@ import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from routes import router
+from ai.predict import shutdown_executor
+from ai.retrain_worker import retrain_worker
+from ai.forecast_grid import forecast_grid
+from utils.http_client import close_async_client
+from utils.scheduler import start_scheduler, scheduler
+
+@asynccontextmanager
+async def lifespan(app):
+    # Gün sonu, yeniden eğitim kontrolü ve hata raporu görevleri
+    start_scheduler()
+    # Tahmin tablosu arka planda hesaplanır; hazır olana kadar tahminler canlı yapılır
+    forecast_grid.start()
+    yield
+    scheduler.stop()
+    retrain_worker.stop()
+    forecast_grid.stop()
+    # Kapanışta paylaşılan HTTP havuzunu ve tahmin iş parçacıklarını serbest bırak
+    await close_async_client()
+    shutdown_executor()
 
 app = FastAPI(
     title="Nilüfer Sosyal Tesis AI API",
     description="Nilüfer Belediyesi sosyal tesis doluluk tahmin API'si",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, List
 from pydantic import BaseModel
 import sys
@@ -14,10 +15,16 @@ class LoginRequest(BaseModel):
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 # Mevcut importların korunması
-from ai.predict import predict_occupancy
+from ai.predict import predict_occupancy_batch_async, predict_occupancy_curve, format_prediction
+from ai.prediction_cache import prediction_cache
+from ai.retrain_worker import retrain_worker
+from ai.forecast_grid import forecast_grid
 from utils.tesisler import TESISLER, get_tesis_by_id
+from utils.weather_service import aget_weather_data, get_weather_cache_stats
 # Sadece kullanılan modülleri import et (performans için)
-from utils.datalogger import log_real_data_entry
+from utils.datalogger import log_qr_entry, log_real_data_entry
+from utils.reservations import reservation_system
+from utils.feature_service import feature_service
 from utils.smart_ranking import smart_ranking
 
 router = APIRouter()
@@ -47,37 +54,39 @@ class QRRequest(BaseModel):
 async def qr_entry(request: QRRequest):
     """
     Vatandaş QR okuttuğunda FEATURES listesini toplar ve AI birimine aktarır.
+    Olay döngüsü bloklanmaz: hava durumu asenkron alınır, model ve dosya işleri
+    iş parçacığı havuzunda çalışır.
     """
     try:
         # 1. Anlık zaman verilerini al
         simdi = datetime.now()
         
         # 2. Hava durumu ve mevcut tahmin verilerini çek (AI Modülünden)
-        # predict_occupancy fonksiyonunu anlık durum fotoğrafı çekmek için kullanıyoruz
-        mevcut_durum = predict_occupancy(request.tesis_id)
-        
-        # 3. Talep edilen FEATURES setini oluştur
+        # Toplu tahmin fonksiyonunu anlık durum fotoğrafı çekmek için kullanıyoruz
+        weather = await aget_weather_data()
+        tahminler, _ = await predict_occupancy_batch_async([request.tesis_id], weather=weather)
+        mevcut_durum = format_prediction(request.tesis_id, tahminler[0], weather)
+
+        # 3. Talep edilen FEATURES setini oluştur (takvim, etkinlik ve o saatteki rezerve
+        # kişi sayısı özellik servisinden okunur)
+        context = await run_in_threadpool(feature_service.context, request.tesis_id, simdi)
         ai_feature_set = {
             "tesis_id": request.tesis_id,
-            "saat": simdi.hour,
-            "hafta_sonu": 1 if simdi.weekday() >= 5 else 0,
-            "resmi_tatil": 0, # Takvim modülü entegrasyonu için placeholder
-            "etkinlik_var": 1 if event_manager.get_active_events() else 0,
-            "sinav_haftasi": 0, # Sistem takviminden çekilebilir
-            "rezervasyon_sayisi": len(reservation_system.get_user_reservations(request.user_id)),
-            "sicaklik": mevcut_durum.get("sicaklik", 20),
-            "yagis_var": 1 if "Yağmur" in mevcut_durum.get("durum", "") else 0,
+            **context,
+            "sicaklik": weather["hava_sicakligi"],
+            "yagis_var": weather["yagis_var"],
             "target_doluluk": 1.0 # Giriş yapıldığı an için hedeflenen doluluk etiketi
         }
 
         # 4. Veriyi AI Birimine (Datalogger) Aktar
         # AI arkadaşının yazdığı log_qr_entry bu sözlüğü alıp CSV/DB'ye yazar
-        log_qr_entry(request.tesis_id, ai_feature_set)
+        await run_in_threadpool(log_qr_entry, request.tesis_id, ai_feature_set)
 
         return {
             "status": "success", 
             "message": f"{request.tesis_id} nolu tesise giriş başarılı. AI verisi kaydedildi.",
-            "kaydedilen_ozellikler": ai_feature_set
+            "kaydedilen_ozellikler": ai_feature_set,
+            "anlik_tahmin": mevcut_durum
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"QR AI Aktarım Hatası: {str(e)}")
@@ -85,9 +94,12 @@ async def qr_entry(request: QRRequest):
 # ========== MEVCUT FONKSİYONLAR (DEĞİŞTİRİLMEDİ) ==========
 
 @router.post("/qr-log")
-def log_qr_data(tesis_id: int, doluluk_orani: float, rezervasyon: Optional[int] = 0):
+def log_qr_data(tesis_id: int, doluluk_orani: float, rezervasyon: Optional[int] = None):
     try:
-        result = log_qr_entry(tesis_id, {"doluluk_orani": doluluk_orani, "rezervasyon": rezervasyon})
+        qr_data = {"doluluk_orani": doluluk_orani}
+        if rezervasyon is not None:
+            qr_data["rezervasyon"] = rezervasyon
+        result = log_qr_entry(tesis_id, qr_data)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tesis listesi alınamadı: {str(e)}")
@@ -122,23 +134,23 @@ def get_all_facilities():
         raise HTTPException(status_code=500, detail=f"Tesis listesi hatası: {str(e)}")
 
 @router.get("/tum-tesisler-tahmin")
-def get_all_predictions():
+async def get_all_predictions():
     try:
-        results = []
-        for tesis in TESISLER:
+        weather = await aget_weather_data()
+        tesis_ids = [tesis["tesis_id"] for tesis in TESISLER]
+
+        # Önceden hesaplanmış tablodan okunur; tablo hazır değilse veya tesisler kapalıysa
+        # tüm tesisler tek bir model çağrısı ile tahmin edilir
+        tahminler = forecast_grid.lookup(tesis_ids)
+        if tahminler is None:
             try:
-                prediction = predict_occupancy(tesis["tesis_id"], rezervasyon=10, sinav_vakti=0)
-                # Doluluk oranını güvenli şekilde parse et
-                doluluk_str = prediction.get("doluluk", "0%")
-                doluluk_orani = float(doluluk_str.replace('%', '')) / 100.0 if '%' in doluluk_str else 0.0
-                results.append({
-                    "tesis_id": tesis["tesis_id"],
-                    "isim": tesis["isim"],
-                    "doluluk_orani": doluluk_orani,
-                    "durum": prediction.get("durum", "Müsait"),
-                    "sicaklik": prediction.get("sicaklik", 20)
-                })
-            except Exception as inner_e:
+                tahminler, _ = await predict_occupancy_batch_async(tesis_ids, weather=weather)
+            except Exception:
+                tahminler = None
+
+        results = []
+        for i, tesis in enumerate(TESISLER):
+            if tahminler is None:
                 results.append({
                     "tesis_id": tesis["tesis_id"],
                     "isim": tesis["isim"],
@@ -146,10 +158,56 @@ def get_all_predictions():
                     "durum": "Hata",
                     "sicaklik": 0
                 })
+                continue
+            prediction = format_prediction(tesis["tesis_id"], tahminler[i], weather)
+            results.append({
+                "tesis_id": tesis["tesis_id"],
+                "isim": tesis["isim"],
+                "doluluk_orani": round(float(tahminler[i])) / 100.0,
+                "durum": prediction.get("durum", "Müsait"),
+                "sicaklik": prediction.get("sicaklik", 20)
+            })
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Toplu tahmin ana hatası: {str(e)}")
 
+@router.get("/tahmin-egrisi")
+def get_occupancy_curve(
+    tesis_id: Optional[int] = None,
+    gun: int = Query(1, ge=1, le=5),
+    saat: Optional[int] = Query(None, ge=1, le=120),
+    tarih: Optional[str] = None,
+    sinav_vakti: Optional[int] = Query(None, ge=0, le=1)
+):
+    """
+    Saatlik doluluk eğrisi: tesis_id verilmezse tüm tesisler. Varsayılan olarak içinde
+    bulunulan saatten itibaren gun x 24 saat; tarih (YYYY-MM-DD) verilirse o günün 00:00'ından.
+    sinav_vakti verilmezse sınav haftaları takvimden okunur.
+    """
+    if tesis_id is not None and not get_tesis_by_id(tesis_id):
+        raise HTTPException(status_code=404, detail="Tesis bulunamadı")
+
+    baslangic = None
+    if tarih:
+        try:
+            baslangic = datetime.strptime(tarih, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-MM-DD)")
+
+    try:
+        return predict_occupancy_curve(
+            [tesis_id] if tesis_id is not None else None,
+            baslangic=baslangic,
+            saat_sayisi=saat or gun * 24,
+            sinav_vakti=sinav_vakti
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Tahmin eğrisi hatası: {str(e)}")
+
 # ========== REZERVASYON ENDPOINTLERİ ==========
 
 class ReservationRequest(BaseModel):
@@ -161,7 +219,7 @@ class ReservationRequest(BaseModel):
     kisi_sayisi: int = 1  # Default 1 kişi
 
 @router.post("/rezervasyon-olustur")
-async def create_reservation_endpoint(request: ReservationRequest):
+def create_reservation_endpoint(request: ReservationRequest):
     try:
         user_data = {
             "user_id": request.user_id,
@@ -181,29 +239,40 @@ async def create_reservation_endpoint(request: ReservationRequest):
         raise HTTPException(status_code=500, detail=f"Rezervasyon oluşturma hatası: {str(e)}")
 
 @router.get("/rezervasyonlarim/{user_id}")
-async def get_user_reservations_endpoint(user_id: str):
+def get_user_reservations_endpoint(user_id: str):
     try:
         reservations = reservation_system.get_user_reservations(user_id)
         return {"rezervasyonlar": reservations}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Rezervasyon getirme hatası: {str(e)}")
 
+@router.get("/bos-saatler/{tesis_id}")
+def get_free_slots(tesis_id: int, tarih: str, user_id: Optional[str] = None):
+    if not get_tesis_by_id(tesis_id):
+        raise HTTPException(status_code=404, detail="Tesis bulunamadı")
+    try:
+        tarih = datetime.strptime(tarih, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-MM-DD)")
+
+    try:
+        return {"tesis_id": tesis_id, "tarih": tarih, "bos_saatler": reservation_system.free_slots(tesis_id, tarih, user_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Boş saat getirme hatası: {str(e)}")
+
 # ========== BELEDİYE YÖNETİM ENDPOINTLERİ ==========
 
 @router.get("/belediye/tum-rezervasyonlar")
-async def get_all_reservations():
+def get_all_reservations():
     try:
         # Tüm rezervasyonları döndür
-        all_reservations = []
-        for user in set(r["user_id"] for r in reservation_system.reservations):
-            user_res = reservation_system.get_user_reservations(user)
-            all_reservations.extend(user_res)
+        all_reservations = reservation_system.get_all_reservations()
         return {"tum_rezervasyonlar": all_reservations}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tüm rezervasyonları getirme hatası: {str(e)}")
 
 @router.get("/belediye/istatistikler")
-async def get_reservation_stats():
+def get_reservation_stats():
     try:
         stats = reservation_system.get_reservation_stats()
         return {"istatistikler": stats}
@@ -213,40 +282,55 @@ async def get_reservation_stats():
 
 
 @router.get("/belediye/performans-raporu")
-async def get_performance_report():
+def get_performance_report():
     try:
         # Performans raporu: genel sistem durumu
+        rezervasyon_stats = reservation_system.get_reservation_stats()
         report = {
             "toplam_tesis": len(TESISLER),
-            "toplam_rezervasyon": len(reservation_system.reservations),
-            "aktif_rezervasyon": len([r for r in reservation_system.reservations if r["durum"] == "aktif"]),
+            "toplam_rezervasyon": rezervasyon_stats["toplam_rezervasyon"],
+            "aktif_rezervasyon": rezervasyon_stats["aktif_rezervasyon"],
             "sistem_durumu": "Çalışıyor",
+            "hava_durumu_onbellegi": get_weather_cache_stats(),
+            "tahmin_onbellegi": prediction_cache.get_stats(),
+            "tahmin_tablosu": forecast_grid.get_status(),
             "son_guncelleme": datetime.now().isoformat()
         }
         return {"performans_raporu": report}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Performans raporu hatası: {str(e)}")
 
-@router.post("/belediye/model-egitim")
-async def retrain_model():
+@router.post("/belediye/model-egitim", status_code=202)
+def retrain_model():
     try:
-        # Model yeniden eğitimi simülasyonu
-        # Gerçekte train_model.py'yi çalıştırır
-        import subprocess
-        result = subprocess.run(["python", "ai/train_model.py"], capture_output=True, text=True)
-        if result.returncode == 0:
-            return {"status": "success", "message": "Model yeniden eğitildi"}
-        else:
-            raise HTTPException(status_code=500, detail=f"Model eğitimi başarısız: {result.stderr}")
+        # Eğitim arka plan işçisinde çalışır; kısa aralıklı istekler tek işte birleşir
+        job = retrain_worker.submit("yonetici")
+        return {
+            "status": "accepted",
+            "message": "Model yeniden eğitimi kuyruğa alındı",
+            "job_id": job["job_id"],
+            "is": job
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Model eğitimi hatası: {str(e)}")
 
+@router.get("/belediye/model-egitim")
+def list_retrain_jobs(limit: int = Query(10, ge=1, le=50)):
+    return {"isler": retrain_worker.list_jobs(limit)}
+
+@router.get("/belediye/model-egitim/{job_id}")
+def get_retrain_job(job_id: str):
+    job = retrain_worker.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Eğitim işi bulunamadı")
+    return job
+
 @router.get("/belediye/gunluk-istatistikler")
-async def get_daily_stats():
+def get_daily_stats():
     try:
         # Günlük istatistikler: basit örnek
         today = datetime.now().date()
-        today_reservations = [r for r in reservation_system.reservations if r["tarih"] == str(today)]
+        today_reservations = reservation_system.get_reservations_on(str(today))
         stats = {
             "tarih": str(today),
             "gunluk_rezervasyon": len(today_reservations),
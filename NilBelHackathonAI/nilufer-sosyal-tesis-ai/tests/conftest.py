@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Proje kökü (ai/, utils/ paketleri) import yoluna eklenir
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
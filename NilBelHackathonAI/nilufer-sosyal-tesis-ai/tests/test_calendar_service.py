@@ -0,0 +1,71 @@
+"""Takvim servisi: yıllık bit haritaları, tek tarih ve vektörel sorgular"""
+
+import json
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.calendar_service import CalendarService, DINI_BAYRAM, RESMI_TATIL, SINAV_HAFTASI
+
+
+def _service(**kwargs):
+    return CalendarService(path=None, **kwargs)
+
+
+def test_day_flags():
+    calendar = _service()
+
+    assert calendar.day_flags(date(2025, 10, 29)) == RESMI_TATIL
+    assert calendar.day_flags(date(2025, 6, 7)) == DINI_BAYRAM | SINAV_HAFTASI
+    assert calendar.day_flags(date(2025, 1, 10)) == SINAV_HAFTASI
+    assert calendar.day_flags(date(2025, 2, 10)) == 0
+
+    assert calendar.is_official_holiday(datetime(2026, 3, 21, 15)) == 1
+    assert calendar.is_exam_week(date(2025, 11, 10)) == 1
+    assert calendar.describe(date(2025, 11, 10)) == ["Atatürk'ü Anma Günü", "Güz yarıyılı ara sınavları"]
+
+
+def test_vectorized_matches_scalar_across_years():
+    calendar = _service()
+    hours = pd.date_range("2024-12-20", "2026-01-10", freq="h")
+
+    gunler = [ts.date() for ts in hours[::24]]
+    np.testing.assert_array_equal(
+        calendar.holidays(hours[::24]), [calendar.is_official_holiday(g) for g in gunler]
+    )
+    np.testing.assert_array_equal(
+        calendar.exam_weeks(hours[::24]), [calendar.is_exam_week(g) for g in gunler]
+    )
+    assert calendar.flags([]).shape == (0,)
+
+
+def test_recurring_range_wraps_year_end_and_skips_feb_29():
+    calendar = _service(sinav_haftalari=[("12-28", "01-03", "Yılsonu"), ("02-29", "02-29", "Artık gün")])
+
+    assert calendar.is_exam_week(date(2025, 12, 30)) == 1
+    assert calendar.is_exam_week(date(2025, 1, 2)) == 1
+    assert calendar.is_exam_week(date(2025, 1, 4)) == 0
+    assert calendar.is_exam_week(date(2024, 2, 29)) == 1
+    assert calendar.is_exam_week(date(2025, 3, 1)) == 0
+
+
+def test_definitions_file_overrides_defaults(tmp_path):
+    path = tmp_path / "takvim.json"
+    path.write_text(json.dumps({"dini_bayramlar": [["2028-02-26", "2028-02-28", "Ramazan Bayramı"]]}))
+    calendar = CalendarService(path=str(path))
+
+    assert calendar.is_official_holiday(date(2028, 2, 27)) == 1
+    # Verilmeyen anahtarlar varsayılan kalır
+    assert calendar.is_official_holiday(date(2028, 10, 29)) == 1
+
+
+def test_warns_once_for_year_without_religious_holidays(capsys):
+    calendar = _service()
+
+    calendar.is_official_holiday(date(2027, 1, 1))
+    assert "UYARI" not in capsys.readouterr().out
+
+    calendar.is_official_holiday(date(2030, 1, 1))
+    calendar.is_official_holiday(date(2030, 6, 1))
+    assert capsys.readouterr().out.count("2030 yılı için dini bayram tanımı yok") == 1
@@ -0,0 +1,134 @@
+"""Saatlik doluluk toplayıcı: akış ve vektörel motorlar"""
+
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from utils.data_aggregator import (
+    ACTION_ORDER, OUTPUT_COLUMNS, StreamingOccupancyAggregator, aggregate_vectorized,
+    benchmark_engines, generate_synthetic_scans
+)
+from utils.feature_service import FeatureService
+from utils.tesisler import get_tesis_by_id
+
+
+class _Reservations:
+    """Tarih ve tesise göre belirlenimci saatlik rezervasyonlar"""
+
+    def get_hourly_reserved(self, tesis_id, tarih):
+        gun = int(tarih[-2:])
+        return [(tesis_id * 7 + gun * 3 + saat) % 11 for saat in range(24)]
+
+
+class _Events:
+    def get_active_events(self, tarih):
+        return [{"tesis_id": 3}] if int(tarih[-2:]) % 4 == 0 else []
+
+
+@pytest.fixture
+def features():
+    return FeatureService(reservations=_Reservations(), events=_Events())
+
+
+def _records(df):
+    return [
+        {"timestamp": ts.isoformat(), "tesis_id": int(t), "action": a}
+        for ts, t, a in zip(df["timestamp"], df["tesis_id"], df["action"])
+    ]
+
+
+def _sorted(records):
+    return sorted(records, key=lambda r: (datetime.fromisoformat(r["timestamp"]), ACTION_ORDER[r["action"]]))
+
+
+def _stream(records, features, allowed_lateness=timedelta(0)):
+    agg = StreamingOccupancyAggregator(allowed_lateness=allowed_lateness, features=features)
+    rows = list(agg.process(records))
+    rows.sort(key=lambda row: (row["tesis_id"], row["timestamp"]))
+    return pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+
+
+# ---------------------------------------------------------------------- akış motoru
+
+def _kapasite(tesis_id):
+    return get_tesis_by_id(tesis_id)["kapasite"]
+
+
+def _event(saat, dakika, action, tesis_id=1, saniye=0):
+    return {"timestamp": datetime(2025, 3, 10, saat, dakika, saniye).isoformat(), "tesis_id": tesis_id, "action": action}
+
+
+def test_streaming_tolerates_disorder_within_lateness(features):
+    df = generate_synthetic_scans(5_000, days=2, seed=3)
+    records = _sorted(_records(df))
+
+    # Olaylar en fazla birkaç saniye kayacak şekilde karıştırılır
+    rng = random.Random(1)
+    shuffled = sorted(
+        records,
+        key=lambda r: datetime.fromisoformat(r["timestamp"]) + timedelta(seconds=rng.uniform(0, 30))
+    )
+
+    late = _stream(shuffled, features, allowed_lateness=timedelta(minutes=1))
+    assert late.equals(aggregate_vectorized(df, features))
+
+
+def test_streaming_emits_hour_once_watermark_passes(features):
+    agg = StreamingOccupancyAggregator(features=features)
+
+    assert agg.push(_event(10, 5, "enter")) == []
+    assert agg.push(_event(10, 40, "enter")) == []
+    [row] = agg.push(_event(11, 0, "exit", saniye=1))
+
+    assert (row["tesis_id"], row["saat"]) == (1, 10)
+    assert agg.flush()[0]["saat"] == 11
+
+
+def test_streaming_drops_and_counts_events_behind_watermark(features):
+    agg = StreamingOccupancyAggregator(allowed_lateness=timedelta(minutes=5), features=features)
+    events = [
+        _event(10, 0, "enter"),
+        _event(10, 30, "enter"),
+        _event(10, 27, "enter"),   # Gecikme sınırında, kabul edilir
+        _event(10, 10, "exit"),    # Watermark (10:25) gerisinde, atılır
+        {"timestamp": _event(10, 31, "enter")["timestamp"], "tesis_id": 1, "action": "scan"},
+    ]
+
+    rows = list(agg.process(events))
+
+    assert agg.stats == {"olay": 3, "gec_atilan": 1, "gecersiz": 1, "uretilen_saat": 1}
+    expected = round(3 / _kapasite(1) * 100, 1)
+    assert rows[0]["doluluk_orani"] == expected
+
+
+def test_streaming_same_timestamp_exit_applies_before_enter(features):
+    # Aynı saniyedeki çıkış, girişten sonra gelse bile önce uygulanır: tepe 1 kişi kalır
+    agg = StreamingOccupancyAggregator(features=features)
+    events = [_event(10, 0, "enter"), _event(10, 30, "enter"), _event(10, 30, "exit")]
+
+    [row] = agg.process(events)
+
+    assert row["doluluk_orani"] == round(1 / _kapasite(1) * 100, 1)
+
+
+# ---------------------------------------------------------------------- vektörel motor
+
+def test_aggregation_engines_identical(features):
+    df = generate_synthetic_scans(50_000, days=10, seed=7)
+
+    stream = _stream(_sorted(_records(df)), features)
+    vectorized = aggregate_vectorized(df, features)
+
+    assert len(stream) > 0
+    assert stream.equals(vectorized)
+
+
+def test_benchmark_compares_engines_on_same_rows():
+    sonuc = benchmark_engines(sizes=(2_000,), vectorized_rows=0)
+
+    [olcum] = sonuc["karsilastirma"]
+    assert olcum["olay_sayisi"] == 2_000
+    assert olcum["ciktilar_ayni"]
+    assert sonuc["vektorel"] is None
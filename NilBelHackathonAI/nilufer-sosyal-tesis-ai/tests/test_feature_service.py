@@ -0,0 +1,101 @@
+"""Özellik servisi: artımlı güncelleme, TTL ve veri kaydına yazılan özellikler"""
+
+from datetime import datetime
+
+import pytest
+
+from utils.feature_service import FeatureService
+
+
+class _Reservations:
+    def __init__(self):
+        self.kisi = {}
+        self.okuma = 0
+
+    def get_hourly_reserved(self, tesis_id, tarih):
+        self.okuma += 1
+        return list(self.kisi.get((tesis_id, tarih), [0] * 24))
+
+
+class _Events:
+    def __init__(self):
+        self.etkinlikler = {}
+
+    def get_active_events(self, tarih):
+        return [{"tesis_id": t} for t in self.etkinlikler.get(tarih, [])]
+
+
+@pytest.fixture
+def kaynaklar():
+    return _Reservations(), _Events()
+
+
+def test_reservation_change_updates_only_its_slot(kaynaklar):
+    reservations, events = kaynaklar
+    service = FeatureService(reservations, events, ttl=3600)
+
+    assert service.reserved(1, "2025-03-10")[10] == 0
+    assert service.reserved(2, "2025-03-10")[10] == 0
+    okuma = reservations.okuma
+
+    # Kayıt önbellekten okunur; değişiklik servise bildirilene kadar görünmez
+    reservations.kisi[(1, "2025-03-10")] = [5] * 24
+    assert service.reserved(1, "2025-03-10")[10] == 0
+    assert reservations.okuma == okuma
+
+    service.on_reservation_changed({"tesis_id": 1, "tarih": "2025-03-10"})
+    assert reservations.okuma == okuma + 1
+    assert service.reserved(1, "2025-03-10")[10] == 5
+    assert service.reserved(2, "2025-03-10")[10] == 0
+    assert service.get_stats()["artimli_guncelleme"] == 1
+
+
+def test_ttl_picks_up_changes_from_other_processes(kaynaklar):
+    reservations, events = kaynaklar
+    service = FeatureService(reservations, events, ttl=0)
+
+    service.reserved(1, "2025-03-10")
+    reservations.kisi[(1, "2025-03-10")] = [3] * 24
+    assert service.reserved(1, "2025-03-10")[0] == 3
+
+
+def test_event_change_invalidates_event_days(kaynaklar):
+    reservations, events = kaynaklar
+    service = FeatureService(reservations, events, ttl=3600)
+
+    assert service.day_features(3, "2025-03-10")["etkinlik_var"] == 0
+    events.etkinlikler["2025-03-10"] = [3]
+    assert service.day_features(3, "2025-03-10")["etkinlik_var"] == 0
+
+    service.on_events_changed()
+    assert service.day_features(3, "2025-03-10")["etkinlik_var"] == 1
+
+
+def test_context_combines_calendar_and_slot_features(kaynaklar):
+    reservations, events = kaynaklar
+    reservations.kisi[(1, "2025-10-29")] = list(range(24))
+    service = FeatureService(reservations, events)
+
+    context = service.context(1, datetime(2025, 10, 29, 14))
+    assert context == {"saat": 14, "hafta_sonu": 0, "resmi_tatil": 1, "etkinlik_var": 0,
+                       "sinav_haftasi": 0, "rezervasyon_sayisi": 14}
+    assert service.context(1, datetime(2025, 10, 29, 14), sinav_haftasi=1)["sinav_haftasi"] == 1
+
+
+def test_real_data_entry_records_live_features(tmp_path, monkeypatch):
+    import utils.datalogger as datalogger
+    from utils.visitor_store import VisitorStore, VISITOR_SCHEMA
+
+    context = {"saat": 11, "hafta_sonu": 0, "resmi_tatil": 1, "etkinlik_var": 1,
+               "sinav_haftasi": 1, "rezervasyon_sayisi": 7}
+    monkeypatch.setattr(datalogger.feature_service, "context", lambda tesis_id, when=None: context)
+    monkeypatch.setattr(datalogger, "get_weather_data", lambda: {"hava_sicakligi": 12.0, "yagis_var": 1})
+
+    logger = datalogger.DataLogger()
+    logger.store = VisitorStore("gercek", VISITOR_SCHEMA, data_dir=str(tmp_path), flush_interval=0)
+    monkeypatch.setattr(logger, "_check_retraining_trigger", lambda: None)
+
+    assert logger.log_real_data_entry(1, 42.0)["status"] == "success"
+    row = logger.store.read().iloc[0]
+    assert (row["resmi_tatil"], row["etkinlik_var"], row["sinav_haftasi"], row["rezervasyon_sayisi"]) == (1, 1, 1, 7)
+    assert row["doluluk_orani"] == 42.0
@@ -0,0 +1,128 @@
+"""Tahmin tablosu: tam hesaplama, rezervasyonda yalnızca ilgili satırın yenilenmesi ve anlık görüntü"""
+
+from datetime import date, datetime, time as dt_time, timedelta
+
+import numpy as np
+import pytest
+
+import ai.forecast_grid as forecast_grid_module
+import ai.predict as predict
+from ai.features import FEATURES
+from ai.forecast_grid import ForecastGrid
+from utils.feature_service import FeatureService
+
+
+class _Reservations:
+    def __init__(self):
+        self.kisi = {}
+
+    def get_hourly_reserved(self, tesis_id, tarih):
+        return self.kisi.get((tesis_id, tarih), [0] * 24)
+
+
+class _Events:
+    def get_active_events(self, tarih):
+        return []
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    weights = np.zeros(len(FEATURES))
+    weights[FEATURES.index("rezervasyon_sayisi")] = 1.0
+    weights[FEATURES.index("sicaklik")] = 0.5
+    data = {"features": FEATURES, "kernel": {"features": FEATURES, "weights": weights, "bias": 10.0},
+            "version": 1, "training_info": {"trained_at": "2025-01-01T00:00:00"}}
+    reservations = _Reservations()
+    weather = {"sicaklik": 20.0, "calls": 0}
+
+    def hava(times):
+        weather["calls"] += 1
+        return [{"hava_sicakligi": weather["sicaklik"], "yagis_var": 0, "kaynak": "tahmin"} for _ in times]
+
+    monkeypatch.setattr(predict.model_registry, "get", lambda: data)
+    monkeypatch.setattr(predict, "feature_service", FeatureService(reservations=reservations, events=_Events(), ttl=0))
+    monkeypatch.setattr(forecast_grid_module, "get_hourly_forecast_for", hava)
+    return {"data": data, "reservations": reservations, "weather": weather, "path": str(tmp_path / "grid.npz")}
+
+
+def _grid(env, **kwargs):
+    grid = ForecastGrid(path=env["path"], days=3, tesis_ids=[1, 2], debounce=0, **kwargs)
+    grid.start = lambda: None     # Yenileme testte senkron çağrılır
+    return grid
+
+
+def _at(gun, saat):
+    return datetime.combine(date.today() + timedelta(days=gun), dt_time(saat))
+
+
+def test_initial_build_covers_open_hours_of_horizon(env):
+    grid = _grid(env)
+    assert grid.lookup() is None
+
+    assert grid.refresh() is True
+
+    np.testing.assert_allclose(grid.lookup(when=_at(0, 9)), [20.0, 20.0])
+    np.testing.assert_allclose(grid.lookup([2], when=_at(2, 21)), [20.0])
+    assert grid.lookup(when=_at(0, 8)) is None       # Kapalı saat
+    assert grid.lookup(when=_at(3, 10)) is None      # Ufuk dışı
+    assert grid.lookup([99], when=_at(0, 10)) is None
+    # Değişiklik yoksa periyodik kontrol tabloyu yeniden hesaplamaz
+    assert grid.refresh() is False
+
+
+def test_reservation_change_refreshes_only_its_row(env):
+    grid = _grid(env)
+    grid.refresh()
+    before = grid._grid["doluluk"].copy()
+    tarih = (date.today() + timedelta(days=1)).isoformat()
+
+    env["reservations"].kisi[(1, tarih)] = [0] * 10 + [15] * 14
+    predict.feature_service.on_reservation_changed({"tesis_id": 1, "tarih": tarih})
+    grid.invalidate_slot(1, tarih)
+    work = grid._take_work()
+    assert work == ("satir", {(1, tarih)})
+    grid.refresh(work)
+
+    assert grid.stats == {"tam_yenileme": 1, "satir_yenileme": 1, "anlik_goruntu_yukleme": 0}
+    assert grid.lookup([1], when=_at(1, 9))[0] == 20.0
+    assert grid.lookup([1], when=_at(1, 10))[0] == 35.0
+    changed = np.argwhere(grid._grid["doluluk"] != before)
+    assert {(f, gun) for f, gun, _ in changed} == {(0, 1)}
+
+
+def test_full_invalidation_wins_over_pending_rows(env):
+    grid = _grid(env)
+    grid.refresh()
+
+    grid.invalidate_slot(1, date.today().isoformat())
+    grid.invalidate("model versiyon 2")
+
+    assert grid._take_work() == ("tam", "model versiyon 2")
+
+
+def test_weather_change_promotes_row_update_to_full_rebuild(env):
+    grid = _grid(env)
+    grid.refresh()
+
+    env["weather"]["sicaklik"] = 30.0
+    grid.refresh(("satir", {(1, date.today().isoformat())}))
+
+    assert grid.stats["tam_yenileme"] == 2 and grid.stats["satir_yenileme"] == 0
+    np.testing.assert_allclose(grid.lookup(when=_at(2, 12)), [25.0, 25.0])
+
+
+def test_other_worker_loads_snapshot_instead_of_building(env):
+    _grid(env).refresh()
+    builds = env["weather"]["calls"]
+
+    other = _grid(env)
+    assert other.refresh() is False
+
+    assert other.stats["anlik_goruntu_yukleme"] == 1
+    # Yalnızca hava durumu karşılaştırması yapılır, tablo yeniden hesaplanmaz
+    assert other.stats["tam_yenileme"] == 0 and env["weather"]["calls"] == builds + 1
+    np.testing.assert_allclose(other.lookup(when=_at(1, 15)), [20.0, 20.0])
+
+    # Başka bir modelle yazılmış anlık görüntü kullanılmaz
+    env["data"]["training_info"] = {"trained_at": "2025-02-01T00:00:00"}
+    assert _grid(env).refresh() is True
@@ -0,0 +1,127 @@
+"""Artımlı eğitim: yeterli istatistiklerden çözülen model sklearn ile aynıdır"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai.features import FEATURES, TARGET
+from ai.incremental_trainer import IncrementalTrainer, SufficientStats, merge_all, solve, REAL_DATA_WEIGHT
+
+
+def _training_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "tesis_id": rng.integers(1, 13, n),
+        "saat": rng.integers(9, 22, n),
+        "hafta_sonu": rng.integers(0, 2, n),
+        "resmi_tatil": rng.integers(0, 2, n),
+        "etkinlik_var": rng.integers(0, 2, n),
+        "sinav_haftasi": rng.integers(0, 2, n),
+        "rezervasyon_sayisi": rng.integers(0, 40, n),
+        "sicaklik": rng.normal(18, 8, n),
+        "yagis_var": rng.integers(0, 2, n),
+    })
+    df[TARGET] = df[FEATURES].to_numpy() @ rng.normal(0, 2, len(FEATURES)) + rng.normal(0, 5, n)
+    return df
+
+
+def _parts(df, n):
+    """Tabloyu n parçaya böler (depo bölümlerinin yerine)"""
+    return [df.iloc[idx] for idx in np.array_split(np.arange(len(df)), n)]
+
+
+def _fit_sklearn(synthetic, real):
+    """train_hybrid_model ile aynı fit: StandardScaler + ağırlıklı LinearRegression"""
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import StandardScaler
+
+    combined = pd.concat([synthetic, real], ignore_index=True)
+    weights = np.ones(len(combined))
+    weights[len(synthetic):] = REAL_DATA_WEIGHT
+    weights = weights / weights.sum() * len(weights)
+
+    scaler = StandardScaler()
+    X = scaler.fit_transform(combined[FEATURES])
+    model = LinearRegression().fit(X, combined[TARGET], sample_weight=weights)
+    return scaler, model
+
+
+def test_incremental_solution_matches_sklearn():
+    synthetic = _training_frame(4_000, seed=1)
+    real = _training_frame(600, seed=2)
+
+    # Bölüm bölüm katlanan istatistikler (yeniden eğitimdeki gibi)
+    synthetic_stats = merge_all(SufficientStats.from_frame(part) for part in _parts(synthetic, 7))
+    real_stats = merge_all(SufficientStats.from_frame(part) for part in _parts(real, 5))
+    result = solve(synthetic_stats, real_stats)
+
+    scaler, model = _fit_sklearn(synthetic, real)
+    np.testing.assert_allclose(result["mean"], scaler.mean_, rtol=1e-10)
+    np.testing.assert_allclose(result["scale"], scaler.scale_, rtol=1e-10)
+    np.testing.assert_allclose(result["coef"], model.coef_, rtol=1e-8, atol=1e-10)
+    assert result["intercept"] == pytest.approx(model.intercept_, rel=1e-10)
+
+
+def test_sufficient_stats_merge_is_order_independent():
+    df = _training_frame(1_000, seed=5)
+    parts = [SufficientStats.from_frame(part) for part in _parts(df, 4)]
+    whole = SufficientStats.from_frame(df)
+
+    for merged in (merge_all(parts), merge_all(reversed(parts))):
+        assert merged.n == whole.n
+        np.testing.assert_allclose(merged.mean, whole.mean, rtol=1e-12)
+        np.testing.assert_allclose(merged.m2, whole.m2, rtol=1e-9)
+
+
+class _Store:
+    """Bölüm -> {dosya: tablo} olarak tutulan depo (okunan dosyalar kaydedilir)"""
+
+    def __init__(self):
+        self.parts = {}
+        self.reads = []
+
+    def list_parts(self):
+        return {partition: list(files) for partition, files in self.parts.items()}
+
+    def read_parts(self, partition, files, columns):
+        self.reads.extend(files)
+        return pd.concat([self.parts[partition][f] for f in files], ignore_index=True)[columns]
+
+
+def test_update_reads_only_new_part_files(tmp_path):
+    synthetic, real = _Store(), _Store()
+    synthetic.parts["2025-01-01"] = {"a": _training_frame(300, seed=1)}
+    real.parts["2025-01-01"] = {"b": _training_frame(40, seed=2)}
+    trainer = IncrementalTrainer(stats_path=str(tmp_path / "model_stats.json"),
+                                 stores={"sentetik": synthetic, "gercek": real})
+
+    state = trainer._load_state()
+    assert trainer.update(state) == 340
+
+    real.parts["2025-01-01"]["c"] = _training_frame(25, seed=3)
+    real.parts["2025-01-02"] = {"d": _training_frame(10, seed=4)}
+    synthetic.reads.clear()
+    real.reads.clear()
+
+    assert trainer.update(state) == 35
+    assert synthetic.reads == [] and sorted(real.reads) == ["c", "d"]
+    assert trainer.totals(state)["gercek"].n == 75
+
+
+def test_rewritten_partition_is_recomputed(tmp_path):
+    store = _Store()
+    store.parts["2025-01-01"] = {"a": _training_frame(50, seed=1), "b": _training_frame(50, seed=2)}
+    trainer = IncrementalTrainer(stats_path=str(tmp_path / "model_stats.json"),
+                                 stores={"sentetik": store, "gercek": _Store()})
+    state = trainer._load_state()
+    trainer.update(state)
+
+    # Sıkıştırma iki dosyayı tek dosyaya yazar; bölüm baştan okunur, satırlar iki kez sayılmaz
+    merged = pd.concat(store.parts["2025-01-01"].values(), ignore_index=True)
+    store.parts["2025-01-01"] = {"ab": merged}
+    trainer.update(state)
+
+    total = trainer.totals(state)["sentetik"]
+    whole = SufficientStats.from_frame(merged[FEATURES + [TARGET]])
+    assert total.n == 100
+    np.testing.assert_allclose(total.mean, whole.mean, rtol=1e-12)
@@ -0,0 +1,63 @@
+"""NumPy çıkarım çekirdeği: sklearn ile aynı tahmin ve güncel olmayan çekirdekte pickle'a dönüş"""
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from ai.features import FEATURES
+from ai.linear_kernel import fold_linear_model, load_kernel, predict_linear, save_kernel
+from ai.model_registry import ModelRegistry, save_model_atomic
+
+
+def _fit(seed=0, n=500):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(10, 5, (n, len(FEATURES))), columns=FEATURES)
+    y = X.to_numpy() @ rng.normal(0, 3, len(FEATURES)) + rng.normal(0, 1, n)
+    scaler = StandardScaler().fit(X)
+    model = LinearRegression().fit(scaler.transform(X), y)
+    return {"model": model, "scaler": scaler, "features": FEATURES}, X
+
+
+def test_folded_kernel_matches_sklearn_pipeline():
+    data, X = _fit()
+    kernel = fold_linear_model(data["model"], data["scaler"], FEATURES)
+
+    expected = data["model"].predict(data["scaler"].transform(X))
+    np.testing.assert_allclose(predict_linear(kernel, X.to_numpy()), expected, rtol=1e-10, atol=1e-9)
+
+
+def test_saved_kernel_round_trips(tmp_path):
+    data, X = _fit(seed=1)
+    kernel = fold_linear_model(data["model"], data["scaler"], FEATURES)
+    path = str(tmp_path / "model_kernel.json")
+    save_kernel(kernel, path, training_info={"r2_score": 0.9})
+
+    loaded = load_kernel(path)
+    assert loaded["features"] == FEATURES
+    assert loaded["training_info"] == {"r2_score": 0.9}
+    np.testing.assert_array_equal(predict_linear(loaded, X.to_numpy()), predict_linear(kernel, X.to_numpy()))
+
+
+def test_non_linear_model_is_not_folded():
+    assert fold_linear_model(object(), None, FEATURES) is None
+
+
+def test_registry_prefers_kernel_only_when_in_sync(tmp_path):
+    model_path = str(tmp_path / "model.pkl")
+    kernel_path = str(tmp_path / "model_kernel.json")
+    data, _ = _fit(seed=2)
+    save_model_atomic(data, model_path)
+    save_kernel(fold_linear_model(data["model"], data["scaler"], FEATURES), kernel_path, source_path=model_path)
+
+    # Çekirdek model.pkl ile eşleşiyorsa sklearn nesneleri yüklenmez
+    loaded = ModelRegistry(model_path=model_path, kernel_path=kernel_path).get()
+    assert "model" not in loaded
+
+    # model.pkl yeniden yazıldı ama çekirdek yazılmadı: pickle kullanılır
+    newer, X = _fit(seed=3)
+    save_model_atomic(newer, model_path)
+    loaded = ModelRegistry(model_path=model_path, kernel_path=kernel_path).get()
+    assert "model" in loaded
+    expected = newer["model"].predict(newer["scaler"].transform(X))
+    np.testing.assert_allclose(predict_linear(loaded["kernel"], X.to_numpy()), expected, rtol=1e-10, atol=1e-9)
@@ -0,0 +1,95 @@
+"""Model kayıt defteri: tek seferlik yükleme, sıcak yeniden yükleme ve bozuk dosyaya dayanıklılık"""
+
+import os
+import time
+
+import numpy as np
+
+from ai.model_registry import ModelRegistry, save_model_atomic
+
+FEATURES = ["saat", "sicaklik"]
+
+
+class _Linear:
+    def __init__(self, coef, intercept):
+        self.coef_ = np.asarray(coef, dtype=float)
+        self.intercept_ = intercept
+
+
+class _Scaler:
+    mean_ = np.zeros(2)
+    scale_ = np.ones(2)
+
+
+def _model_data(bias):
+    return {"model": _Linear([1.0, 2.0], bias), "scaler": _Scaler(), "features": FEATURES}
+
+
+def _registry(tmp_path, **kwargs):
+    return ModelRegistry(model_path=str(tmp_path / "model.pkl"),
+                         kernel_path=str(tmp_path / "model_kernel.json"), **kwargs)
+
+
+def _bump_mtime(path):
+    # Aynı nanosaniyede yazılan dosyanın damgası değişmeyebilir
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def _wait_for_version(registry, version):
+    deadline = time.time() + 5
+    while registry.version < version and time.time() < deadline:
+        registry.get()
+        time.sleep(0.01)
+    return registry.version
+
+
+def test_model_is_unpickled_once(tmp_path, monkeypatch):
+    save_model_atomic(_model_data(5.0), str(tmp_path / "model.pkl"))
+    registry = _registry(tmp_path, check_interval=0)
+
+    loads = []
+    read = registry._read_model_files
+    monkeypatch.setattr(registry, "_read_model_files", lambda: loads.append(1) or read())
+
+    first = registry.get()
+    for _ in range(50):
+        assert registry.get() is first
+    assert len(loads) == 1
+    assert first["kernel"]["bias"] == 5.0
+
+
+def test_retrained_model_is_hot_reloaded(tmp_path):
+    path = str(tmp_path / "model.pkl")
+    save_model_atomic(_model_data(5.0), path)
+    registry = _registry(tmp_path, check_interval=0)
+    versions = []
+    registry.add_listener(versions.append)
+    old = registry.get()
+
+    save_model_atomic(_model_data(7.0), path)
+    _bump_mtime(path)
+
+    assert _wait_for_version(registry, 2) == 2
+    assert registry.get()["kernel"]["bias"] == 7.0
+    assert registry.get()["version"] == 2 and old["version"] == 1
+    assert versions == [1, 2]
+
+
+def test_corrupt_model_keeps_serving_previous(tmp_path):
+    path = str(tmp_path / "model.pkl")
+    save_model_atomic(_model_data(5.0), path)
+    registry = _registry(tmp_path, check_interval=0)
+    registry.get()
+
+    with open(path, "wb") as f:
+        f.write(b"yarim yazilmis")
+    _bump_mtime(path)
+
+    assert registry.reload() is False
+    assert registry.get()["kernel"]["bias"] == 5.0
+    assert registry.version == 1
+
+
+def test_missing_model_returns_none(tmp_path):
+    assert _registry(tmp_path).get() is None
@@ -0,0 +1,95 @@
+"""Saatlik doluluk eğrisi: tek model çağrısı, tek saatlik tahminle aynı sonuç ve eğri önbelleği"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import ai.predict as predict
+from ai.features import FEATURES
+from ai.prediction_cache import PredictionCache
+from utils.feature_service import FeatureService
+
+
+class _Reservations:
+    def get_hourly_reserved(self, tesis_id, tarih):
+        return [(tesis_id * 5 + saat) % 9 for saat in range(24)]
+
+
+class _FullReservations:
+    def get_hourly_reserved(self, tesis_id, tarih):
+        return [20] * 24
+
+
+class _Events:
+    def get_active_events(self, tarih):
+        return [{"tesis_id": 2}]
+
+
+def _hava(start, hours):
+    return [{"hava_sicakligi": 10.0 + h % 12, "yagis_var": h % 2, "kaynak": "tahmin"} for h in range(hours)]
+
+
+@pytest.fixture
+def curve(monkeypatch):
+    rng = np.random.default_rng(0)
+    kernel = {"features": FEATURES, "weights": rng.normal(0, 1, len(FEATURES)), "bias": 40.0}
+    data = {"features": FEATURES, "kernel": kernel, "version": 1}
+    features = FeatureService(reservations=_Reservations(), events=_Events())
+    calls = []
+
+    def hava(start, hours):
+        calls.append((start, hours))
+        return _hava(start, hours)
+
+    monkeypatch.setattr(predict.model_registry, "get", lambda: data)
+    monkeypatch.setattr(predict, "feature_service", features)
+    monkeypatch.setattr(predict, "get_hourly_forecast", hava)
+    monkeypatch.setattr(predict, "curve_cache", PredictionCache())
+    monkeypatch.setattr(predict, "prediction_cache", PredictionCache())
+    return data, features, calls
+
+
+def test_curve_matches_single_hour_predictions(curve):
+    _, features, _ = curve
+    baslangic = datetime(2025, 10, 28, 0)   # 29 Ekim resmi tatiline uzanır
+
+    sonuc = predict.predict_occupancy_curve([1, 2, 3], baslangic=baslangic, saat_sayisi=48)
+
+    assert sonuc["saat_sayisi"] == 48 and len(sonuc["saatler"]) == 48
+    hava = _hava(baslangic, 48)
+    for f, tesis in enumerate(sonuc["tesisler"]):
+        contexts = []
+        for h, saat in enumerate(sonuc["saatler"]):
+            when = datetime.fromisoformat(saat)
+            context = features.context(tesis["tesis_id"], when)
+            context.update(sicaklik=hava[h]["hava_sicakligi"], yagis_var=hava[h]["yagis_var"])
+            contexts.append({k: context[k] for k in FEATURES if k != "tesis_id"})
+        beklenen = predict.predict_occupancy_batch([tesis["tesis_id"]] * 48, contexts, use_cache=False)
+        np.testing.assert_allclose(tesis["doluluk"], np.round(beklenen, 1), atol=0.051)
+        assert tesis["rezerve_kisi"] == [c["rezervasyon_sayisi"] for c in contexts]
+
+
+def test_curve_is_cached_until_inputs_change(curve):
+    data, features, calls = curve
+    baslangic = datetime(2025, 3, 10, 9)
+
+    first = predict.predict_occupancy_curve([1], baslangic=baslangic, saat_sayisi=12)
+    assert predict.predict_occupancy_curve([1], baslangic=baslangic, saat_sayisi=12) is first
+    assert len(calls) == 1
+
+    # Rezervasyon değişince anahtar da değişir
+    features._reservations = _FullReservations()
+    features.on_reservation_changed({"tesis_id": 1, "tarih": "2025-03-10"})
+    changed = predict.predict_occupancy_curve([1], baslangic=baslangic, saat_sayisi=12)
+    assert changed is not first
+    assert changed["tesisler"][0]["rezerve_kisi"] == [20] * 12
+
+    # Yeni model versiyonu önbellekteki eğriyi kullanmaz
+    data["version"] = 2
+    assert predict.predict_occupancy_curve([1], baslangic=baslangic, saat_sayisi=12)["model_versiyonu"] == 2
+
+
+def test_curve_rejects_horizon_beyond_forecast(curve):
+    with pytest.raises(ValueError):
+        predict.predict_occupancy_curve([1], saat_sayisi=predict.CURVE_MAX_HOURS + 1)
@@ -0,0 +1,77 @@
+"""Tahmin önbelleği: kovalanmış anahtarlar, LRU ve model versiyonu değişince geçersiz kılma"""
+
+import numpy as np
+import pytest
+
+import ai.predict as predict
+from ai.features import FEATURES
+from ai.prediction_cache import PredictionCache
+
+
+def _data(version, bias):
+    kernel = {"features": FEATURES, "weights": np.full(len(FEATURES), 0.1), "bias": bias}
+    return {"features": FEATURES, "kernel": kernel, "version": version}
+
+
+def _context(**kwargs):
+    context = {f: 0 for f in FEATURES if f != "tesis_id"}
+    context.update({"saat": 14, "sicaklik": 20.0, **kwargs})
+    return context
+
+
+@pytest.fixture
+def model(monkeypatch):
+    state = {"data": _data(1, 10.0)}
+    cache = PredictionCache(max_size=16)
+    monkeypatch.setattr(predict.model_registry, "get", lambda: state["data"])
+    monkeypatch.setattr(predict, "prediction_cache", cache)
+    return state, cache
+
+
+def test_repeated_prediction_is_served_from_cache(model):
+    _, cache = model
+
+    first = predict.predict_occupancy_batch([1, 2], _context())
+    # Aynı sıcaklık kovasına düşen okuma aynı anahtarı kullanır
+    second = predict.predict_occupancy_batch([1, 2], _context(sicaklik=20.3))
+
+    np.testing.assert_array_equal(first, second)
+    assert cache.stats["miss"] == 2 and cache.stats["hit"] == 2
+
+
+def test_new_model_version_is_not_served_old_results(model):
+    state, cache = model
+    old = predict.predict_occupancy_batch([1], _context())
+
+    state["data"] = _data(2, 30.0)
+    new = predict.predict_occupancy_batch([1], _context())
+
+    assert new[0] == pytest.approx(old[0] + 20.0)
+
+
+def test_model_reload_listener_clears_cache(model, monkeypatch):
+    _, cache = model
+    curve_cache = PredictionCache()
+    monkeypatch.setattr(predict, "curve_cache", curve_cache)
+    predict.predict_occupancy_batch([1, 2, 3], _context())
+    curve_cache.put(("egri",), [1.0])
+    assert cache.get_stats()["kayit_sayisi"] == 3
+
+    predict._on_model_reloaded(1)    # İlk yükleme önbelleği boşaltmaz
+    assert cache.get_stats()["kayit_sayisi"] == 3
+
+    predict._on_model_reloaded(2)
+    assert cache.get_stats()["kayit_sayisi"] == 0
+    assert curve_cache.get(("egri",)) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_size=2)
+    cache.put("a", 1.0)
+    cache.put("b", 2.0)
+    cache.get("a")
+    cache.put("c", 3.0)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1.0 and cache.get("c") == 3.0
+    assert cache.stats["eviction"] == 1
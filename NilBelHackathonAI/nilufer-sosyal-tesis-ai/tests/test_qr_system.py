@@ -0,0 +1,143 @@
+"""QR tarama sistemi: halka tampon, başarısız yazımda geri alma, düşen kayıt sayımı ve sayaçlar"""
+
+import builtins
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+import utils.qr_system as qr_module
+from utils.qr_system import MemoryCounterStore, QRSystem, SQLiteCounterStore
+from utils.storage import SQLiteStorage
+
+
+@pytest.fixture
+def qr(tmp_path, monkeypatch):
+    monkeypatch.setattr(qr_module, "QR_LOG_BATCH_SIZE", 1_000)
+    system = QRSystem(data_dir=str(tmp_path), buffer_size=5)
+    system._stop_event.set()      # Arka plan yazıcısı testlerde araya girmez
+    yield system
+    system._stop_event.set()
+
+
+def _logged(system):
+    entries = []
+    for path in sorted(Path(system.daily_logs_dir).glob("scan_log_*.jsonl")):
+        entries.extend(json.loads(line) for line in path.read_text(encoding="utf-8").splitlines())
+    return [e["qr_data"] for e in entries]
+
+
+def _scan(system, *codes):
+    for code in codes:
+        assert system.log_qr_scan(1, code)["status"] == "success"
+
+
+def test_scans_are_written_in_batches(qr, monkeypatch):
+    monkeypatch.setattr(qr_module, "QR_LOG_BATCH_SIZE", 3)
+
+    _scan(qr, "a", "b")
+    assert _logged(qr) == []
+    _scan(qr, "c")
+    assert _logged(qr) == ["a", "b", "c"]
+    assert qr.get_daily_stats()["pending_log_entries"] == 0
+
+
+def test_full_buffer_drops_oldest_and_counts(qr):
+    _scan(qr, *"abcdefg")
+
+    assert qr.flush() == 5
+    assert _logged(qr) == list("cdefg")
+    assert qr.get_daily_stats()["dropped_log_entries"] == 2
+
+
+def test_failed_flush_requeues_batch_in_order(qr):
+    _scan(qr, "a", "b", "c")
+    logs_dir = qr.daily_logs_dir
+    qr.daily_logs_dir = str(qr.data_dir) + "/yok"
+
+    assert qr.flush() == 0
+    # Geri alınan kayıtlar, bu arada gelen taramalarla kapasiteyi aşınca en eskiler düşer
+    _scan(qr, "d", "e", "f")
+    stats = qr.get_daily_stats()
+    assert (stats["pending_log_entries"], stats["dropped_log_entries"]) == (5, 1)
+
+    qr.daily_logs_dir = logs_dir
+    assert qr.flush() == 5
+    assert _logged(qr) == list("bcdef")
+
+
+def test_failed_flush_overflow_is_counted(qr, monkeypatch):
+    _scan(qr, "a", "b", "c", "d")
+    logs_dir = qr.daily_logs_dir
+    qr.daily_logs_dir = str(qr.data_dir) + "/yok"
+
+    # Yazım sürerken dolan tampon: yazılamayan toplu kayıttan yalnızca sığan kadarı geri alınır
+    def scans_during_write(*args, **kwargs):
+        _scan(qr, "x", "y")
+        return builtins.open(*args, **kwargs)
+
+    monkeypatch.setattr(qr_module, "open", scans_during_write, raising=False)
+    assert qr.flush() == 0
+    monkeypatch.delattr(qr_module, "open")
+
+    assert qr.get_daily_stats()["dropped_log_entries"] == 1
+    qr.daily_logs_dir = logs_dir
+    assert qr.flush() == 5
+    assert _logged(qr) == list("bcdxy")
+
+
+def _hammer(increments, each=250):
+    """Her sayaç fonksiyonunu ayrı bir iş parçacığında each kez çağırır"""
+    def worker(increment):
+        for _ in range(each):
+            increment("2025-01-01", 1)
+
+    pool = [threading.Thread(target=worker, args=(inc,)) for inc in increments]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+def test_memory_counters_are_exact_under_threads():
+    counters = MemoryCounterStore()
+
+    _hammer([counters.increment] * 8)
+
+    assert counters.counts("2025-01-01") == {1: 2000}
+
+
+def test_sqlite_counters_are_shared_across_workers(tmp_path):
+    path = str(tmp_path / "nilufer.db")
+    workers = [SQLiteCounterStore(SQLiteStorage(path)) for _ in range(4)]
+    seen = []
+
+    def via(worker):
+        return lambda tarih, tesis_id: seen.append(worker.increment(tarih, tesis_id))
+
+    _hammer([via(w) for w in workers * 2], each=50)
+
+    assert workers[0].counts("2025-01-01") == {1: 400}
+    # Her artırma kendi sonucunu döndürür; iki işçi aynı değeri görmez
+    assert sorted(seen) == list(range(1, 401))
+
+
+def test_sqlite_rollover_is_claimed_once(tmp_path):
+    path = str(tmp_path / "nilufer.db")
+    workers = [SQLiteCounterStore(SQLiteStorage(path)) for _ in range(3)]
+
+    assert [w.claim_rollover("2025-01-01") for w in workers] == [True, False, False]
+    assert workers[1].claim_rollover("2025-01-02") is True
+
+
+def test_session_counts_survive_restart(tmp_path):
+    first = QRSystem(data_dir=str(tmp_path))
+    first._stop_event.set()
+    _scan(first, "a", "b")
+    first.flush()
+
+    restarted = QRSystem(data_dir=str(tmp_path))
+    restarted._stop_event.set()
+    _scan(restarted, "c")
+    assert restarted.daily_counter == {1: 3}
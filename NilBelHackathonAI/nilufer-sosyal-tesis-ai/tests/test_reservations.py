@@ -0,0 +1,198 @@
+"""Rezervasyon sistemi: indeksler, saatlik kapasite kontrolü, eklemeli günlük ve SQLite arka ucu"""
+
+import json
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from utils.reservations import ReservationSystem, SQLiteReservationSystem
+from utils.storage import SQLiteStorage
+
+
+@pytest.fixture(autouse=True)
+def no_feature_hooks(monkeypatch):
+    # Özellik servisi ve tahmin tablosu global rezervasyon sistemine bağlıdır
+    monkeypatch.setattr(ReservationSystem, "_on_reservations_changed", lambda self, reservation: None)
+
+
+def _tarih(gun=1):
+    return str(date.today() + timedelta(days=gun))
+
+
+def _istek(user_id="u1", tesis_id=1, saat=10, sure=1, kisi_sayisi=2, gun=1):
+    return {"user_id": user_id, "tesis_id": tesis_id, "tarih": _tarih(gun),
+            "saat": saat, "sure": sure, "kisi_sayisi": kisi_sayisi}
+
+
+def test_compaction_keeps_other_workers_events(tmp_path):
+    worker_a = ReservationSystem(data_dir=str(tmp_path))
+    worker_b = ReservationSystem(data_dir=str(tmp_path))
+
+    a1 = worker_a.create_reservation(_istek("a", saat=10))["details"]
+    a2 = worker_a.create_reservation(_istek("a", saat=12))["details"]
+    b1 = worker_b.create_reservation(_istek("b", saat=14))["details"]
+    assert worker_a.cancel_reservation(a2["id"], "a")["status"] == "success"
+
+    # B, A'nın olaylarını belleğinde hiç görmeden sıkıştırır
+    worker_b.compact()
+
+    restarted = ReservationSystem(data_dir=str(tmp_path))
+    durumlar = {r["id"]: r["durum"] for r in restarted.get_all_reservations()}
+    assert durumlar == {a1["id"]: "aktif", a2["id"]: "iptal_edildi", b1["id"]: "aktif"}
+    # Sıkıştıran işçi de birleşik durumu görür
+    assert {r["id"] for r in worker_b.get_all_reservations()} == set(durumlar)
+
+
+def test_capacity_checked_on_every_spanned_hour(tmp_path):
+    system = ReservationSystem(data_dir=str(tmp_path))
+    # Tesis 2: kapasite 60, %80 limiti 48 kişi
+    assert system.create_reservation(_istek(tesis_id=2, saat=10, sure=3, kisi_sayisi=40))["status"] == "success"
+
+    # Yalnızca son kapsanan saat (12) limiti aşar
+    sonuc = system.create_reservation(_istek(tesis_id=2, saat=12, sure=2, kisi_sayisi=10))
+    assert sonuc == {"status": "error", "message": "Yetersiz kapasite"}
+    assert system.create_reservation(_istek(tesis_id=2, saat=13, sure=2, kisi_sayisi=10))["status"] == "success"
+
+    reserved = system.get_hourly_reserved(2, _tarih())
+    assert reserved[9:16] == [0, 40, 40, 40, 10, 10, 0]
+
+
+def test_other_users_conflict_on_overlapping_hours(tmp_path):
+    system = ReservationSystem(data_dir=str(tmp_path))
+    assert system.create_reservation(_istek("u1", saat=10, sure=2))["status"] == "success"
+
+    assert system.create_reservation(_istek("u2", saat=11))["message"] == "Bu zaman diliminde çakışma var"
+    assert system.create_reservation(_istek("u2", saat=12))["status"] == "success"
+
+    serbest = {s["saat"] for s in system.free_slots(1, _tarih(), user_id="u3")}
+    assert {10, 11, 12}.isdisjoint(serbest)
+    assert 13 in serbest
+
+
+def test_rejects_booking_past_midnight(tmp_path):
+    system = ReservationSystem(data_dir=str(tmp_path))
+
+    assert system.create_reservation(_istek(saat=23, sure=3))["message"] == "Rezervasyon gece yarısını aşamaz"
+    assert system.create_reservation(_istek(saat=22, sure=2))["status"] == "success"
+    assert system.create_reservation(_istek(saat=24))["message"] == "Geçersiz saat veya süre"
+
+
+def test_indexes_follow_create_and_cancel(tmp_path):
+    system = ReservationSystem(data_dir=str(tmp_path))
+    r1 = system.create_reservation(_istek("u1", tesis_id=1, saat=10))["details"]
+    r2 = system.create_reservation(_istek("u1", tesis_id=2, saat=11, gun=2))["details"]
+    r3 = system.create_reservation(_istek("u2", tesis_id=1, saat=14))["details"]
+
+    assert system.get_reservation(r2["id"]) is r2
+    assert [r["id"] for r in system.get_user_reservations("u1")] == [r1["id"], r2["id"]]
+    assert {r["id"] for r in system.get_reservations_on(_tarih())} == {r1["id"], r3["id"]}
+    assert {r["id"] for r in system.get_reservations_for_date(1, _tarih())} == {r1["id"], r3["id"]}
+
+    assert system.cancel_reservation(r1["id"], "u2")["status"] == "error"
+    assert system.cancel_reservation(r1["id"], "u1")["status"] == "success"
+
+    assert [r["id"] for r in system.get_reservations_for_date(1, _tarih())] == [r3["id"]]
+    assert [r["id"] for r in system.get_reservations_by_status("iptal_edildi")] == [r1["id"]]
+    assert {r["id"] for r in system.get_reservations_by_status("aktif")} == {r2["id"], r3["id"]}
+    # İptal edilen rezervasyon kullanıcı ve tarih indekslerinde kalır
+    assert len(system.get_user_reservations("u1")) == 2
+    assert system.get_hourly_reserved(1, _tarih())[10] == 0
+
+    stats = system.get_reservation_stats()
+    assert (stats["toplam_rezervasyon"], stats["aktif_rezervasyon"], stats["iptal_rezervasyon"]) == (3, 2, 1)
+    assert stats["tesis_bazli"] == {1: 1, 2: 1}
+
+
+def test_changes_are_journaled_and_replayed(tmp_path):
+    system = ReservationSystem(data_dir=str(tmp_path))
+    r1 = system.create_reservation(_istek("u1", saat=10))["details"]
+    r2 = system.create_reservation(_istek("u1", saat=12))["details"]
+    system.cancel_reservation(r2["id"], "u1")
+
+    # Anlık görüntü yeniden yazılmaz, değişiklikler günlüğe eklenir
+    assert json.loads((tmp_path / "rezervasyonlar.json").read_text()) == []
+    assert len((tmp_path / "rezervasyonlar.journal.jsonl").read_text().splitlines()) == 3
+
+    restarted = ReservationSystem(data_dir=str(tmp_path))
+    assert restarted.get_reservation(r1["id"])["durum"] == "aktif"
+    assert restarted.get_reservation(r2["id"])["durum"] == "iptal_edildi"
+    assert restarted.get_hourly_reserved(1, _tarih())[10:13] == [2, 0, 0]
+
+
+def test_torn_trailing_line_is_dropped_and_journal_compacted(tmp_path):
+    system = ReservationSystem(data_dir=str(tmp_path))
+    r1 = system.create_reservation(_istek("u1", saat=10))["details"]
+    journal = tmp_path / "rezervasyonlar.journal.jsonl"
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"op": "create", "rezervasyon": {"id": "yar')   # Çökme anında yarım kalan satır
+
+    restarted = ReservationSystem(data_dir=str(tmp_path))
+
+    assert [r["id"] for r in restarted.get_all_reservations()] == [r1["id"]]
+    # Yarım satırın arkasına yazılmaması için günlük hemen anlık görüntüye sıkıştırılır
+    assert journal.read_text() == ""
+    r2 = restarted.create_reservation(_istek("u2", saat=14))["details"]
+    again = ReservationSystem(data_dir=str(tmp_path))
+    assert {r["id"] for r in again.get_all_reservations()} == {r1["id"], r2["id"]}
+
+
+def test_replaying_journal_after_interrupted_compaction_is_idempotent(tmp_path):
+    system = ReservationSystem(data_dir=str(tmp_path))
+    r1 = system.create_reservation(_istek("u1", saat=10))["details"]
+    system.cancel_reservation(r1["id"], "u1")
+    journal = (tmp_path / "rezervasyonlar.journal.jsonl").read_text()
+
+    # Anlık görüntü yazıldı, günlük kesilmeden çökülmüş gibi
+    system.compact()
+    (tmp_path / "rezervasyonlar.journal.jsonl").write_text(journal)
+
+    restarted = ReservationSystem(data_dir=str(tmp_path))
+    assert len(restarted.get_all_reservations()) == 1
+    assert restarted.get_reservation(r1["id"])["durum"] == "iptal_edildi"
+
+
+def _sqlite_workers(tmp_path, n):
+    """Aynı veritabanını kendi bağlantılarıyla kullanan n işçi"""
+    path = str(tmp_path / "nilufer.db")
+    storage = SQLiteStorage(path)
+    with storage.transaction() as conn:
+        # Proje data/ klasöründeki JSON'un aktarılmaması için
+        storage.mark_migrated(conn, "rezervasyonlar", 0)
+    return [SQLiteReservationSystem(storage=SQLiteStorage(path)) for _ in range(n)]
+
+
+def _race(workers, requests):
+    barrier = threading.Barrier(len(requests))
+    results = [None] * len(requests)
+
+    def book(i):
+        barrier.wait()
+        results[i] = workers[i % len(workers)].create_reservation(requests[i])
+
+    threads = [threading.Thread(target=book, args=(i,)) for i in range(len(requests))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_sqlite_concurrent_bookings_do_not_double_book(tmp_path):
+    workers = _sqlite_workers(tmp_path, 4)
+
+    results = _race(workers, [_istek(f"u{i}", saat=10) for i in range(8)])
+
+    assert sum(r["status"] == "success" for r in results) == 1
+    assert {r["message"] for r in results if r["status"] == "error"} == {"Bu zaman diliminde çakışma var"}
+    assert len(workers[0].get_reservations_for_date(1, _tarih())) == 1
+
+
+def test_sqlite_concurrent_bookings_respect_capacity(tmp_path):
+    workers = _sqlite_workers(tmp_path, 4)
+
+    # Tesis 2: %80 limiti 48 kişi; aynı kullanıcının 10'ar kişilik istekleri çakışma sayılmaz
+    results = _race(workers, [_istek("u1", tesis_id=2, saat=10, kisi_sayisi=10) for _ in range(8)])
+
+    assert sum(r["status"] == "success" for r in results) == 4
+    assert workers[1].get_hourly_reserved(2, _tarih())[10] == 40
@@ -0,0 +1,96 @@
+"""Yeniden eğitim işçisi: tetiklemelerin birleştirilmesi (debounce) ve işlerin sıralanması"""
+
+import sys
+import time
+
+import pytest
+
+from ai.retrain_worker import CALISIYOR, HATA, TAMAMLANDI, RetrainWorker
+
+
+def _command(runs, sleep=0.0, exit_code=0):
+    """Her çalıştırmada runs dosyasına satır ekleyen sahte eğitim komutu"""
+    script = (f"import time; open({str(runs)!r}, 'a').write('x\\n'); time.sleep({sleep}); "
+              f"print('egitim hatasi'); raise SystemExit({exit_code})")
+    return [sys.executable, "-c", script]
+
+
+def _runs(path):
+    return len(path.read_text().splitlines()) if path.exists() else 0
+
+
+@pytest.fixture
+def make_worker(tmp_path, monkeypatch):
+    workers = []
+
+    def make(**kwargs):
+        kwargs.setdefault("debounce", 0.2)
+        kwargs.setdefault("max_delay", 10)
+        worker = RetrainWorker(jobs_dir=str(tmp_path / "retrain_jobs"), lock_path=str(tmp_path / "retrain.lock"),
+                               **kwargs)
+        monkeypatch.setattr(worker, "_publish", lambda: 7)
+        workers.append(worker)
+        return worker
+
+    yield make
+    for worker in workers:
+        worker.stop()
+
+
+def _wait(worker, job_id, states=(TAMAMLANDI, HATA), timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = worker.get_job(job_id)
+        if job and job["durum"] in states:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"iş {job_id} beklenen duruma gelmedi: {worker.get_job(job_id)}")
+
+
+def test_burst_of_triggers_runs_one_training(tmp_path, make_worker):
+    runs = tmp_path / "runs.txt"
+    worker = make_worker(command=_command(runs))
+
+    jobs = [worker.submit("kayit_esigi") for _ in range(4)] + [worker.submit("yonetici")]
+
+    assert len({job["job_id"] for job in jobs}) == 1
+    assert _runs(runs) == 0     # Debounce süresi dolmadan eğitim başlamaz
+    job = _wait(worker, jobs[0]["job_id"])
+    assert job["durum"] == TAMAMLANDI and job["model_versiyonu"] == 7
+    assert job["tetikleme_sayisi"] == 5
+    assert job["nedenler"] == ["kayit_esigi", "yonetici"]
+    assert _runs(runs) == 1
+
+
+def test_triggers_during_training_coalesce_into_next_job(tmp_path, make_worker):
+    runs = tmp_path / "runs.txt"
+    worker = make_worker(command=_command(runs, sleep=0.5), debounce=0.05)
+
+    first = worker.submit("ilk")
+    _wait(worker, first["job_id"], states=(CALISIYOR,))
+    second = [worker.submit("sonraki") for _ in range(3)]
+
+    assert {job["job_id"] for job in second} != {first["job_id"]}
+    assert len({job["job_id"] for job in second}) == 1
+    _wait(worker, second[0]["job_id"])
+    assert _runs(runs) == 2
+    assert [job["job_id"] for job in worker.list_jobs()] == [second[0]["job_id"], first["job_id"]]
+
+
+def test_max_delay_caps_debounce(tmp_path, make_worker):
+    runs = tmp_path / "runs.txt"
+    worker = make_worker(command=_command(runs), debounce=60, max_delay=0.2)
+
+    job = worker.submit()
+
+    assert _wait(worker, job["job_id"], timeout=5)["durum"] == TAMAMLANDI
+
+
+def test_failed_training_is_reported(tmp_path, make_worker):
+    worker = make_worker(command=_command(tmp_path / "runs.txt", exit_code=3), debounce=0.01)
+
+    job = _wait(worker, worker.submit()["job_id"])
+
+    assert job["durum"] == HATA
+    assert "3 koduyla" in job["hata"] and "egitim hatasi" in job["hata"]
+    assert job["model_versiyonu"] is None
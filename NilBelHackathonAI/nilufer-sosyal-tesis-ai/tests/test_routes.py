@@ -0,0 +1,64 @@
+"""API uç noktaları: giriş doğrulaması ve doluluk eğrisi"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def client():
+    from backend.routes import router
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_free_slots_rejects_invalid_date(client):
+    assert client.get("/bos-saatler/1", params={"tarih": "bad"}).status_code == 400
+
+
+def test_free_slots_unknown_facility(client):
+    assert client.get("/bos-saatler/999", params={"tarih": "2025-03-10"}).status_code == 404
+
+
+def test_free_slots_valid_request(client):
+    response = client.get("/bos-saatler/1", params={"tarih": "2025-03-10"})
+    assert response.status_code == 200
+    assert response.json()["tarih"] == "2025-03-10"
+
+
+@pytest.fixture
+def stub_forecast(monkeypatch):
+    import ai.predict as predict
+    monkeypatch.setattr(predict, "get_hourly_forecast",
+                        lambda start, hours: [{"hava_sicakligi": 15.0, "yagis_var": 0, "kaynak": "tahmin"}] * hours)
+
+
+def test_curve_for_one_facility_and_day(client, stub_forecast):
+    response = client.get("/tahmin-egrisi", params={"tesis_id": 1, "tarih": "2025-03-10", "saat": 24})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["baslangic"] == "2025-03-10T00:00:00"
+    [tesis] = body["tesisler"]
+    assert tesis["tesis_id"] == 1 and len(tesis["doluluk"]) == 24
+    assert all(0 <= v <= 100 for v in tesis["doluluk"])
+
+
+def test_curve_defaults_to_all_facilities(client, stub_forecast):
+    from utils.tesisler import TESISLER
+
+    body = client.get("/tahmin-egrisi", params={"gun": 2}).json()
+
+    assert body["saat_sayisi"] == 48
+    assert [t["tesis_id"] for t in body["tesisler"]] == [t["tesis_id"] for t in TESISLER]
+
+
+@pytest.mark.parametrize("params, status", [
+    ({"tesis_id": 999}, 404),
+    ({"tarih": "10-03-2025"}, 400),
+    ({"gun": 6}, 422),
+    ({"saat": 0}, 422),
+])
+def test_curve_rejects_invalid_parameters(client, params, status):
+    assert client.get("/tahmin-egrisi", params=params).status_code == status
@@ -0,0 +1,63 @@
+"""Gece yarısı zamanlayıcısı (FakeClock ile, beklemeden): kaçırılan çalışma bir kez telafi edilir"""
+
+from datetime import datetime, timedelta
+
+from utils.scheduler import DailyAt, Every, FakeClock, Scheduler
+
+
+def _scheduler(tmp_path, now):
+    return Scheduler(clock=FakeClock(now), state_path=str(tmp_path / "scheduler_state.json"))
+
+
+def test_scheduler_catch_up_fires_once(tmp_path):
+    now = datetime(2025, 3, 10, 9, 30)
+    scheduler = _scheduler(tmp_path, now)
+    scheduler._state["gun_sonu"] = (now - timedelta(days=3)).isoformat()
+
+    calls = []
+    scheduler.add_job("gun_sonu", calls.append, DailyAt(0, 0))
+
+    # Üç gün kaçırılmış olsa da telafi tek çalışmadır
+    assert scheduler.run_until(now + timedelta(hours=1)) == ["gun_sonu"]
+    assert calls == [now]
+
+    # Sonraki çalışma ertesi gece yarısı
+    scheduler.run_until(datetime(2025, 3, 11, 0, 1))
+    assert calls == [now, datetime(2025, 3, 11)]
+
+
+def test_scheduler_new_job_does_not_backfill(tmp_path):
+    now = datetime(2025, 3, 10, 9, 30)
+    scheduler = _scheduler(tmp_path, now)
+
+    calls = []
+    scheduler.add_job("gun_sonu", calls.append, DailyAt(0, 0))
+
+    assert scheduler.run_until(datetime(2025, 3, 10, 23, 59)) == []
+    assert calls == []
+
+
+def test_scheduler_state_survives_restart(tmp_path):
+    now = datetime(2025, 3, 10, 0, 0)
+    scheduler = _scheduler(tmp_path, now)
+    scheduler._state["gun_sonu"] = (now - timedelta(days=1)).isoformat()
+    scheduler.add_job("gun_sonu", lambda t: None, DailyAt(0, 0))
+    scheduler.run_until(now + timedelta(minutes=5))
+
+    # Aynı gün yeniden başlayan süreç görevi tekrar çalıştırmaz
+    restarted = _scheduler(tmp_path, now + timedelta(hours=2))
+    calls = []
+    restarted.add_job("gun_sonu", calls.append, DailyAt(0, 0))
+    restarted.run_until(now + timedelta(hours=23))
+    assert calls == []
+
+
+def test_scheduler_interval_job_runs_instantly(tmp_path):
+    now = datetime(2025, 3, 10, 12, 0)
+    scheduler = _scheduler(tmp_path, now)
+
+    calls = []
+    scheduler.add_job("retrain_kontrol", calls.append, Every(600))
+
+    scheduler.run_until(now + timedelta(hours=1))
+    assert calls == [now + timedelta(minutes=10 * i) for i in range(1, 7)]
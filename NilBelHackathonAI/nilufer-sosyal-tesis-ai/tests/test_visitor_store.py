@@ -0,0 +1,184 @@
+"""Ziyaretçi deposu: bölümlü yazım, eski CSV aktarımı ve kayıt sayacı"""
+
+import os
+import threading
+from datetime import datetime
+
+from utils.visitor_store import RecordCounter, VisitorStore, VISITOR_SCHEMA
+
+
+def _store(tmp_path, **kwargs):
+    kwargs.setdefault("flush_interval", 0)
+    return VisitorStore("gercek", VISITOR_SCHEMA, data_dir=str(tmp_path), **kwargs)
+
+
+def _row(gun, saat, tesis_id=1):
+    return {"timestamp": datetime(2025, 1, gun, saat).isoformat(), "tesis_id": tesis_id, "saat": saat}
+
+
+def test_failed_partition_is_requeued_without_duplicates(tmp_path):
+    store = _store(tmp_path)
+    for gun in (1, 2, 3):
+        for saat in range(10, 15):
+            store.append(_row(gun, saat))
+
+    write_part = store._write_part
+    calls = []
+
+    def failing_second_partition(directory, df):
+        calls.append(directory)
+        if len(calls) == 2:
+            raise OSError("disk dolu")
+        return write_part(directory, df)
+
+    store._write_part = failing_second_partition
+    assert store.flush() == 10
+    assert store.pending() == 5
+    assert store.counter.value() == 10
+
+    store._write_part = write_part
+    assert store.flush() == 5
+
+    df = store.read()
+    assert len(df) == 15
+    assert not df.duplicated(["timestamp", "tesis_id"]).any()
+    assert store.counter.value() == store._scan_count() == 15
+
+
+def test_missing_pyarrow_falls_back_to_csv(tmp_path, monkeypatch, capsys):
+    import utils.visitor_store as visitor_store
+    monkeypatch.setattr(visitor_store, "PARQUET_AVAILABLE", False)
+
+    store = _store(tmp_path, fmt="parquet")
+    assert store.fmt == "csv"
+    assert "pyarrow kurulu değil" in capsys.readouterr().out
+
+    store.append(_row(1, 10))
+    store.flush()
+    assert len(store.read()) == 1
+
+
+def _legacy_csv(tmp_path):
+    """log_qr_entry ve log_real_data_entry satırlarının karıştığı eski CSV"""
+    path = tmp_path / "gercek_ziyaretci.csv"
+    header = list(VISITOR_SCHEMA)
+    qr_row = {c: 0 for c in header}
+    qr_row.update(timestamp="2025-01-02T10:15:00", tesis_id=1, saat=10, gun=4, doluluk_orani=42.0)
+    lines = [",".join(header), ",".join(str(qr_row[c]) for c in header),
+             "2,2025-01-04,14,Saturday,1,12.5,0,61.0",
+             "3,bozuk-tarih,9,Monday,0,10.0,1,20.0"]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_legacy_csv_is_imported_once(tmp_path):
+    legacy = _legacy_csv(tmp_path)
+
+    store = _store(tmp_path, legacy_csv=legacy)
+    df = store.read()
+    assert sorted(df["tesis_id"].tolist()) == [1, 2]
+    assert df.loc[df["tesis_id"] == 2, "hafta_sonu"].item() == 1
+    assert store.count() == 2
+
+    # Aynı klasörü açan ikinci işçi (veya yeniden başlatma) aktarımı tekrarlamaz
+    again = _store(tmp_path, legacy_csv=legacy)
+    assert len(again.read()) == 2
+    assert again.count() == 2
+
+
+def test_failed_legacy_import_is_retried_without_double_counting(tmp_path):
+    store = _store(tmp_path, legacy_csv=_legacy_csv(tmp_path))
+    write = store._write
+
+    def failing_write(df):
+        raise OSError("disk dolu")
+
+    store._write = failing_write
+    assert store.count() == 0
+    assert not os.path.exists(store._marker_path())
+
+    store._write = write
+    assert len(store.read()) == 2
+    assert store.count() == store._scan_count() == 2
+
+
+def test_claim_registers_baseline_without_firing(tmp_path):
+    counter = RecordCounter(str(tmp_path / "sayac.json"))
+    counter.add(250)
+
+    # İlk kez görülen tüketici geçmiş eşikleri tetiklemez
+    assert counter.claim("data_logger", 100) is None
+    counter.add(49)
+    assert counter.claim("data_logger", 100) is None
+    counter.add(1)
+    assert counter.claim("data_logger", 100) == 300
+    assert counter.claim("data_logger", 100) is None
+
+
+def test_claim_fires_once_when_skipping_thresholds(tmp_path):
+    counter = RecordCounter(str(tmp_path / "sayac.json"))
+    counter.claim("retrain", 50)
+    counter.add(175)
+
+    assert counter.claim("retrain", 50) == 150
+    assert counter.claim("retrain", 50) is None
+
+
+def test_claim_consumers_are_independent(tmp_path):
+    counter = RecordCounter(str(tmp_path / "sayac.json"))
+    counter.claim("data_logger", 100)
+    counter.claim("retrain", 50)
+    counter.add(100)
+
+    assert counter.claim("data_logger", 100) == 100
+    assert counter.claim("retrain", 50) == 100
+
+
+def test_concurrent_claims_fire_once(tmp_path):
+    counter = RecordCounter(str(tmp_path / "sayac.json"))
+    counter.claim("data_logger", 100)
+
+    results = []
+
+    def writer():
+        for _ in range(25):
+            counter.add(1)
+            results.append(counter.claim("data_logger", 100))
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert counter.value() == 200
+    assert sorted(r for r in results if r) == [100, 200]
+
+
+def test_reset_caps_claimed_thresholds(tmp_path):
+    counter = RecordCounter(str(tmp_path / "sayac.json"))
+    counter.claim("retrain", 50)
+    counter.add(120)
+    assert counter.claim("retrain", 50) == 100
+
+    # Depo yeniden oluşturulunca eşikler yeni toplamı aşmaz, sonraki eşik yeniden tetiklenir
+    counter.reset(10)
+    counter.add(40)
+    assert counter.claim("retrain", 50) == 50
+
+
+def test_claimed_threshold_rows_are_on_disk(tmp_path):
+    store = _store(tmp_path, buffer_size=1_000)
+    store.claim_threshold("data_logger", 100)
+
+    esik = None
+    for i in range(100):
+        store.append({"timestamp": datetime(2025, 3, 10, 10, i % 60).isoformat(), "tesis_id": 1, "saat": 10})
+        esik = store.claim_threshold("data_logger", 100)
+        if i < 99:
+            assert esik is None
+
+    # Eşiği geçiren kayıtlar ayrı süreçteki eğitimin okuyabileceği şekilde diskte
+    assert esik == 100
+    assert store.pending() == 0
+    assert store._scan_count() == 100
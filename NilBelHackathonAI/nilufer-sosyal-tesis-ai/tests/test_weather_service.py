@@ -0,0 +1,156 @@
+"""Hava durumu önbelleği: TTL, eski okuma sunma, configure() yarışı ve yedek okumalar"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+from utils.weather_service import FallbackWeatherProvider, WeatherCache
+
+
+def _cache(tmp_path, fetcher=None, **kwargs):
+    calls = []
+
+    def fetch(base_url=None):
+        calls.append(base_url)
+        return {"hava_sicakligi": 21.5, "yagis_var": 0}
+
+    fallback = FallbackWeatherProvider(path=str(tmp_path / "son_hava_durumu.json"))
+    cache = WeatherCache(fetcher=fetcher or fetch, auto_start=False, fallback=fallback, **kwargs)
+    return cache, calls
+
+
+def _age_by(cache, seconds):
+    with cache._lock:
+        cache._fetched_at -= seconds
+
+
+def test_fresh_reading_is_served_from_memory(tmp_path):
+    cache, calls = _cache(tmp_path, ttl=600)
+
+    first = cache.get()
+    second = cache.get()
+
+    assert len(calls) == 1
+    assert first["kaynak"] == second["kaynak"] == "openweather"
+    assert second["hava_sicakligi"] == 21.5
+    assert cache.stats["miss"] == 1 and cache.stats["hit"] == 1
+
+
+def test_expired_reading_is_served_stale_while_refreshing(tmp_path):
+    cache, calls = _cache(tmp_path, ttl=600)
+    cache.get()
+    _age_by(cache, 700)
+
+    stale = cache.get()
+
+    assert stale["kaynak"] == "son_bilinen"
+    assert stale["yas_saniye"] == 700
+    deadline = time.time() + 5
+    while cache.stats["refresh_ok"] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 2
+    assert cache.get()["kaynak"] == "openweather"
+
+
+def test_async_get_shares_cached_reading(tmp_path):
+    cache, calls = _cache(tmp_path, ttl=600)
+
+    async def fetch(base_url=None):
+        calls.append(base_url)
+        return {"hava_sicakligi": 18.0, "yagis_var": 1}
+
+    cache.async_fetcher = fetch
+
+    async def main():
+        return await asyncio.gather(*(cache.aget() for _ in range(20)))
+
+    readings = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(r["hava_sicakligi"] == 18.0 and r["yagis_var"] == 1 for r in readings)
+
+
+def test_configure_during_reads_never_breaks_get(tmp_path):
+    cache, _ = _cache(tmp_path, ttl=600)
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                reading = cache.get()
+                assert "hava_sicakligi" in reading
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for _ in range(2000):
+        cache.configure(ttl=600)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+
+
+def test_configure_between_age_check_and_read(tmp_path):
+    cache, _ = _cache(tmp_path, ttl=600)
+    cache.get()
+    _age_by(cache, 700)
+    # Eski okuma yolunda yenileme tetiklenirken önbellek başka iş parçacığından boşaltılır
+    cache._refresh_in_background = cache.configure
+
+    stale = cache.get()
+
+    assert stale["kaynak"] == "son_bilinen"
+    assert stale["hava_sicakligi"] == 21.5
+
+
+def _failing(base_url=None):
+    raise ConnectionError("api kapalı")
+
+
+def test_failed_fetch_falls_back_to_last_good_reading(tmp_path):
+    path = str(tmp_path / "son_hava_durumu.json")
+    FallbackWeatherProvider(path=path).remember({"hava_sicakligi": 14.2, "yagis_var": 1}, fetched_at=time.time() - 60)
+    cache = WeatherCache(fetcher=_failing, auto_start=False, fallback=FallbackWeatherProvider(path=path))
+
+    reading = cache.get()
+
+    assert reading["kaynak"] == "son_bilinen"
+    assert reading["hava_sicakligi"] == 14.2 and reading["yagis_var"] == 1
+    assert 59 <= reading["yas_saniye"] <= 61
+    assert cache.stats["fallback"] == 1
+
+
+def test_failed_fetch_backs_off_instead_of_retrying(tmp_path):
+    cache, _ = _cache(tmp_path, fetcher=_failing)
+
+    cache.get()
+    cache.get()
+
+    assert cache.stats["refresh_fail"] == 1
+    assert cache.stats["fallback"] == 2
+
+
+def test_expired_last_good_uses_climatology(tmp_path):
+    provider = FallbackWeatherProvider(path=str(tmp_path / "son_hava_durumu.json"), max_age=3600)
+    provider.remember({"hava_sicakligi": 30.0, "yagis_var": 0}, fetched_at=datetime(2025, 1, 15, 9).timestamp())
+
+    reading = provider.get(now=datetime(2025, 1, 15, 12).timestamp())
+
+    assert reading == {"hava_sicakligi": 5.3, "yagis_var": 1, "kaynak": "klimatoloji", "yas_saniye": None}
+    assert provider.get(now=datetime(2025, 7, 1).timestamp())["yagis_var"] == 0
+
+
+def test_fallback_is_deterministic(tmp_path):
+    cache, _ = _cache(tmp_path, fetcher=_failing)
+
+    readings = [cache.get() for _ in range(5)]
+
+    assert all(r == readings[0] for r in readings)
+    assert readings[0]["kaynak"] == "klimatoloji"
@@ -0,0 +1,220 @@
+"""
+Calendar Service - Resmi Tatil, Dini Bayram ve Sınav Haftası Takvimi
+
+Bu modül:
+- Resmi tatil, dini bayram ve sınav haftası tanımlarını tek yerde tutar (isteğe bağlı
+  olarak data/takvim.json dosyasındaki tanımlarla değiştirilebilir)
+- Her yıl için günlük bit haritası (366 elemanlı uint8 dizi) üretir ve bellekte tutar:
+  RESMI_TATIL | DINI_BAYRAM | SINAV_HAFTASI
+- Çevrim içi yol için tek tarih sorgularını (QR girişi, tahmin) dizi indeksleyerek O(1)
+  yanıtlar
+- Toplayıcı ve eğitim kodu için tarih dizilerini (NumPy / pandas) tek seferde, vektörel
+  olarak sorgular
+
+Modelin resmi_tatil özelliği resmi tatil veya dini bayram günlerinde 1'dir.
+"""
+
+import os
+import json
+import threading
+from datetime import date, datetime
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+TAKVIM_PATH = os.getenv("TAKVIM_PATH", os.path.join(DATA_DIR, "takvim.json"))
+
+# Gün bayrakları
+RESMI_TATIL = 1
+DINI_BAYRAM = 2
+SINAV_HAFTASI = 4
+TATIL = RESMI_TATIL | DINI_BAYRAM
+
+# Her yıl aynı güne denk gelen resmi tatiller ("AA-GG")
+RESMI_TATILLER = [
+    ("01-01", "Yılbaşı"),
+    ("04-23", "Ulusal Egemenlik ve Çocuk Bayramı"),
+    ("05-19", "Atatürk'ü Anma, Gençlik ve Spor Bayramı"),
+    ("08-30", "Zafer Bayramı"),
+    ("10-29", "Cumhuriyet Bayramı"),
+    ("11-10", "Atatürk'ü Anma Günü"),
+]
+
+# Dini bayramlar hicri takvime bağlı olduğundan yıl yıl girilir (Diyanet takvimi, arife hariç)
+DINI_BAYRAMLAR = [
+    ("2024-04-10", "2024-04-12", "Ramazan Bayramı"),
+    ("2024-06-16", "2024-06-19", "Kurban Bayramı"),
+    ("2025-03-30", "2025-04-01", "Ramazan Bayramı"),
+    ("2025-06-06", "2025-06-09", "Kurban Bayramı"),
+    ("2026-03-20", "2026-03-22", "Ramazan Bayramı"),
+    ("2026-05-27", "2026-05-30", "Kurban Bayramı"),
+    ("2027-03-09", "2027-03-11", "Ramazan Bayramı"),
+    ("2027-05-16", "2027-05-19", "Kurban Bayramı"),
+]
+
+# Üniversite sınav dönemleri. "AA-GG" aralıkları her yıl tekrarlanır (yaklaşık akademik
+# takvim); belirli bir yıl için "YYYY-AA-GG" aralıkları da verilebilir
+SINAV_HAFTALARI = [
+    ("01-05", "01-18", "Güz yarıyılı final sınavları"),
+    ("04-06", "04-19", "Bahar yarıyılı ara sınavları"),
+    ("06-01", "06-14", "Bahar yarıyılı final sınavları"),
+    ("11-10", "11-23", "Güz yarıyılı ara sınavları"),
+]
+
+
+def _ranges_in_year(year, start, end):
+    """Tanımdaki [start, end] aralığının year yılına düşen (başlangıç, bitiş) parçaları"""
+    if len(start) == 5:
+        # Her yıl tekrarlanan aralık; yılsonunu aşıyorsa ("12-28" -> "01-03") ikiye bölünür
+        try:
+            s = date(year, int(start[:2]), int(start[3:]))
+            e = date(year, int(end[:2]), int(end[3:]))
+        except ValueError:  # 29 Şubat artık olmayan yılda
+            return []
+        if s <= e:
+            return [(s, e)]
+        return [(date(year, 1, 1), e), (s, date(year, 12, 31))]
+
+    s, e = date.fromisoformat(start), date.fromisoformat(end)
+    s, e = max(s, date(year, 1, 1)), min(e, date(year, 12, 31))
+    return [(s, e)] if s <= e else []
+
+
+class CalendarService:
+    def __init__(self, path=TAKVIM_PATH, resmi_tatiller=None, dini_bayramlar=None, sinav_haftalari=None):
+        definitions = self._load_definitions(path)
+        self.resmi_tatiller = resmi_tatiller or definitions.get("resmi_tatiller", RESMI_TATILLER)
+        self.dini_bayramlar = dini_bayramlar or definitions.get("dini_bayramlar", DINI_BAYRAMLAR)
+        self.sinav_haftalari = sinav_haftalari or definitions.get("sinav_haftalari", SINAV_HAFTALARI)
+
+        self._lock = threading.Lock()
+        self._years = {}    # yıl -> (bit haritası, 1 Ocak'ın ordinal değeri)
+
+    @staticmethod
+    def _load_definitions(path):
+        """data/takvim.json varsa tanımları oradan okur (yalnızca verilen anahtarlar değişir)"""
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                definitions = json.load(f)
+            print(f"[CALENDAR] Takvim tanımları yüklendi: {path}")
+            return {k: [tuple(item) for item in v] for k, v in definitions.items()}
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[CALENDAR] Takvim dosyası okunamadı, varsayılan tanımlar kullanılıyor: {e}")
+            return {}
+
+    # ------------------------------------------------------------------ bit haritaları
+
+    def _build(self, year):
+        bitmap = np.zeros(366, dtype=np.uint8)
+        ocak = date(year, 1, 1).toordinal()
+
+        def mark(start, end, flag):
+            for s, e in _ranges_in_year(year, start, end):
+                bitmap[s.toordinal() - ocak:e.toordinal() - ocak + 1] |= flag
+
+        for ay_gun, _ in self.resmi_tatiller:
+            mark(ay_gun, ay_gun, RESMI_TATIL)
+        for start, end, _ in self.dini_bayramlar:
+            mark(start, end, DINI_BAYRAM)
+        if not any(_ranges_in_year(year, start, end) for start, end, _ in self.dini_bayramlar):
+            # Dini bayramlar yıl yıl girilir; tanımsız yılda resmi_tatil bayramları kapsamaz
+            print(f"[CALENDAR] UYARI: {year} yılı için dini bayram tanımı yok; Ramazan ve Kurban "
+                  f"Bayramı resmi_tatil olarak işaretlenmeyecek (data/takvim.json güncellenmeli)")
+        for start, end, _ in self.sinav_haftalari:
+            mark(start, end, SINAV_HAFTASI)
+
+        bitmap.setflags(write=False)
+        return bitmap, ocak
+
+    def _year(self, year):
+        entry = self._years.get(year)
+        if entry is None:
+            with self._lock:
+                entry = self._years.get(year)
+                if entry is None:
+                    entry = self._years[year] = self._build(year)
+        return entry
+
+    def bitmap(self, year):
+        """year yılının günlük bayrak dizisi (indeks: yılın günü - 1)"""
+        return self._year(year)[0]
+
+    # ------------------------------------------------------------------ tek tarih (O(1))
+
+    def day_flags(self, gun):
+        """Tarihin bayrakları (RESMI_TATIL | DINI_BAYRAM | SINAV_HAFTASI); gun: date / datetime"""
+        bitmap, ocak = self._year(gun.year)
+        return int(bitmap[gun.toordinal() - ocak])
+
+    def is_official_holiday(self, gun):
+        """Resmi tatil veya dini bayram ise 1"""
+        return 1 if self.day_flags(gun) & TATIL else 0
+
+    def is_exam_week(self, gun):
+        """Sınav haftası ise 1"""
+        return 1 if self.day_flags(gun) & SINAV_HAFTASI else 0
+
+    def describe(self, gun):
+        """Tarihe denk gelen tanımların isimleri (ör. ["Kurban Bayramı"])"""
+        gun = gun.date() if isinstance(gun, datetime) else gun
+        flags = self.day_flags(gun)
+        if not flags:
+            return []
+
+        names = []
+        for ay_gun, name in self.resmi_tatiller:
+            if flags & RESMI_TATIL and gun.strftime("%m-%d") == ay_gun:
+                names.append(name)
+        for group, flag in ((self.dini_bayramlar, DINI_BAYRAM), (self.sinav_haftalari, SINAV_HAFTASI)):
+            if flags & flag:
+                names.extend(name for start, end, name in group
+                             if any(s <= gun <= e for s, e in _ranges_in_year(gun.year, start, end)))
+        return names
+
+    # ------------------------------------------------------------------ vektörel
+
+    def flags(self, dates):
+        """
+        Tarih dizisinin bayrakları (vektörel)
+
+        Args:
+            dates: datetime64 dizisi, pandas DatetimeIndex / Series veya date listesi
+
+        Returns:
+            np.ndarray: uint8 bayrak dizisi
+        """
+        days = np.asarray(dates).astype("datetime64[D]")
+        if days.size == 0:
+            return np.zeros(days.shape, dtype=np.uint8)
+
+        years = days.astype("datetime64[Y]")
+        yil = years.astype(np.int64) + 1970
+        gun = (days - years.astype("datetime64[D]")).astype(np.int64)
+
+        ilk, son = int(yil.min()), int(yil.max())
+        table = np.stack([self.bitmap(y) for y in range(ilk, son + 1)])
+        return table[yil - ilk, gun]
+
+    def holidays(self, dates):
+        """Resmi tatil / dini bayram bayrağı (0/1, int8)"""
+        return ((self.flags(dates) & TATIL) > 0).astype(np.int8)
+
+    def exam_weeks(self, dates):
+        """Sınav haftası bayrağı (0/1, int8)"""
+        return ((self.flags(dates) & SINAV_HAFTASI) > 0).astype(np.int8)
+
+
+# Global instance
+calendar_service = CalendarService()
+
+
+def is_official_holiday(gun):
+    """Kolay kullanım için global fonksiyon"""
+    return calendar_service.is_official_holiday(gun)
+
+
+def is_exam_week(gun):
+    """Kolay kullanım için global fonksiyon"""
+    return calendar_service.is_exam_week(gun)
@@ -3,104 +3,366 @@ Data Aggregator - Ham QR Verilerini Doluluk Oranına Dönüştürme
 
 Bu modül QR sisteminden gelen ham giriş-çıkış verilerini alır ve
 modelin beklediği doluluk oranı formatına dönüştürür.
+
+Olaylar zaman sırasıyla akış halinde işlenir (StreamingOccupancyAggregator):
+- Her tesis için anlık kişi sayısı ve saatlik tepe değeri tutulur
+- Aynı zaman damgasında çıkışlar girişlerden önce uygulanır, sayı 0'ın altına inmez
+- Sınırlı gecikmeye (watermark) kadar sırasız gelen olaylar yığında bekletilir
+- Kapanan saatler hemen üretilir; bellek kullanımı veri boyundan bağımsızdır
+
+Geçmiş veri doldurma (backfill) için aynı sonucu veren vektörel bir motor da vardır
+(aggregate_vectorized): pandas/NumPy ile sıralı kümülatif toplam + saatlik maksimum.
 """
 
 import pandas as pd
+import numpy as np
 import os
+import heapq
+import time
 from datetime import datetime, timedelta
 from collections import defaultdict
-from .tesisler import get_tesis_by_id
+from .tesisler import get_tesis_by_id, TESISLER
+from .visitor_store import real_visitor_store
+from .calendar_service import calendar_service
+
+# Aynı zaman damgasında uygulanma sırası
+ACTION_ORDER = {"exit": 0, "enter": 1}
+
+OUTPUT_COLUMNS = [
+    "timestamp", "tesis_id", "saat", "gun", "hafta_sonu", "resmi_tatil",
+    "etkinlik_var", "sinav_haftasi", "rezervasyon_sayisi",
+    "sicaklik", "yagis_var", "doluluk_orani"
+]
+
+
+def _feature_service():
+    from .feature_service import feature_service
+    return feature_service
+
+
+def build_occupancy_row(tesis_id, hour_ts, peak, kapasite, features=None):
+    """
+    Bir tesisin bir saatlik tepe doluluğundan model satırı üretir. Takvim ve etkinlik
+    bayrakları ile o saatteki rezerve kişi sayısı, tahminde kullanılanlarla aynı olması
+    için özellik servisinden okunur.
+    """
+    gun = (features or _feature_service()).day_features(tesis_id, hour_ts.strftime("%Y-%m-%d"))
+    return {
+        "timestamp": hour_ts.isoformat(),
+        "tesis_id": tesis_id,
+        "saat": hour_ts.hour,
+        "gun": hour_ts.weekday() + 1,
+        "hafta_sonu": 1 if hour_ts.weekday() >= 5 else 0,
+        "resmi_tatil": gun["resmi_tatil"],
+        "etkinlik_var": gun["etkinlik_var"],
+        "sinav_haftasi": gun["sinav_haftasi"],
+        "rezervasyon_sayisi": gun["rezervasyon"][hour_ts.hour],
+        "sicaklik": 20.0,  # Weather service'den gelecek
+        "yagis_var": 0,    # Weather service'den gelecek
+        "doluluk_orani": round(peak / kapasite * 100, 1)
+    }
+
+
+class StreamingOccupancyAggregator:
+    """
+    Giriş/çıkış olaylarını akış halinde saatlik doluluk satırlarına dönüştürür
+
+    Kullanım:
+        agg = StreamingOccupancyAggregator(allowed_lateness=timedelta(minutes=5))
+        for row in agg.process(olay_uretici):
+            ...
+
+    allowed_lateness: Bir olayın en fazla ne kadar geç (sırasız) gelebileceği.
+        Görülen en büyük zaman damgası - allowed_lateness = watermark; watermark'tan
+        önceki olaylar kesinleşir, watermark'tan eski gelen olaylar atılır ve sayılır.
+        Watermark anındaki olaylar bekletilir, böylece aynı zaman damgalı bir çıkış
+        sonradan gelse bile girişten önce uygulanır.
+    """
+
+    def __init__(self, allowed_lateness=timedelta(0), features=None):
+        self.allowed_lateness = allowed_lateness
+        self.features = features or _feature_service()
+
+        self._heap = []                      # (ts, sıra, seq, tesis_id) bekleyen olaylar
+        self._seq = 0
+        self._max_seen = None
+        self._watermark = None
+        self._closed_before = None           # Bu saat başından önceki saatler kapatıldı
+        self._counts = defaultdict(int)      # tesis_id -> anlık kişi sayısı
+        self._open_hours = {}                # (tesis_id, saat başı) -> tepe değer
+        self._kapasite = {}
+
+        self.stats = {"olay": 0, "gec_atilan": 0, "gecersiz": 0, "uretilen_saat": 0}
+
+    def push(self, record):
+        """
+        Tek olay ekler ve kapanan saatlerin satırlarını döndürür
+
+        Args:
+            record: {"timestamp": ISO str veya datetime, "tesis_id": int, "action": "enter"/"exit"}
+        """
+        order = ACTION_ORDER.get(record.get("action"))
+        if order is None:
+            self.stats["gecersiz"] += 1
+            return []
+
+        ts = record["timestamp"]
+        if not isinstance(ts, datetime):
+            ts = datetime.fromisoformat(ts)
+
+        if self._watermark is not None and ts < self._watermark:
+            self.stats["gec_atilan"] += 1
+            return []
+
+        self.stats["olay"] += 1
+        heapq.heappush(self._heap, (ts, order, self._seq, record["tesis_id"]))
+        self._seq += 1
+        if self._max_seen is None or ts > self._max_seen:
+            self._max_seen = ts
+
+        return self._advance(self._max_seen - self.allowed_lateness)
+
+    def _advance(self, watermark):
+        """watermark'tan önceki bekleyen olayları uygular ve kapanan saatleri üretir"""
+        self._watermark = watermark
+        while self._heap and self._heap[0][0] < watermark:
+            ts, order, _, tesis_id = heapq.heappop(self._heap)
+            self._apply(ts, order, tesis_id)
+
+        # Uygulanan olaylar watermark'tan eski olamaz; kapanabilecek saatler ancak
+        # watermark yeni bir saate geçtiğinde değişir
+        boundary = watermark.replace(minute=0, second=0, microsecond=0)
+        if boundary == self._closed_before:
+            return []
+        self._closed_before = boundary
+        return self._close_hours(boundary)
+
+    def _apply(self, ts, order, tesis_id):
+        if order == ACTION_ORDER["enter"]:
+            self._counts[tesis_id] += 1
+        else:
+            self._counts[tesis_id] = max(0, self._counts[tesis_id] - 1)
+
+        key = (tesis_id, ts.replace(minute=0, second=0, microsecond=0))
+        self._open_hours[key] = max(self._open_hours.get(key, 0), self._counts[tesis_id])
+
+    def _close_hours(self, boundary):
+        """boundary saat başından önceki saatleri (artık olay gelemez) satır olarak döndürür"""
+        if boundary is None:
+            closed = sorted(self._open_hours)
+        else:
+            closed = sorted(k for k in self._open_hours if k[1] < boundary)
+
+        rows = []
+        for key in closed:
+            peak = self._open_hours.pop(key)
+            row = self._row(key[0], key[1], peak)
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def _row(self, tesis_id, hour_ts, peak):
+        if tesis_id not in self._kapasite:
+            tesis = get_tesis_by_id(tesis_id)
+            self._kapasite[tesis_id] = tesis["kapasite"] if tesis else None
+        kapasite = self._kapasite[tesis_id]
+        if not kapasite:
+            return None
+
+        self.stats["uretilen_saat"] += 1
+        return build_occupancy_row(tesis_id, hour_ts, peak, kapasite, self.features)
+
+    def flush(self):
+        """Akış bittiğinde bekleyen tüm olayları uygular ve açık saatleri kapatır"""
+        while self._heap:
+            ts, order, _, tesis_id = heapq.heappop(self._heap)
+            self._apply(ts, order, tesis_id)
+        return self._close_hours(None)
+
+    def process(self, events):
+        """Olay üreticisini tüketir, satırları üretildikçe verir (sonunda flush eder)"""
+        for record in events:
+            yield from self.push(record)
+        yield from self.flush()
+
+def aggregate_vectorized(raw, features=None):
+    """
+    Ham QR olaylarını vektörel olarak saatlik doluluk tablosuna dönüştürür.
+    process_raw_qr_data ile birebir aynı satırları üretir (DataFrame olarak).
+
+    Her tesis için olaylar (zaman, çıkış önce) sıralanır, giriş +1 / çıkış -1
+    kümülatif toplanır (C). Sayının 0'da kırpılması yansıyan yürüyüş formülüyle
+    tek geçişte hesaplanır: sayı = C - min(0, cummin(C)).
+
+    Args:
+        raw: {"timestamp", "tesis_id", "action"} sütunlu DataFrame veya sözlük listesi
+        features: Özellik servisi (None: global feature_service)
+
+    Returns:
+        pd.DataFrame: OUTPUT_COLUMNS sütunlu, (tesis_id, timestamp) sıralı tablo
+    """
+    df = raw if isinstance(raw, pd.DataFrame) else pd.DataFrame(list(raw), columns=["timestamp", "tesis_id", "action"])
+
+    action = df["action"]
+    enter = action.eq("enter").to_numpy()
+    valid = enter | action.eq("exit").to_numpy()
+    if not valid.any():
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+
+    enter = enter[valid]
+    tesis = df["tesis_id"].to_numpy()[valid].astype(np.int64)
+    ts = pd.to_datetime(df["timestamp"].to_numpy()[valid]).to_numpy()
+
+    # Sıralama: tesis, zaman, çıkış önce. Anahtarlar sığarsa tek int64'e paketlenir
+    # (tek argsort, lexsort'tan birkaç kat hızlı)
+    ns = ts.view(np.int64)
+    rel = ns - ns.min()
+    codes, _ = pd.factorize(tesis, sort=True)
+    span = int(rel.max()) * 2 + 2
+    if span * (int(codes.max()) + 1) < 2 ** 63:
+        idx = np.argsort(codes.astype(np.int64) * span + rel * 2 + enter)
+    else:
+        idx = np.lexsort((enter, ts, tesis))
+    tesis, enter, ts = tesis[idx], enter[idx], ts[idx]
+    delta = np.where(enter, 1, -1).astype(np.int64)
+
+    # Tesis bazlı kümülatif toplam ve 0'da kırpma
+    frame = pd.DataFrame({"tesis_id": tesis, "delta": delta})
+    cum = frame.groupby("tesis_id", sort=False)["delta"].cumsum()
+    floor = cum.groupby(tesis, sort=False).cummin().clip(upper=0)
+    frame["sayi"] = (cum - floor).to_numpy()
+    frame["saat_basi"] = pd.DatetimeIndex(ts).floor("h")
+
+    peaks = frame.groupby(["tesis_id", "saat_basi"], sort=True)["sayi"].max().reset_index()
+
+    kapasite = pd.Series({t["tesis_id"]: t["kapasite"] for t in TESISLER})
+    peaks["kapasite"] = peaks["tesis_id"].map(kapasite)
+    peaks = peaks[peaks["kapasite"].notna() & (peaks["kapasite"] > 0)]
+
+    hours = pd.DatetimeIndex(peaks["saat_basi"])
+    weekday = hours.weekday.to_numpy().astype(np.int64)
+    saat = hours.hour.to_numpy().astype(np.int64)
+
+    # Etkinlik ve rezervasyon: (tesis, gün) çifti başına tek özellik servisi okuması
+    features = features or _feature_service()
+    codes, pairs = pd.factorize(pd.MultiIndex.from_arrays([peaks["tesis_id"].to_numpy(), hours.strftime("%Y-%m-%d")]))
+    gunler = [features.day_features(int(tesis_id), tarih) for tesis_id, tarih in pairs]
+    rezervasyon = np.array([g["rezervasyon"] for g in gunler], dtype=np.int64).reshape(len(gunler), 24)
+    etkinlik = np.array([g["etkinlik_var"] for g in gunler], dtype=np.int64)
+    out = pd.DataFrame({
+        "timestamp": hours.strftime("%Y-%m-%dT%H:%M:%S"),
+        "tesis_id": peaks["tesis_id"].to_numpy(),
+        "saat": saat,
+        "gun": weekday + 1,
+        "hafta_sonu": (weekday >= 5).astype(np.int64),
+        "resmi_tatil": calendar_service.holidays(hours).astype(np.int64),
+        "etkinlik_var": etkinlik[codes],
+        "sinav_haftasi": calendar_service.exam_weeks(hours).astype(np.int64),
+        "rezervasyon_sayisi": rezervasyon[codes, saat],
+        "sicaklik": 20.0,
+        "yagis_var": 0,
+        # Satır sayısı (tesis x saat) olay sayısından çok küçük: Python round ile
+        # akış motoruyla aynı yuvarlama garanti edilir
+        "doluluk_orani": [round(p / k * 100, 1) for p, k in zip(peaks["sayi"].tolist(), peaks["kapasite"].tolist())]
+    })
+    return out.reset_index(drop=True)
+
+
+def generate_synthetic_scans(n_rows, days=30, seed=42):
+    """Benchmark için sentetik ham QR olayları (DataFrame)"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-01-01T00:00:00")
+    offsets = rng.integers(0, days * 86400, n_rows).astype("timedelta64[s]")
+    return pd.DataFrame({
+        "timestamp": start + offsets,
+        "tesis_id": rng.integers(1, len(TESISLER) + 1, n_rows),
+        "action": np.where(rng.random(n_rows) < 0.55, "enter", "exit")
+    })
+
+
+def benchmark_engines(sizes=(200_000, 1_000_000), vectorized_rows=10_000_000, seed=42):
+    """
+    İki motoru aynı olaylar üzerinde ölçer; hızlanma yalnızca eşit boyutlarda, ölçülen
+    sürelerden hesaplanır (satır bazlı motor yığın ve saatlik sözlük nedeniyle doğrusal
+    değildir, tahmin yapılmaz). Her boyutta iki motorun çıktısının aynı olduğu da doğrulanır.
+    Vektörel motor ayrıca vectorized_rows olay üzerinde tek başına ölçülür.
+
+    Returns:
+        dict: {"karsilastirma": [boyut başına sonuç], "vektorel": büyük veri ölçümü}
+    """
+    karsilastirma = []
+    for n_rows in sizes:
+        df = generate_synthetic_scans(n_rows, seed=seed)
+        records = [
+            {"timestamp": ts.isoformat(), "tesis_id": int(t), "action": a}
+            for ts, t, a in zip(df["timestamp"], df["tesis_id"], df["action"])
+        ]
+
+        t0 = time.perf_counter()
+        vec = aggregate_vectorized(df)
+        vec_sure = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        rows = aggregator.process_raw_qr_data(records)
+        row_sure = time.perf_counter() - t0
+
+        karsilastirma.append({
+            "olay_sayisi": n_rows,
+            "vektorel_sure_sn": round(vec_sure, 3),
+            "satir_bazli_sure_sn": round(row_sure, 3),
+            "hizlanma": round(row_sure / vec_sure, 1) if vec_sure > 0 else None,
+            "ciktilar_ayni": bool(pd.DataFrame(rows, columns=OUTPUT_COLUMNS).equals(vec))
+        })
+
+    vektorel = None
+    if vectorized_rows:
+        df = generate_synthetic_scans(vectorized_rows, seed=seed)
+        t0 = time.perf_counter()
+        vec = aggregate_vectorized(df)
+        vec_sure = time.perf_counter() - t0
+        vektorel = {
+            "olay_sayisi": vectorized_rows,
+            "sure_sn": round(vec_sure, 2),
+            "olay_saniye": int(vectorized_rows / vec_sure) if vec_sure > 0 else None,
+            "saatlik_satir": len(vec)
+        }
+
+    return {"karsilastirma": karsilastirma, "vektorel": vektorel}
+
 
 class DataAggregator:
     def __init__(self):
         self.data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
         self.raw_entries_file = os.path.join(self.data_dir, "ham_qr_veri.csv")
-        self.processed_file = os.path.join(self.data_dir, "gercek_ziyaretci.csv")
+        self.store = real_visitor_store
 
-    def process_raw_qr_data(self, raw_data_list):
+    def process_raw_qr_data(self, raw_data_list, engine="stream"):
         """
         Ham QR verilerini işler ve doluluk oranlarını hesaplar
 
         Args:
             raw_data_list (list): Ham QR verileri
                 [{"timestamp": "2025-01-01 10:00:00", "tesis_id": 1, "action": "enter/exit", "user_id": "123"}]
+            engine (str): "stream" (satır bazlı) veya "vectorized" (büyük geçmiş veriler için)
 
         Returns:
             list: İşlenmiş doluluk verileri
         """
-        # Tesis bazında giriş/çıkışları grupla
-        facility_data = defaultdict(lambda: {"entries": [], "exits": []})
-
-        for record in raw_data_list:
-            timestamp = datetime.fromisoformat(record["timestamp"])
-            tesis_id = record["tesis_id"]
-            action = record["action"]
-
-            if action == "enter":
-                facility_data[tesis_id]["entries"].append(timestamp)
-            elif action == "exit":
-                facility_data[tesis_id]["exits"].append(timestamp)
-
-        # Saatlik doluluk hesapla
-        processed_data = []
-
-        for tesis_id, actions in facility_data.items():
-            tesis = get_tesis_by_id(tesis_id)
-            if not tesis:
-                continue
-
-            kapasite = tesis["kapasite"]
-
-            # Tüm zaman damgalarını birleştir
-            all_timestamps = sorted(actions["entries"] + actions["exits"])
-
-            if not all_timestamps:
-                continue
-
-            # Saat başı gruplama
-            hourly_data = defaultdict(lambda: {"current_count": 0, "max_count": 0})
-
-            current_count = 0
-
-            for ts in all_timestamps:
-                hour_key = ts.replace(minute=0, second=0, microsecond=0)
-
-                if ts in actions["entries"]:
-                    current_count += 1
-                elif ts in actions["exits"]:
-                    current_count = max(0, current_count - 1)
-
-                hourly_data[hour_key]["current_count"] = max(
-                    hourly_data[hour_key]["current_count"],
-                    current_count
-                )
-                hourly_data[hour_key]["max_count"] = current_count
-
-            # Doluluk oranlarını hesapla
-            for hour_ts, counts in hourly_data.items():
-                doluluk_orani = (counts["max_count"] / kapasite) * 100
-
-                processed_data.append({
-                    "timestamp": hour_ts.isoformat(),
-                    "tesis_id": tesis_id,
-                    "saat": hour_ts.hour,
-                    "gun": hour_ts.weekday() + 1,
-                    "hafta_sonu": 1 if hour_ts.weekday() >= 5 else 0,
-                    "resmi_tatil": self._is_official_holiday(hour_ts),
-                    "etkinlik_var": 0,  # Gerçek uygulamada belirlenecek
-                    "sinav_haftasi": 0,  # Akademik takvimden
-                    "rezervasyon_sayisi": counts["max_count"],  # Yaklaşık rezervasyon
-                    "sicaklik": 20.0,  # Weather service'den gelecek
-                    "yagis_var": 0,    # Weather service'den gelecek
-                    "doluluk_orani": round(doluluk_orani, 1)
-                })
-
-        return processed_data
+        if engine == "vectorized":
+            return aggregate_vectorized(raw_data_list).to_dict("records")
+
+        # Tüm liste elimizde: önce sırala, sonra gecikmesiz akış olarak işle (O(n log n))
+        events = sorted(
+            (r for r in raw_data_list if r.get("action") in ACTION_ORDER),
+            key=lambda r: (datetime.fromisoformat(r["timestamp"]), ACTION_ORDER[r["action"]])
+        )
+        rows = list(StreamingOccupancyAggregator().process(events))
+        rows.sort(key=lambda row: (row["tesis_id"], row["timestamp"]))
+        return rows
 
     def _is_official_holiday(self, date):
         """Tarihin resmi tatil olup olmadığını kontrol eder"""
-        tatil_gunleri = [(1,1), (4,23), (5,19), (8,30), (10,29), (11,10)]
-        return 1 if (date.month, date.day) in tatil_gunleri else 0
+        return calendar_service.is_official_holiday(date)
 
     def aggregate_and_save(self, raw_data_list):
         """
@@ -119,18 +381,13 @@ class DataAggregator:
             if not processed_data:
                 return {"status": "warning", "message": "İşlenecek veri bulunamadı"}
 
-            # DataFrame'e dönüştür
-            df = pd.DataFrame(processed_data)
-
-            # Dosyaya kaydet (append mode)
-            file_exists = os.path.exists(self.processed_file)
-
-            df.to_csv(self.processed_file, mode='a', header=not file_exists, index=False)
+            # Ziyaretçi deposuna ekle (tarih bölümlerine ayrılır)
+            self.store.append(pd.DataFrame(processed_data))
 
             return {
                 "status": "success",
                 "records_processed": len(processed_data),
-                "file": self.processed_file
+                "file": self.store.root
             }
 
         except Exception as e:
@@ -139,6 +396,32 @@ class DataAggregator:
                 "message": str(e)
             }
 
+    def aggregate_stream_and_save(self, events, allowed_lateness=timedelta(minutes=5)):
+        """
+        Zaman sırasına yakın gelen olay akışını (ör. dosyadan okuyan üretici) işler ve
+        kapanan her saati ziyaretçi deposuna ekler (toplu yazım). Bellek kullanımı olay sayısından bağımsızdır.
+
+        Args:
+            events: {"timestamp", "tesis_id", "action"} sözlükleri üreten iterable
+            allowed_lateness: Sırasız olaylar için kabul edilen en büyük gecikme
+
+        Returns:
+            dict: İşlem sonucu ve akış istatistikleri
+        """
+        try:
+            agg = StreamingOccupancyAggregator(allowed_lateness)
+            for row in agg.process(events):
+                self.store.append(row)
+            self.store.flush()
+
+            return {"status": "success", "records_processed": agg.stats["uretilen_saat"], **agg.stats}
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+
     def get_hourly_occupancy(self, tesis_id, date):
         """
         Belirli bir tesis için belirli tarihteki saatlik doluluk verilerini döndürür
@@ -151,23 +434,15 @@ class DataAggregator:
             dict: Saatlik doluluk verileri
         """
         try:
-            if not os.path.exists(self.processed_file):
-                return {"error": "Gerçek veri dosyası bulunamadı"}
-
-            df = pd.read_csv(self.processed_file)
-
-            # Tarih ve tesis filtresi
-            filtered_df = df[
-                (df["tesis_id"] == tesis_id) &
-                (pd.to_datetime(df["timestamp"]).dt.date == pd.to_datetime(date).date())
-            ]
+            # Yalnızca o günün bölümü ve tesisin satırları okunur
+            filtered_df = self.store.read(start=date, end=date, tesis_ids=[tesis_id],
+                                          columns=["timestamp", "saat", "doluluk_orani"])
 
             hourly_data = {}
-            for _, row in filtered_df.iterrows():
-                hour = int(row["saat"])
-                hourly_data[hour] = {
-                    "doluluk_orani": row["doluluk_orani"],
-                    "timestamp": row["timestamp"]
+            for row in filtered_df.itertuples(index=False):
+                hourly_data[int(row.saat)] = {
+                    "doluluk_orani": float(row.doluluk_orani),
+                    "timestamp": row.timestamp.isoformat()
                 }
 
             return {
@@ -183,6 +458,13 @@ class DataAggregator:
 aggregator = DataAggregator()
 
 if __name__ == "__main__":
+    import sys
+    if "--benchmark" in sys.argv:
+        # python -m utils.data_aggregator --benchmark [boyut ...]
+        boyutlar = tuple(int(arg) for arg in sys.argv[sys.argv.index("--benchmark") + 1:] if arg.isdigit())
+        print(benchmark_engines(boyutlar or (200_000, 1_000_000)))
+        sys.exit(0)
+
     # Test verisi
     test_raw_data = [
         {"timestamp": "2025-01-01T10:00:00", "tesis_id": 1, "action": "enter", "user_id": "1"},
@@ -1,8 +1,32 @@
-import pandas as pd
-import numpy as np
+"""
+Data Generator - Sentetik Eğitim ve Yük Testi Verisi Üretimi
+
+Bu modül:
+- Nilüfer Sosyal Tesis Proje Tanımına (Madde 4.2) uygun sentetik ziyaretçi verisi üretir
+- Doluluk formülünü tamamen vektörel hesaplar (satır döngüsü yoktur); kapasiteler
+  tesis_id ile indekslenen bir diziden okunur
+- Veriyi parçalar (chunk) halinde üretir; her parçanın kendi numpy.random.Generator'ı
+  SeedSequence(seed).spawn ile türetilir, böylece çıktı işçi sayısından bağımsız olarak
+  aynıdır ve parçalar paralel üretilebilir
+- Tesis dağılımı yapılandırılabilir (eşit, kapasiteyle orantılı veya tip/tesis ağırlıkları)
+- On milyonlarca satırı belleğe almadan parça parça diske (Parquet/CSV veya sentetik
+  ziyaretçi deposu) yazar
+
+Kullanım:
+    python -m utils.data_generator                                 # 2000 kayıt -> sentetik depo
+    python -m utils.data_generator --kayit 10000000 --cikti yuk.parquet --isciler 4
+    python -m utils.data_generator --karisim "kütüphane=3,kafe=1"
+"""
+
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 
-np.random.seed(42)
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 1_000_000
 
 # Nilüfer Belediyesi sosyal tesisleri tanımlaması
 TESISLER = [
@@ -20,64 +44,111 @@ TESISLER = [
     {"tesis_id": 12, "tesis_tipi": "gençlik merkezi", "kapasite": 130, "isim": "Cumhuriyet Gençlik Merkezi"},
 ]
 
-def generate_synthetic_data(kayit_sayisi=2000):
+# tesis_id -> kapasite (satır başına arama yerine dizi indeksleme)
+_KAPASITE = np.zeros(max(t["tesis_id"] for t in TESISLER) + 1, dtype=np.int32)
+for _t in TESISLER:
+    _KAPASITE[_t["tesis_id"]] = _t["kapasite"]
+
+# Hazır tesis dağılımları
+FACILITY_MIXES = ("esit", "kapasite")
+
+
+def facility_probabilities(karisim="esit"):
     """
-    Nilüfer Sosyal Tesis Proje Tanımına (Madde 4.2) uygun veri üretir.
+    Tesis seçim olasılıkları
+
+    Args:
+        karisim: "esit" (her tesis eşit), "kapasite" (kapasiteyle orantılı) veya ağırlık
+                 sözlüğü; anahtarlar tesis tipi ("kütüphane") ya da tesis_id olabilir,
+                 sözlükte geçmeyen tesislerin ağırlığı 0'dır
+
+    Returns:
+        (np.ndarray, np.ndarray): tesis_id dizisi ve olasılıklar
+    """
+    ids = np.array([t["tesis_id"] for t in TESISLER], dtype=np.int16)
+
+    if karisim == "esit":
+        weights = np.ones(len(TESISLER))
+    elif karisim == "kapasite":
+        weights = np.array([t["kapasite"] for t in TESISLER], dtype=float)
+    elif isinstance(karisim, dict):
+        weights = np.array([
+            float(karisim.get(t["tesis_id"], karisim.get(t["tesis_tipi"], 0)))
+            for t in TESISLER
+        ])
+    else:
+        raise ValueError(f"Bilinmeyen tesis karışımı: {karisim} (seçenekler: {FACILITY_MIXES} veya sözlük)")
+
+    if weights.sum() <= 0:
+        raise ValueError("Tesis karışımında en az bir tesisin ağırlığı pozitif olmalı")
+    return ids, weights / weights.sum()
+
+
+def parse_facility_mix(text):
+    """'kütüphane=3,kafe=1' veya '1=2,7=1' biçimindeki karışımı sözlüğe çevirir"""
+    if text in FACILITY_MIXES:
+        return text
+    mix = {}
+    for item in text.split(","):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        mix[int(key) if key.isdigit() else key] = float(value)
+    return mix
+
+
+def generate_chunk(rng, n, tesis_ids, olasiliklar):
+    """
+    Tek parça sentetik veri (tamamen vektörel)
+
+    Args:
+        rng: numpy.random.Generator
+        n: Satır sayısı
+        tesis_ids, olasiliklar: facility_probabilities çıktısı
+
+    Returns:
+        pd.DataFrame
     """
     # 1. Temel Zaman Değişkenleri
-    saatler = np.random.randint(9, 22, kayit_sayisi)
-    hafta_sonu = np.random.choice([0, 1], kayit_sayisi, p=[0.7, 0.3]) # 1: Hafta sonu
-    resmi_tatil = np.random.binomial(1, 0.05, kayit_sayisi) 
-    
-    # 2. Projeye Özel Değişkenler (Yeni Eklendi)
-    sinav_haftasi = np.random.binomial(1, 0.15, kayit_sayisi) # Özellikle kütüphaneleri etkiler
-    etkinlik_var = np.random.binomial(1, 0.1, kayit_sayisi)
-    rezervasyon_sayisi = np.random.randint(0, 40, kayit_sayisi)
+    saatler = rng.integers(9, 22, n, dtype=np.int8)
+    hafta_sonu = (rng.random(n) < 0.3).astype(np.int8)  # 1: Hafta sonu
+    resmi_tatil = (rng.random(n) < 0.05).astype(np.int8)
+
+    # 2. Projeye Özel Değişkenler
+    sinav_haftasi = (rng.random(n) < 0.15).astype(np.int8)  # Özellikle kütüphaneleri etkiler
+    etkinlik_var = (rng.random(n) < 0.1).astype(np.int8)
+    rezervasyon_sayisi = rng.integers(0, 40, n, dtype=np.int32)
 
     # 3. Dış Etkenler (Hava Durumu)
-    sicaklik = np.random.uniform(0, 35, kayit_sayisi) 
-    yagis_var = np.random.binomial(1, 0.2, kayit_sayisi)
+    sicaklik = rng.uniform(0, 35, n)
+    yagis_var = (rng.random(n) < 0.2).astype(np.int8)
 
     # 4. Tesis ve Kapasite Seçimi
-    tesis_ids = np.random.choice([t["tesis_id"] for t in TESISLER], kayit_sayisi)
-    kapasiteler = np.array([next(t["kapasite"] for t in TESISLER if t["tesis_id"] == tid) for tid in tesis_ids])
+    tesis = rng.choice(tesis_ids, n, p=olasiliklar)
+    kapasite = _KAPASITE[tesis]
 
     # 5. Doluluk Oranı Hesaplama Mantığı (Multi-Linear Logic)
-    # Modelin öğrenmesi için mantıklı ağırlıklar veriyoruz
-    ziyaretci_sayisi = []
-    
-    for i in range(kayit_sayisi):
-        # Baz doluluk (kapasitenin %10-30'u)
-        base = kapasiteler[i] * 0.2
-        
-        # Pozitif Etkiler
-        saat_etkisi = (saatler[i] - 9) * 3 if saatler[i] < 16 else (22 - saatler[i]) * 4
-        hafta_sonu_etkisi = hafta_sonu[i] * (kapasiteler[i] * 0.25)
-        rezervasyon_etkisi = rezervasyon_sayisi[i] * 1.2
-        sinav_etkisi = sinav_haftasi[i] * (kapasiteler[i] * 0.3)
-        etkinlik_etkisi = etkinlik_var[i] * (kapasiteler[i] * 0.2)
-        
-        # Negatif Etkiler
-        yagis_etkisi = yagis_var[i] * -15
-        soguk_etkisi = (10 - sicaklik[i]) * 1.5 if sicaklik[i] < 10 else 0
-
-        # Toplam Hesaplama + Gürültü (Noise)
-        toplam = base + saat_etkisi + hafta_sonu_etkisi + rezervasyon_etkisi + \
-                 sinav_etkisi + etkinlik_etkisi + yagis_etkisi - soguk_etkisi + \
-                 np.random.normal(0, 5)
-
-        # Sınırlandırma
-        ziyaretci = max(0, min(int(toplam), kapasiteler[i]))
-        ziyaretci_sayisi.append(ziyaretci)
-
-    ziyaretci_sayisi = np.array(ziyaretci_sayisi)
-    
+    saat = saatler.astype(np.float64)
+    toplam = (
+        kapasite * 0.2                                                  # Baz doluluk
+        + np.where(saatler < 16, (saat - 9) * 3, (22 - saat) * 4)      # Saat etkisi
+        + hafta_sonu * (kapasite * 0.25)
+        + rezervasyon_sayisi * 1.2
+        + sinav_haftasi * (kapasite * 0.3)
+        + etkinlik_var * (kapasite * 0.2)
+        - yagis_var * 15.0
+        - np.maximum(10 - sicaklik, 0) * 1.5                            # Soğuk etkisi
+        + rng.normal(0, 5, n)                                           # Gürültü
+    )
+
+    # Sınırlandırma (int() gibi sıfıra doğru yuvarlanır)
+    ziyaretci_sayisi = np.clip(np.trunc(toplam), 0, kapasite).astype(np.int32)
+
     # 6. Hedef Değişken: Doluluk Oranı (Yüzde olarak)
-    doluluk_orani = (ziyaretci_sayisi / kapasiteler) * 100
+    doluluk_orani = ziyaretci_sayisi / kapasite * 100
 
     # DataFrame Oluştur (Train modelin beklediği kolon isimleri ile)
-    df = pd.DataFrame({
-        "tesis_id": tesis_ids,
+    return pd.DataFrame({
+        "tesis_id": tesis,
         "saat": saatler,
         "hafta_sonu": hafta_sonu,
         "resmi_tatil": resmi_tatil,
@@ -90,18 +161,154 @@ def generate_synthetic_data(kayit_sayisi=2000):
         "doluluk_orani": doluluk_orani
     })
 
-    return df
+
+def _chunk_sizes(kayit_sayisi, chunk_size):
+    tam, kalan = divmod(kayit_sayisi, chunk_size)
+    return [chunk_size] * tam + ([kalan] if kalan else [])
+
+
+def _generate_chunk_job(args):
+    """İşçi süreçte tek parça üretir (ProcessPoolExecutor için modül düzeyinde)"""
+    seed_seq, n, karisim = args
+    tesis_ids, olasiliklar = facility_probabilities(karisim)
+    return generate_chunk(np.random.default_rng(seed_seq), n, tesis_ids, olasiliklar)
+
+
+def iter_synthetic_chunks(kayit_sayisi, seed=DEFAULT_SEED, tesis_karisimi="esit",
+                          chunk_size=DEFAULT_CHUNK_SIZE, isciler=1):
+    """
+    Sentetik veriyi sırayla parça parça üretir
+
+    Her parçanın tohumu SeedSequence(seed).spawn ile parça sırasına bağlıdır; aynı
+    (seed, chunk_size) için çıktı isciler değerinden bağımsız olarak aynıdır.
+
+    Yields:
+        pd.DataFrame
+    """
+    sizes = _chunk_sizes(kayit_sayisi, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(s, n, tesis_karisimi) for s, n in zip(seeds, sizes)]
+
+    if isciler <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _generate_chunk_job(job)
+        return
+
+    # Bellekte en fazla 2 x isciler parça bekler
+    with ProcessPoolExecutor(max_workers=isciler) as executor:
+        pending = []
+        for job in jobs:
+            pending.append(executor.submit(_generate_chunk_job, job))
+            if len(pending) >= 2 * isciler:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def generate_synthetic_data(kayit_sayisi=2000, seed=DEFAULT_SEED, tesis_karisimi="esit",
+                            chunk_size=DEFAULT_CHUNK_SIZE, isciler=1):
+    """
+    Nilüfer Sosyal Tesis Proje Tanımına (Madde 4.2) uygun veri üretir (tek DataFrame).
+    """
+    chunks = list(iter_synthetic_chunks(kayit_sayisi, seed, tesis_karisimi, chunk_size, isciler))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def write_synthetic_data(hedef, kayit_sayisi, seed=DEFAULT_SEED, tesis_karisimi="esit",
+                         chunk_size=DEFAULT_CHUNK_SIZE, isciler=1):
+    """
+    Sentetik veriyi parça parça diske yazar (tüm veri hiçbir zaman bellekte tutulmaz)
+
+    Args:
+        hedef: .parquet / .csv dosya yolu veya VisitorStore (ör. synthetic_visitor_store;
+               mevcut içeriğin yerine geçer). pyarrow yoksa .parquet yerine aynı isimli
+               .csv dosyasına yazılır
+
+    Returns:
+        dict: Yazılan kayıt sayısı ve süre
+    """
+    if isinstance(hedef, str) and hedef.endswith(".parquet") and not _parquet_available():
+        csv_hedef = os.path.splitext(hedef)[0] + ".csv"
+        print(f"[DATA GENERATOR] UYARI: pyarrow kurulu değil, {hedef} yerine {csv_hedef} yazılıyor")
+        hedef = csv_hedef
+
+    started = time.perf_counter()
+    chunks = iter_synthetic_chunks(kayit_sayisi, seed, tesis_karisimi, chunk_size, isciler)
+    toplam = 0
+
+    if not isinstance(hedef, str):
+        for i, df in enumerate(chunks):
+            if i == 0:
+                hedef.replace(df)
+            else:
+                hedef.append(df)
+            toplam += len(df)
+        konum = hedef.root
+
+    elif hedef.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for df in chunks:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(hedef, table.schema)
+                writer.write_table(table)
+                toplam += len(df)
+        finally:
+            if writer is not None:
+                writer.close()
+        konum = hedef
+
+    else:
+        for i, df in enumerate(chunks):
+            df.to_csv(hedef, index=False, mode='w' if i == 0 else 'a', header=(i == 0))
+            toplam += len(df)
+        konum = hedef
+
+    sure = time.perf_counter() - started
+    return {
+        "kayit_sayisi": toplam,
+        "sure_sn": round(sure, 2),
+        "satir_saniye": int(toplam / sure) if sure > 0 else None,
+        "konum": konum
+    }
+
 
 if __name__ == "__main__":
-    df = generate_synthetic_data()
-    # Dosya yolunu ekran resmindeki yapıya göre ayarlıyoruz
-    output_path = os.path.join(os.path.dirname(__file__), "..", "data", "sentetik_ziyaretci.csv")
-    
-    # Klasör yoksa oluştur
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    df.to_csv(output_path, index=False)
+    import argparse
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from utils.visitor_store import synthetic_visitor_store
+
+    parser = argparse.ArgumentParser(description="Sentetik ziyaretçi verisi üretir")
+    parser.add_argument("--kayit", type=int, default=2000, help="Üretilecek kayıt sayısı")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--karisim", default="esit",
+                        help="Tesis dağılımı: esit, kapasite veya 'kütüphane=3,kafe=1'")
+    parser.add_argument("--parca", type=int, default=DEFAULT_CHUNK_SIZE, help="Parça başına kayıt")
+    parser.add_argument("--isciler", type=int, default=1, help="Paralel üretim süreç sayısı")
+    parser.add_argument("--cikti", default=None,
+                        help=".parquet/.csv dosyası (varsayılan: sentetik ziyaretçi deposu)")
+    args = parser.parse_args()
+
+    # Varsayılan olarak sütunlu ziyaretçi deposuna yaz (önceki sentetik verinin yerine geçer)
+    sonuc = write_synthetic_data(
+        args.cikti or synthetic_visitor_store, args.kayit, seed=args.seed,
+        tesis_karisimi=parse_facility_mix(args.karisim), chunk_size=args.parca, isciler=args.isciler
+    )
     print(f"--- Nilüfer Projesi Sentetik Verisi Başarıyla Üretildi ---")
-    print(f"Kayıt Sayısı: {len(df)}")
-    print(f"Dosya Konumu: {output_path}")
-    print(df[['saat', 'sinav_haftasi', 'doluluk_orani']].head())
+    print(f"Kayıt Sayısı: {sonuc['kayit_sayisi']}")
+    print(f"Süre: {sonuc['sure_sn']} sn ({sonuc['satir_saniye']} satır/sn)")
+    print(f"Dosya Konumu: {sonuc['konum']}")
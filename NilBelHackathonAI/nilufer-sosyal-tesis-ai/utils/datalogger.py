@@ -6,37 +6,22 @@ Bu modül QR kod okuma anında tetiklenir ve aşağıdaki işlemleri gerçekleş
 2. Tesis bilgilerini alır
 3. Zaman damgası ile birlikte veriyi kaydeder
 4. Belirli aralıklarla model yeniden eğitimini tetikler
+
+Kayıtlar tarihe göre bölümlenmiş ziyaretçi deposuna (utils/visitor_store.py) yazılır.
 """
 
 import os
-import csv
 import time
 from datetime import datetime
 from .weather_service import get_weather_data
 from .tesisler import get_tesis_by_id
+from .visitor_store import real_visitor_store
+from .feature_service import feature_service
 
 class DataLogger:
     def __init__(self):
         self.data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
-        self.real_data_file = os.path.join(self.data_dir, "gercek_ziyaretci.csv")
-
-        # CSV başlıkları (modelin beklediği format)
-        self.headers = [
-            "timestamp", "tesis_id", "saat", "gun", "hafta_sonu", "resmi_tatil",
-            "etkinlik_var", "sinav_haftasi", "rezervasyon_sayisi",
-            "sicaklik", "yagis_var", "doluluk_orani"
-        ]
-
-        # Dosya yoksa oluştur
-        self._ensure_file_exists()
-
-    def _ensure_file_exists(self):
-        """CSV dosyasının varlığını kontrol eder, yoksa oluşturur"""
-        if not os.path.exists(self.real_data_file):
-            os.makedirs(self.data_dir, exist_ok=True)
-            with open(self.real_data_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(self.headers)
+        self.store = real_visitor_store
 
     def log_qr_entry(self, tesis_id, qr_data=None):
         """
@@ -58,46 +43,43 @@ class DataLogger:
             # Zaman bilgilerini al
             simdi = datetime.now()
             gun = simdi.weekday() + 1  # 1-7 arası
-            hafta_sonu = 1 if gun >= 6 else 0
 
-            # Basit resmi tatil kontrolü
-            tatil_gunleri = [(1,1), (4,23), (5,19), (8,30), (10,29), (11,10)]
-            resmi_tatil = 1 if (simdi.month, simdi.day) in tatil_gunleri else 0
+            # Takvim, etkinlik ve o saatteki rezerve kişi sayısı özellik servisinden
+            context = feature_service.context(tesis_id, simdi)
+            qr_data = qr_data or {}
 
             # Hava durumu
             weather = get_weather_data()
             sicaklik = weather.get("hava_sicakligi", 20.0)
             yagis_var = weather.get("yagis_var", 0)
 
-            # Mock veriler (QR sisteminden gelecek)
-            etkinlik_var = 0  # Gerçek uygulamada QR verisinden alınacak
-            sinav_haftasi = 0  # Akademik takvimden belirlenecek
-            rezervasyon_sayisi = qr_data.get("rezervasyon", 0) if qr_data else 0
+            # QR verisinde verilenler servisteki değerlerin önüne geçer
+            etkinlik_var = qr_data.get("etkinlik_var", context["etkinlik_var"])
+            sinav_haftasi = qr_data.get("sinav_haftasi", context["sinav_haftasi"])
+            rezervasyon_sayisi = qr_data.get("rezervasyon", qr_data.get("rezervasyon_sayisi", context["rezervasyon_sayisi"]))
 
             # Doluluk oranı (QR sisteminden hesaplanacak)
             # Bu gerçek uygulamada gerçek zamanlı hesaplanacak
-            doluluk_orani = qr_data.get("doluluk_orani", 50.0) if qr_data else 50.0
+            doluluk_orani = qr_data.get("doluluk_orani", 50.0)
 
             # Veri satırı
-            data_row = [
-                simdi.isoformat(),  # timestamp
-                tesis_id,
-                simdi.hour,
-                gun,
-                hafta_sonu,
-                resmi_tatil,
-                etkinlik_var,
-                sinav_haftasi,
-                rezervasyon_sayisi,
-                round(sicaklik, 1),
-                int(yagis_var),
-                round(doluluk_orani, 1)
-            ]
-
-            # CSV'ye kaydet
-            with open(self.real_data_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(data_row)
+            data_row = {
+                "timestamp": simdi.isoformat(),
+                "tesis_id": tesis_id,
+                "saat": simdi.hour,
+                "gun": gun,
+                "hafta_sonu": context["hafta_sonu"],
+                "resmi_tatil": context["resmi_tatil"],
+                "etkinlik_var": etkinlik_var,
+                "sinav_haftasi": sinav_haftasi,
+                "rezervasyon_sayisi": rezervasyon_sayisi,
+                "sicaklik": round(sicaklik, 1),
+                "yagis_var": int(yagis_var),
+                "doluluk_orani": round(doluluk_orani, 1)
+            }
+
+            # Depoya kaydet (toplu olarak diske yazılır)
+            self.store.append(data_row)
 
             print(f"[DATA LOGGER] QR giriş kaydedildi - Tesis: {tesis['isim']}, Saat: {simdi.hour}")
 
@@ -121,32 +103,24 @@ class DataLogger:
     def _check_retraining_trigger(self):
         """Her 100 yeni kayıt sonrası model yeniden eğitimini tetikler"""
         try:
-            # Kayıt sayısını kontrol et
-            with open(self.real_data_file, 'r', encoding='utf-8') as f:
-                record_count = sum(1 for line in f) - 1  # Başlık hariç
+            # Eşik yan dosyadaki sayaçtan kontrol edilir; aynı anda geçen yazarlardan yalnızca biri tetikler.
+            # Eşiği geçiren kayıtlar sahiplenmeden önce diske yazılır (ayrı süreçteki eğitim onları okur)
+            esik = self.store.claim_threshold("data_logger", 100)
 
-            if record_count > 0 and record_count % 100 == 0:
-                print(f"[DATA LOGGER] {record_count} kayıt ulaştı - Model retraining tetikleniyor...")
+            if esik:
+                print(f"[DATA LOGGER] {esik} kayıt ulaştı - Model retraining tetikleniyor...")
                 self._trigger_retraining()
 
         except Exception as e:
             print(f"[DATA LOGGER] Retraining kontrol hatası: {e}")
 
     def _trigger_retraining(self):
-        """Model yeniden eğitimini çalıştırır"""
+        """Model yeniden eğitimini arka plan işçisine bırakır (QR isteği eğitimi beklemez)"""
         try:
-            import subprocess
-            import sys
+            from ai.retrain_worker import retrain_worker
 
-            # train_model.py'yi çalıştır
-            script_path = os.path.join(os.path.dirname(__file__), "..", "ai", "train_model.py")
-            result = subprocess.run([sys.executable, script_path],
-                                  capture_output=True, text=True)
-
-            if result.returncode == 0:
-                print("[DATA LOGGER] Model başarıyla yeniden eğitildi")
-            else:
-                print(f"[DATA LOGGER] Model retraining hatası: {result.stderr}")
+            job = retrain_worker.submit("kayit_esigi")
+            print(f"[DATA LOGGER] Model retraining kuyruğa alındı (iş: {job['job_id']})")
 
         except Exception as e:
             print(f"[DATA LOGGER] Retraining tetikleme hatası: {e}")
@@ -155,6 +129,8 @@ class DataLogger:
         """
         Kullanıcının istediği formatta gerçek veri kaydı yapar
         Format: tesis_id,tarih,saat,gun_adi,is_weekend,sicaklik,yagis,doluluk_orani
+        (depoya modelin beklediği standart sütunlarla yazılır; takvim, etkinlik ve rezervasyon
+        özellikleri log_qr_entry'deki gibi özellik servisinden okunur)
 
         Args:
             tesis_id (int): Tesis ID
@@ -176,40 +152,32 @@ class DataLogger:
             gun_adi = simdi.strftime('%A')  # Gün adı (Monday, Tuesday, etc.)
             is_weekend = 1 if simdi.weekday() >= 5 else 0  # 0-4: weekday, 5-6: weekend
 
+            # Takvim, etkinlik ve o saatteki rezerve kişi sayısı özellik servisinden
+            context = feature_service.context(tesis_id, simdi)
+
             # Hava durumu
             weather = get_weather_data()
             sicaklik = weather.get("hava_sicakligi", 20.0)
             yagis = weather.get("yagis_var", 0)
 
-            # CSV satırı oluştur (kullanıcının istediği format)
-            csv_row = [
-                tesis_id,
-                tarih,
-                saat,
-                gun_adi,
-                is_weekend,
-                round(sicaklik, 1),
-                int(yagis),
-                round(doluluk_orani, 1)
-            ]
-
-            # Dosya yoksa başlıklarla oluştur, varsa append et
-            dosya_yeni_mi = not os.path.exists(self.real_data_file)
-
-            with open(self.real_data_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-
-                # Dosya yeni ise başlıkları ekle
-                if dosya_yeni_mi:
-                    writer.writerow([
-                        'tesis_id', 'tarih', 'saat', 'gun_adi',
-                        'is_weekend', 'sicaklik', 'yagis', 'doluluk_orani'
-                    ])
-
-                # Veri satırını ekle
-                writer.writerow(csv_row)
-
-            print(f"[REAL DATA LOGGER] Tesis {tesis_id} için gerçek veri kaydedildi: {csv_row}")
+            # Depoya standart şemayla kaydet
+            self.store.append({
+                "timestamp": simdi.isoformat(),
+                "tesis_id": tesis_id,
+                "saat": saat,
+                "gun": simdi.weekday() + 1,
+                "hafta_sonu": is_weekend,
+                "resmi_tatil": context["resmi_tatil"],
+                "etkinlik_var": context["etkinlik_var"],
+                "sinav_haftasi": context["sinav_haftasi"],
+                "rezervasyon_sayisi": context["rezervasyon_sayisi"],
+                "sicaklik": round(sicaklik, 1),
+                "yagis_var": int(yagis),
+                "doluluk_orani": round(doluluk_orani, 1)
+            })
+
+            print(f"[REAL DATA LOGGER] Tesis {tesis_id} için gerçek veri kaydedildi: {tarih} {saat}:00, "
+                  f"doluluk %{round(doluluk_orani, 1)}")
 
             # Retraining kontrolü
             self._check_retraining_trigger()
@@ -239,9 +207,8 @@ class DataLogger:
     def get_record_count(self):
         """Toplam kayıt sayısını döndürür"""
         try:
-            with open(self.real_data_file, 'r', encoding='utf-8') as f:
-                return sum(1 for line in f) - 1  # Başlık hariç
-        except:
+            return self.store.count()
+        except Exception:
             return 0
 
 # Global instance
@@ -251,6 +218,10 @@ def log_qr_entry(tesis_id, qr_data=None):
     """Kolay kullanım için global fonksiyon"""
     return data_logger.log_qr_entry(tesis_id, qr_data)
 
+def check_retraining():
+    """Kolay kullanım için global fonksiyon"""
+    data_logger._check_retraining_trigger()
+
 def log_real_data_entry(tesis_id, doluluk_orani):
     """Kullanıcının istediği formatta gerçek veri kaydı için global fonksiyon"""
     return data_logger.log_real_data_entry(tesis_id, doluluk_orani)
@@ -5,6 +5,7 @@ Bu modül:
 - Nilüfer ilçesindeki etkinlikleri yönetir
 - Etkinlik bilgilerini AI modeline girdi olarak kullanır
 - Vatandaşlara etkinlik takvimi sunar
+- NILUFER_STORAGE_BACKEND=sqlite ile etkinlikleri paylaşılan SQLite veritabanında tutar
 """
 
 import json
@@ -12,6 +13,8 @@ import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 
+from .storage import get_storage, use_sqlite
+
 class EventManager:
     def __init__(self):
         self.data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
@@ -103,8 +106,20 @@ class EventManager:
         self.events.append(event_data)
         self._save_events()
 
+        self._on_events_changed()
+
         return {"status": "success", "event_id": event_data["id"]}
 
+    def _on_events_changed(self):
+        """Etkinlik listesi değiştiğinde çağrılır"""
+        # Etkinlikler tahminleri etkiler: önbellekteki sonuçlar geçersiz
+        from .feature_service import feature_service
+        from ai.prediction_cache import invalidate_predictions
+        from ai.forecast_grid import invalidate_forecast_grid
+        feature_service.on_events_changed()
+        invalidate_predictions("etkinlik eklendi")
+        invalidate_forecast_grid("etkinlik eklendi")
+
     def get_event_impact(self, tesis_id: int, date: str) -> float:
         """
         Belirli tarih ve tesisteki etkinliklerin doluluk etkisi
@@ -134,8 +149,95 @@ class EventManager:
 
         return sorted(upcoming, key=lambda x: x["tarih"])
 
+class SQLiteEventManager(EventManager):
+    """
+    EventManager ile aynı arayüz, SQLite arka ucu.
+    Etkinliğin tamamı JSON olarak saklanır; tesis, tarih ve aktiflik sütunları
+    indeksli sorgular içindir. ID'ler veritabanı tarafından atanır.
+    """
+
+    def __init__(self, storage=None):
+        self.data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+        self.events_file = os.path.join(self.data_dir, "etkinlikler.json")
+        self.storage = storage or get_storage()
+
+        self._migrate_from_json()
+
+    def _migrate_from_json(self):
+        """etkinlikler.json içeriğini (yoksa örnek etkinlikleri) bir kez veritabanına aktarır"""
+        with self.storage.transaction() as conn:
+            if self.storage.is_migrated(conn, "etkinlikler"):
+                return
+
+            if not os.path.exists(self.events_file):
+                os.makedirs(self.data_dir, exist_ok=True)
+                self._create_sample_events()
+            events = self._load_events()
+            for event in events:
+                self._insert(conn, event)
+            self.storage.mark_migrated(conn, "etkinlikler", len(events))
+
+    @staticmethod
+    def _insert(conn, event: Dict) -> int:
+        """Etkinliği ekler, atanan ID'yi döndürür"""
+        cursor = conn.execute(
+            "INSERT INTO etkinlikler (id, tesis_id, tarih, aktif, veri) VALUES (?, ?, ?, ?, ?)",
+            (event.get("id"), event.get("tesis_id"), event["tarih"],
+             1 if event.get("aktif", True) else 0, json.dumps(event, ensure_ascii=False))
+        )
+        return cursor.lastrowid
+
+    def _select(self, where: str = "1", params=()) -> List[Dict]:
+        rows = self.storage.query(
+            f"SELECT id, veri FROM etkinlikler WHERE {where} ORDER BY tarih, id", params
+        )
+        events = []
+        for row in rows:
+            event = json.loads(row["veri"])
+            event["id"] = row["id"]
+            events.append(event)
+        return events
+
+    @property
+    def events(self) -> List[Dict]:
+        """Tüm etkinlikler"""
+        return self._select()
+
+    def get_active_events(self, date: Optional[str] = None) -> List[Dict]:
+        if date:
+            return self._select("aktif = 1 AND tarih = ?", (date,))
+        return self._select("aktif = 1")
+
+    def get_events_by_tesis(self, tesis_id: int) -> List[Dict]:
+        return self._select("aktif = 1 AND tesis_id = ?", (tesis_id,))
+
+    def add_event(self, event_data: Dict) -> Dict:
+        event_data = {k: v for k, v in event_data.items() if k != "id"}
+        event_data["aktif"] = True
+
+        with self.storage.transaction() as conn:
+            event_data["id"] = self._insert(conn, event_data)
+
+        self._on_events_changed()
+
+        return {"status": "success", "event_id": event_data["id"]}
+
+    def get_event_impact(self, tesis_id: int, date: str) -> float:
+        date_events = self._select("aktif = 1 AND tesis_id = ? AND tarih = ?", (tesis_id, date))
+
+        if not date_events:
+            return 0.0
+
+        total_impact = sum(e.get("etki_orani", 0.1) for e in date_events)
+        return min(total_impact, 1.0)  # Max %100 etki
+
+    def get_upcoming_events(self, days: int = 7) -> List[Dict]:
+        today = datetime.now().date()
+        end_date = today + timedelta(days=days)
+        return self._select("aktif = 1 AND tarih BETWEEN ? AND ?", (today.isoformat(), end_date.isoformat()))
+
 # Global instance
-event_manager = EventManager()
+event_manager = SQLiteEventManager() if use_sqlite() else EventManager()
 
 if __name__ == "__main__":
     print("Etkinlik Yönetimi Test")
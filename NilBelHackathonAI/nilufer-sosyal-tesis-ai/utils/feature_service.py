@@ -0,0 +1,190 @@
+"""
+Feature Service - Tahmin ve Eğitim İçin Özellik Birleştirme
+
+Bu modül:
+- (tesis, tarih) başına saatlik rezerve kişi sayılarını ve tarih başına etkinlikli tesisleri
+  önceden hesaplanmış kayıtlarda tutar; takvim bayrakları (hafta sonu, resmi tatil, sınav
+  haftası) tarihten ve takvim servisinin bit haritalarından okunur
+- Kayıtlar ilk erişimde rezervasyon sisteminin saatlik dizisinden ve etkinlik yöneticisinden
+  doldurulur; sonrasında bir özellik vektörü kurmak sözlük okumasıdır (O(1))
+- Rezervasyon oluşturma / iptal yalnızca ilgili (tesis, tarih) kaydını, etkinlik değişikliği
+  yalnızca etkinlik kayıtlarını günceller
+- Başka süreçlerde (SQLite arka ucu) yapılan değişiklikleri en geç FEATURE_CACHE_TTL sonra görür
+- Çevrim içi tahmin (ai/predict.py, tahmin tablosu, QR girişi) ve eğitim verisi birleştirme
+  (data_aggregator) aynı değerleri kullanır
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+
+from .calendar_service import calendar_service
+
+FEATURE_CACHE_SIZE = int(os.getenv("FEATURE_CACHE_SIZE", "8192"))
+FEATURE_CACHE_TTL = float(os.getenv("FEATURE_CACHE_TTL", "60"))
+
+
+class FeatureService:
+    def __init__(self, reservations=None, events=None, max_size=FEATURE_CACHE_SIZE, ttl=FEATURE_CACHE_TTL):
+        self._reservations = reservations
+        self._events = events
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._days = OrderedDict()     # (tesis_id, "YYYY-MM-DD") -> (24 saatlik rezerve kişi, zaman)
+        self._event_days = {}          # "YYYY-MM-DD" -> (etkinlikli tesisler, zaman)
+
+        self.stats = {"hit": 0, "miss": 0, "artimli_guncelleme": 0}
+
+    @property
+    def reservations(self):
+        if self._reservations is None:
+            from .reservations import reservation_system
+            self._reservations = reservation_system
+        return self._reservations
+
+    @property
+    def events(self):
+        if self._events is None:
+            from .events import event_manager
+            self._events = event_manager
+        return self._events
+
+    # ------------------------------------------------------------------ kayıtlar
+
+    def _put_reserved(self, key, kisi, now):
+        with self._lock:
+            self._days[key] = (kisi, now)
+            self._days.move_to_end(key)
+            while len(self._days) > self.max_size:
+                self._days.popitem(last=False)
+
+    def reserved(self, tesis_id, tarih):
+        """(tesis, tarih) için 24 saatlik rezerve kişi sayıları"""
+        key = (tesis_id, tarih)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._days.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._days.move_to_end(key)
+                self.stats["hit"] += 1
+                return entry[0]
+            self.stats["miss"] += 1
+
+        kisi = tuple(self.reservations.get_hourly_reserved(tesis_id, tarih))
+        self._put_reserved(key, kisi, now)
+        return kisi
+
+    def event_facilities(self, tarih):
+        """tarih günü aktif etkinliği olan tesisler"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._event_days.get(tarih)
+            if entry is not None and now - entry[1] < self.ttl:
+                return entry[0]
+
+        tesisler = frozenset(e.get("tesis_id") for e in self.events.get_active_events(tarih))
+        with self._lock:
+            if len(self._event_days) >= self.max_size:
+                self._event_days.clear()
+            self._event_days[tarih] = (tesisler, now)
+        return tesisler
+
+    # ------------------------------------------------------------------ artımlı güncelleme
+
+    def on_reservation_changed(self, reservation):
+        """Rezervasyon oluşturulduğunda / iptal edildiğinde yalnızca o (tesis, tarih) kaydını yeniler"""
+        key = (reservation["tesis_id"], reservation["tarih"])
+        kisi = tuple(self.reservations.get_hourly_reserved(*key))
+        self._put_reserved(key, kisi, time.monotonic())
+        self.stats["artimli_guncelleme"] += 1
+
+    def on_events_changed(self):
+        """Etkinlikler değiştiğinde etkinlik kayıtlarını düşürür (ilk erişimde yeniden okunur)"""
+        with self._lock:
+            self._event_days.clear()
+
+    # ------------------------------------------------------------------ özellik vektörleri
+
+    def day_features(self, tesis_id, tarih):
+        """
+        (tesis, tarih) için gün boyunca sabit özellikler ve saatlik rezervasyonlar
+
+        Returns:
+            dict: {"rezervasyon": 24 elemanlı tuple, "etkinlik_var", "resmi_tatil",
+                   "sinav_haftasi", "hafta_sonu"}
+        """
+        gun = date.fromisoformat(tarih)
+        return {
+            "rezervasyon": self.reserved(tesis_id, tarih),
+            "etkinlik_var": 1 if tesis_id in self.event_facilities(tarih) else 0,
+            "resmi_tatil": calendar_service.is_official_holiday(gun),
+            "sinav_haftasi": calendar_service.is_exam_week(gun),
+            "hafta_sonu": 1 if gun.weekday() >= 5 else 0
+        }
+
+    def context(self, tesis_id, when=None, sinav_haftasi=None):
+        """
+        Hava durumu dışındaki model özellikleri (predict_occupancy_batch bağlamı biçiminde)
+
+        Args:
+            tesis_id (int): Tesis ID
+            when (datetime): Saat (None: şimdi)
+            sinav_haftasi (int): Sınav haftası bayrağı (None: takvim servisinden)
+
+        Returns:
+            dict: {"saat", "hafta_sonu", "resmi_tatil", "etkinlik_var", "sinav_haftasi", "rezervasyon_sayisi"}
+        """
+        when = when or datetime.now()
+        gun = self.day_features(tesis_id, when.strftime("%Y-%m-%d"))
+        return {
+            "saat": when.hour,
+            "hafta_sonu": gun["hafta_sonu"],
+            "resmi_tatil": gun["resmi_tatil"],
+            "etkinlik_var": gun["etkinlik_var"],
+            "sinav_haftasi": gun["sinav_haftasi"] if sinav_haftasi is None else sinav_haftasi,
+            "rezervasyon_sayisi": gun["rezervasyon"][when.hour]
+        }
+
+    def slot_matrices(self, tesis_ids, saatler):
+        """
+        Saat x tesis rezervasyon ve etkinlik matrisleri
+
+        Returns:
+            (np.ndarray, np.ndarray): rezerve kişi sayıları ve etkinlik bayrakları (H x F)
+        """
+        H, F = len(saatler), len(tesis_ids)
+        rezervasyon = np.zeros((H, F))
+        etkinlik = np.zeros((H, F))
+
+        gunler = {}
+        for h, when in enumerate(saatler):
+            gunler.setdefault(when.strftime("%Y-%m-%d"), []).append(h)
+
+        for tarih, satirlar in gunler.items():
+            saat_idx = [saatler[h].hour for h in satirlar]
+            etkinlikli = self.event_facilities(tarih)
+            for f, tesis_id in enumerate(tesis_ids):
+                kisi = self.reserved(tesis_id, tarih)
+                rezervasyon[satirlar, f] = [kisi[i] for i in saat_idx]
+                etkinlik[satirlar, f] = 1 if tesis_id in etkinlikli else 0
+
+        return rezervasyon, etkinlik
+
+    def get_stats(self):
+        with self._lock:
+            return {"kayit": len(self._days), "etkinlik_gunu": len(self._event_days), **self.stats}
+
+
+# Global instance
+feature_service = FeatureService()
+
+
+def get_feature_context(tesis_id, when=None, sinav_haftasi=None):
+    """Kolay kullanım için global fonksiyon"""
+    return feature_service.context(tesis_id, when, sinav_haftasi)
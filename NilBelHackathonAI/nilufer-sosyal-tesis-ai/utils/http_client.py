@@ -0,0 +1,39 @@
+"""
+HTTP Client - Paylaşılan Asenkron HTTP Bağlantı Havuzu
+
+Bu modül:
+- Tüm asenkron dış servis çağrıları (OpenWeather vb.) için tek bir httpx.AsyncClient tutar
+- Bağlantıları (keep-alive) yeniden kullanarak her istekte TCP/TLS kurulumunu önler
+- Uygulama kapanırken havuzu kapatır
+"""
+
+import os
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+
+_client = None
+
+
+def get_async_client():
+    """Paylaşılan AsyncClient'ı döndürür (ilk çağrıda oluşturulur)"""
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+        _client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE
+            )
+        )
+    return _client
+
+
+async def close_async_client():
+    """Uygulama kapanırken bağlantı havuzunu kapatır"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -4,36 +4,140 @@ QR Code Entry System - Gerçek Zamanlı Giriş Takibi
 Bu modül:
 - QR kod tarama verilerini yönetir
 - Günlük giriş sayılarını takip eder
-- Gece yarısında otomatik reset yapar
+- Gece yarısında otomatik reset yapar (utils/scheduler.py üzerinden)
 - CSV dosyası oluşturur
+- Taramaları bellekteki halka tampona alır, toplu olarak günlük JSON-lines loguna ekler
+- Sayaçları (tarih, tesis) anahtarıyla tutar; NILUFER_STORAGE_BACKEND=sqlite ile tüm
+  işçiler aynı sayaçları atomik UPSERT ile artırır
 """
 
 import os
 import json
 import csv
+import atexit
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
 import threading
 import time
 
-class QRSystem:
+from .storage import get_storage, use_sqlite
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# Tampon bu kadar kayda ulaşınca diske yazılır
+QR_LOG_BATCH_SIZE = int(os.getenv("QR_LOG_BATCH_SIZE", "100"))
+# Bekleyen kayıtlar en geç bu kadar saniye sonra yazılır
+QR_LOG_FLUSH_INTERVAL = float(os.getenv("QR_LOG_FLUSH_INTERVAL", "5"))
+# Halka tampon kapasitesi (disk yazılamazsa en eski kayıtlar düşer)
+QR_LOG_BUFFER_SIZE = int(os.getenv("QR_LOG_BUFFER_SIZE", "10000"))
+# Her toplu yazımdan sonra fsync
+QR_LOG_FSYNC = os.getenv("QR_LOG_FSYNC", "0") == "1"
+
+class MemoryCounterStore:
+    """Süreç içi sayaçlar: (tarih, tesis_id) -> giriş sayısı, tek kilitle korunur"""
+
     def __init__(self):
-        self.data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+
+    def increment(self, tarih: str, tesis_id: int) -> int:
+        """Sayacı bir artırır ve yeni değeri döndürür"""
+        with self._lock:
+            self._counts[(tarih, tesis_id)] += 1
+            return self._counts[(tarih, tesis_id)]
+
+    def counts(self, tarih: str) -> dict:
+        """Günün tesis bazlı sayaçları"""
+        with self._lock:
+            return {t: n for (d, t), n in self._counts.items() if d == tarih}
+
+    def seed(self, tarih: str, counter: dict):
+        """Kaydedilmiş session'dan sayaçları yükler"""
+        with self._lock:
+            for tesis_id, n in counter.items():
+                self._counts[(tarih, int(tesis_id))] = max(self._counts[(tarih, int(tesis_id))], int(n))
+
+    def discard_before(self, tarih: str):
+        """Devredilen günlerin sayaçlarını bellekten atar"""
+        with self._lock:
+            for key in [k for k in self._counts if k[0] < tarih]:
+                del self._counts[key]
+
+    def claim_rollover(self, tarih: str) -> bool:
+        """Günün kapanışını (CSV) bu sürecin yapıp yapmayacağı"""
+        return True
+
+
+class SQLiteCounterStore:
+    """
+    İşçiler arası paylaşılan sayaçlar (qr_sayac tablosu).
+    Artırma tek bir UPSERT ifadesidir; gün kapanışı meta tablosunda tarih başına
+    bir kez sahiplenilir.
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
+
+    def increment(self, tarih: str, tesis_id: int) -> int:
+        with self.storage.transaction() as conn:
+            row = conn.execute(
+                "INSERT INTO qr_sayac (tarih, tesis_id, adet) VALUES (?, ?, 1) "
+                "ON CONFLICT (tarih, tesis_id) DO UPDATE SET adet = adet + 1 RETURNING adet",
+                (tarih, tesis_id)
+            ).fetchone()
+        return row[0]
+
+    def counts(self, tarih: str) -> dict:
+        rows = self.storage.query("SELECT tesis_id, adet FROM qr_sayac WHERE tarih = ?", (tarih,))
+        return {row["tesis_id"]: row["adet"] for row in rows}
+
+    def seed(self, tarih: str, counter: dict):
+        with self.storage.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO qr_sayac (tarih, tesis_id, adet) VALUES (?, ?, ?) "
+                "ON CONFLICT (tarih, tesis_id) DO UPDATE SET adet = MAX(adet, excluded.adet)",
+                [(tarih, int(t), int(n)) for t, n in counter.items()]
+            )
+
+    def discard_before(self, tarih: str):
+        # Geçmiş günler veritabanında kalır (CSV yeniden üretilebilir)
+        pass
+
+    def claim_rollover(self, tarih: str) -> bool:
+        with self.storage.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO meta (anahtar, deger) VALUES (?, ?)",
+                (f"qr_rollover:{tarih}", datetime.now().isoformat())
+            )
+        return cursor.rowcount == 1
+
+
+class QRSystem:
+    def __init__(self, data_dir=DATA_DIR, buffer_size=QR_LOG_BUFFER_SIZE):
+        self.data_dir = data_dir
         self.daily_logs_dir = os.path.join(self.data_dir, "daily_logs")
         self.session_file = os.path.join(self.data_dir, "current_session.json")
 
         # Klasörleri oluştur
         os.makedirs(self.daily_logs_dir, exist_ok=True)
 
-        # Günlük giriş sayacı
-        self.daily_counter = defaultdict(int)
+        # Günlük giriş sayaçları ((tarih, tesis) anahtarlı; gün değişimi sayaç silmeden olur)
+        self.counters = SQLiteCounterStore() if use_sqlite() else MemoryCounterStore()
         self.current_date = datetime.now().date()
 
+        # Henüz diske yazılmamış taramalar
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = deque(maxlen=buffer_size)
+        self._dropped = 0
+        self._stop_event = threading.Event()
+
         # Session'ı yükle
         self.load_session()
 
-        # Otomatik reset scheduler'ı başlat
-        self.start_scheduler()
+        # Bekleyen taramaları periyodik ve çıkışta yaz
+        self.start_flusher()
+        atexit.register(self.flush)
 
     def load_session(self):
         """Mevcut session'ı yükle"""
@@ -41,22 +145,27 @@ class QRSystem:
             if os.path.exists(self.session_file):
                 with open(self.session_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.daily_counter = defaultdict(int, data.get('counter', {}))
                     saved_date = data.get('date')
-                    if saved_date != str(self.current_date):
+                    if saved_date:
+                        self.counters.seed(saved_date, data.get('counter', {}))
+                    if saved_date and saved_date != str(self.current_date):
+                        # Kapanmamış önceki günü kapat
+                        self.current_date = datetime.strptime(saved_date, "%Y-%m-%d").date()
                         self.reset_daily_data()
         except Exception as e:
             print(f"Session yükleme hatası: {e}")
 
     def save_session(self):
-        """Session'ı kaydet"""
+        """Session'ı kaydet (geçici dosya + os.replace)"""
         try:
             data = {
                 'date': str(self.current_date),
-                'counter': dict(self.daily_counter)
+                'counter': self.daily_counter
             }
-            with open(self.session_file, 'w', encoding='utf-8') as f:
+            tmp_path = f"{self.session_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.session_file)
         except Exception as e:
             print(f"Session kaydetme hatası: {e}")
 
@@ -78,55 +187,101 @@ class QRSystem:
             if not tesis:
                 return {"status": "error", "message": f"Tesis {tesis_id} bulunamadı"}
 
-            # Giriş sayısını artır
-            self.daily_counter[tesis_id] += 1
-
-            # Session'ı kaydet
-            self.save_session()
+            # Giriş sayısını taramanın kendi tarihi için atomik olarak artır
+            simdi = datetime.now()
+            daily_count = self.counters.increment(str(simdi.date()), tesis_id)
 
             # Detaylı log oluştur
-            timestamp = datetime.now().isoformat()
+            timestamp = simdi.isoformat()
             log_entry = {
                 "timestamp": timestamp,
                 "tesis_id": tesis_id,
                 "tesis_adi": tesis["isim"],
                 "qr_data": qr_data or f"SCAN-{int(time.time())}",
-                "daily_count": self.daily_counter[tesis_id]
+                "daily_count": daily_count
             }
 
-            # Günlük log dosyasına kaydet
+            # Tampona ekle (session ile birlikte toplu olarak kaydedilir)
             self.save_scan_log(log_entry)
 
             return {
                 "status": "success",
                 "tesis_adi": tesis["isim"],
-                "total_entries_today": self.daily_counter[tesis_id],
+                "total_entries_today": daily_count,
                 "timestamp": timestamp
             }
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    @property
+    def daily_counter(self) -> dict:
+        """Güncel günün tesis bazlı giriş sayıları (kopya)"""
+        return self.counters.counts(str(self.current_date))
+
+    def _scan_log_path(self, tarih: str) -> str:
+        """Günün JSON-lines tarama logu"""
+        return os.path.join(self.daily_logs_dir, f"scan_log_{tarih}.jsonl")
+
     def save_scan_log(self, log_entry: dict):
-        """Tarama logunu dosyaya kaydeder"""
-        try:
-            log_file = os.path.join(self.daily_logs_dir, f"scan_log_{self.current_date}.json")
+        """Tarama logunu tampona ekler; tampon eşiği aşarsa hemen yazar"""
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._dropped += 1
+            self._buffer.append(log_entry)
+            dolu = len(self._buffer) >= QR_LOG_BATCH_SIZE
 
-            # Mevcut logları oku
-            logs = []
-            if os.path.exists(log_file):
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
+        if dolu:
+            self.flush()
 
-            # Yeni logu ekle
-            logs.append(log_entry)
+    def flush(self) -> int:
+        """
+        Bekleyen taramaları tarihlerine göre günlük loglara ekler ve session'ı kaydeder
 
-            # Kaydet
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, indent=2, ensure_ascii=False)
+        Returns:
+            int: Yazılan kayıt sayısı
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+
+            by_date = defaultdict(list)
+            for entry in batch:
+                by_date[entry["timestamp"][:10]].append(entry)
+
+            try:
+                for tarih, entries in by_date.items():
+                    with open(self._scan_log_path(tarih), 'a', encoding='utf-8') as f:
+                        f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+                        f.flush()
+                        if QR_LOG_FSYNC:
+                            os.fsync(f.fileno())
+            except Exception as e:
+                # Yazılamayan kayıtlar sonraki denemede yazılmak üzere tampona geri alınır.
+                # Bu arada gelen taramalarla kapasite aşılırsa halka tamponda olduğu gibi
+                # en eski kayıtlar düşer ve sayılır
+                print(f"Scan log kaydetme hatası: {e}")
+                with self._lock:
+                    tasan = len(batch) + len(self._buffer) - self._buffer.maxlen
+                    if tasan > 0:
+                        self._dropped += tasan
+                        batch = batch[tasan:]
+                    self._buffer.extendleft(reversed(batch))
+                return 0
 
-        except Exception as e:
-            print(f"Scan log kaydetme hatası: {e}")
+            self.save_session()
+            return len(batch)
+
+    def start_flusher(self):
+        """Bekleyen taramaları QR_LOG_FLUSH_INTERVAL aralıklarla yazan thread'i başlatır"""
+        def flush_job():
+            while not self._stop_event.wait(QR_LOG_FLUSH_INTERVAL):
+                self.flush()
+
+        threading.Thread(target=flush_job, daemon=True).start()
 
     def create_daily_csv(self):
         """
@@ -136,6 +291,7 @@ class QRSystem:
             from .weather_service import get_weather_data
             from .events import event_manager
 
+            daily_counter = self.daily_counter
             csv_filename = f"{self.current_date}.csv"
             csv_path = os.path.join(self.daily_logs_dir, csv_filename)
 
@@ -157,7 +313,7 @@ class QRSystem:
                     writer.writerow({
                         'date': str(self.current_date),
                         'tesis_id': tesis_id,
-                        'total_people_entered': self.daily_counter.get(tesis_id, 0),
+                        'total_people_entered': daily_counter.get(tesis_id, 0),
                         'temperature': weather.get('hava_sicakligi', 20.0),
                         'rain': weather.get('yagis_var', 0),
                         'event_status': int(event_status > 0),
@@ -172,51 +328,55 @@ class QRSystem:
             print(f"CSV oluşturma hatası: {e}")
             return None
 
-    def reset_daily_data(self):
+    def reset_daily_data(self, today=None):
         """Günlük veriyi sıfırlar ve CSV oluşturur"""
         print(f"🔄 Günlük reset: {self.current_date}")
 
-        # Önce CSV oluştur
-        self.create_daily_csv()
+        # Bekleyen taramaları yaz, sonra CSV oluştur (birden çok işçide yalnızca biri)
+        self.flush()
+        if self.counters.claim_rollover(str(self.current_date)):
+            self.create_daily_csv()
 
-        # Sayacı sıfırla
-        self.daily_counter.clear()
-        self.current_date = datetime.now().date()
+        # Yeni güne geç: sayaçlar tarih anahtarlı olduğundan gece yarısından sonra
+        # gelen taramalar zaten yeni güne sayılmıştır
+        self.current_date = today or datetime.now().date()
+        self.counters.discard_before(str(self.current_date))
 
         # Session'ı kaydet
         self.save_session()
 
         print("✅ Günlük veri reset tamamlandı")
 
+    def rollover_if_needed(self, today=None) -> bool:
+        """
+        Gün değiştiyse günü kapatır. Aynı gün için tekrar çağrılması bir şey yapmaz
+        (scheduler başlangıçta kaçırılan gece yarısını bu fonksiyonla telafi eder).
+        """
+        today = today or datetime.now().date()
+        if today <= self.current_date:
+            return False
+        self.reset_daily_data(today)
+        return True
+
     def is_official_holiday(self, date):
         """Tarihin resmi tatil olup olmadığını kontrol eder"""
-        tatil_gunleri = [(1,1), (4,23), (5,19), (8,30), (10,29), (11,10)]
-        return (date.month, date.day) in tatil_gunleri
+        from .calendar_service import calendar_service
+        return bool(calendar_service.is_official_holiday(date))
 
     def get_daily_stats(self):
-        """Günlük istatistikleri döndürür"""
+        """Günlük istatistikleri bellekteki sayaçlardan döndürür"""
+        counter = self.daily_counter
+        with self._lock:
+            bekleyen = len(self._buffer)
         return {
             "date": str(self.current_date),
-            "total_entries": sum(self.daily_counter.values()),
-            "facility_breakdown": dict(self.daily_counter),
-            "most_popular_facility": max(self.daily_counter, key=self.daily_counter.get) if self.daily_counter else None
+            "total_entries": sum(counter.values()),
+            "facility_breakdown": counter,
+            "most_popular_facility": max(counter, key=counter.get) if counter else None,
+            "pending_log_entries": bekleyen,
+            "dropped_log_entries": self._dropped
         }
 
-    def start_scheduler(self):
-        """Otomatik günlük reset scheduler'ı başlatır"""
-        def daily_reset_job():
-            while True:
-                now = datetime.now()
-                # Gece yarısını bekle
-                if now.hour == 0 and now.minute == 0:
-                    self.reset_daily_data()
-                    time.sleep(60)  # 1 dakika bekle
-                time.sleep(30)  # 30 saniyede bir kontrol
-
-        # Daemon thread olarak başlat
-        reset_thread = threading.Thread(target=daily_reset_job, daemon=True)
-        reset_thread.start()
-
 # Global instance
 qr_system = QRSystem()
 
@@ -5,27 +5,169 @@ Bu modül:
 - Vatandaşların tesis rezervasyonu yapmasını sağlar
 - Rezervasyon verilerini AI modeline girdi olarak kullanır
 - Çift rezervasyonları önler
+- Değişiklikleri yalnızca eklemeli bir günlüğe (journal) yazar, belirli aralıklarla
+  günlüğü rezervasyonlar.json anlık görüntüsüne sıkıştırır (compaction). Günlük ekleme ve
+  sıkıştırma dosya kilidi altında yapılır; sıkıştırma diskteki anlık görüntü + günlükten
+  kurulduğu için diğer işçilerin olayları kaybolmaz
+- NILUFER_STORAGE_BACKEND=sqlite ile verileri paylaşılan SQLite veritabanında tutar
 """
 
 import json
 import os
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+from collections import defaultdict, Counter
 import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .storage import get_storage, use_sqlite
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# Günlükte bu kadar kayıt birikince anlık görüntüye sıkıştırılır
+JOURNAL_COMPACT_EVERY = int(os.getenv("RESERVATION_JOURNAL_COMPACT_EVERY", "500"))
+# Her kayıttan sonra fsync (kapatılırsa yalnızca flush yapılır)
+JOURNAL_FSYNC = os.getenv("RESERVATION_JOURNAL_FSYNC", "1") == "1"
+
+def apply_journal(reservations: List[Dict], journal_file: str):
+    """
+    Günlükteki create/cancel olaylarını listeye uygular (yerinde)
+
+    Returns:
+        (uygulanan olay sayısı, bozuk satır bulundu mu)
+    """
+    if not os.path.exists(journal_file):
+        return 0, False
+
+    by_id = {r["id"]: r for r in reservations}
+    sayac, bozuk = 0, False
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                print("[REZERVASYON] Günlükte bozuk satır atlandı")
+                bozuk = True
+                continue
+
+            if event.get("op") == "create":
+                reservation = event["rezervasyon"]
+                if reservation["id"] not in by_id:
+                    reservations.append(reservation)
+                    by_id[reservation["id"]] = reservation
+            elif event.get("op") == "cancel":
+                reservation = by_id.get(event["id"])
+                if reservation is not None:
+                    reservation["durum"] = "iptal_edildi"
+                    reservation["iptal_tarihi"] = event["iptal_tarihi"]
+            sayac += 1
+
+    return sayac, bozuk
 
 class ReservationSystem:
-    def __init__(self):
-        self.data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
         self.reservations_file = os.path.join(self.data_dir, "rezervasyonlar.json")
+        self.journal_file = os.path.join(self.data_dir, "rezervasyonlar.journal.jsonl")
+        self.journal_lock_file = f"{self.journal_file}.lock"
+
+        # Oluşturma/iptal ve günlük yazımını sıraya sokar
+        self._lock = threading.RLock()
+        self._journal_entries = 0
 
         # Rezervasyon dosyası yoksa oluştur
         if not os.path.exists(self.reservations_file):
             self._create_empty_reservations()
 
         self.reservations = self._load_reservations()
+        self._replay_journal()
+
+        # İkincil indeksler (oluşturma ve iptalde güncellenir)
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self):
+        """Tüm indeksleri rezervasyon listesinden yeniden kurar"""
+        self._by_id = {}
+        self._by_user = defaultdict(list)                # user_id -> [rezervasyon]
+        self._by_date = defaultdict(list)                # tarih -> [rezervasyon]
+        self._active_by_slot = defaultdict(dict)         # (tesis_id, tarih) -> {id: aktif rezervasyon}
+        self._by_status = defaultdict(dict)              # durum -> {id: rezervasyon}
+        self._tesis_counts = Counter()                   # tesis_id -> toplam rezervasyon
+        self._active_tesis_counts = Counter()            # tesis_id -> aktif rezervasyon
+        self._slots = {}                                 # (tesis_id, tarih) -> saatlik doluluk dizisi
+
+        for reservation in self.reservations:
+            self._index(reservation)
+
+    def _index(self, reservation: Dict):
+        """Tek bir rezervasyonu indekslere ekler"""
+        rez_id = reservation["id"]
+        self._by_id[rez_id] = reservation
+        self._by_user[reservation["user_id"]].append(reservation)
+        self._by_date[reservation["tarih"]].append(reservation)
+        self._by_status[reservation["durum"]][rez_id] = reservation
+        self._tesis_counts[reservation["tesis_id"]] += 1
+        if reservation["durum"] == "aktif":
+            self._active_by_slot[(reservation["tesis_id"], reservation["tarih"])][rez_id] = reservation
+            self._active_tesis_counts[reservation["tesis_id"]] += 1
+            self._update_slot(reservation, +1)
+
+    @staticmethod
+    def _hours(saat: int, sure: int) -> range:
+        """Rezervasyonun kapsadığı saatler (gün sonunda kesilir; yeni rezervasyonlar gün içinde biter)"""
+        return range(max(saat, 0), min(saat + sure, 24))
+
+    def _get_slot(self, tesis_id: int, tarih: str) -> Dict:
+        """
+        (tesis, tarih) için saatlik doluluk dizisi:
+            kisi[h]  -> h saatindeki toplam rezerve kişi sayısı
+            users[h] -> h saatinde rezervasyonu olan kullanıcılar (user_id -> rezervasyon sayısı)
+        """
+        slot = self._slots.get((tesis_id, tarih))
+        if slot is None:
+            slot = {"kisi": [0] * 24, "users": [Counter() for _ in range(24)]}
+            self._slots[(tesis_id, tarih)] = slot
+        return slot
+
+    def _update_slot(self, reservation: Dict, sign: int):
+        """Aktif rezervasyonu saatlik diziye ekler (+1) veya çıkarır (-1): O(süre)"""
+        self._add_to_slot(self._get_slot(reservation["tesis_id"], reservation["tarih"]), reservation, sign)
+
+    @classmethod
+    def _add_to_slot(cls, slot: Dict, reservation: Dict, sign: int):
+        """Rezervasyonun kapsadığı saatlerde kişi ve kullanıcı sayaçlarını günceller"""
+        user_id = reservation["user_id"]
+        for h in cls._hours(reservation["saat"], reservation["sure"]):
+            slot["kisi"][h] += sign * reservation["kisi_sayisi"]
+            slot["users"][h][user_id] += sign
+            if slot["users"][h][user_id] <= 0:
+                del slot["users"][h][user_id]
+
+    def _set_status(self, reservation: Dict, durum: str):
+        """Rezervasyon durumunu değiştirir ve durum indekslerini günceller"""
+        rez_id = reservation["id"]
+        self._by_status[reservation["durum"]].pop(rez_id, None)
+        if reservation["durum"] == "aktif":
+            self._active_by_slot[(reservation["tesis_id"], reservation["tarih"])].pop(rez_id, None)
+            self._active_tesis_counts[reservation["tesis_id"]] -= 1
+            self._update_slot(reservation, -1)
+
+        reservation["durum"] = durum
+        self._by_status[durum][rez_id] = reservation
+        if durum == "aktif":
+            self._active_by_slot[(reservation["tesis_id"], reservation["tarih"])][rez_id] = reservation
+            self._active_tesis_counts[reservation["tesis_id"]] += 1
+            self._update_slot(reservation, +1)
 
     def _create_empty_reservations(self):
         """Boş rezervasyon dosyası oluştur"""
+        os.makedirs(self.data_dir, exist_ok=True)
         with open(self.reservations_file, 'w', encoding='utf-8') as f:
             json.dump([], f, indent=2, ensure_ascii=False)
 
@@ -37,10 +179,87 @@ class ReservationSystem:
         except:
             return []
 
+    def _replay_journal(self):
+        """
+        Anlık görüntüden sonra günlüğe yazılmış olayları bellekteki listeye uygular.
+        Olaylar idempotenttir: sıkıştırma ile günlük kesme arasında çökülürse aynı
+        olayların tekrar uygulanması sonucu değiştirmez. Yarım yazılmış son satır atlanır.
+        """
+        self._journal_entries, bozuk = apply_journal(self.reservations, self.journal_file)
+
+        if self._journal_entries:
+            print(f"[REZERVASYON] Günlükten {self._journal_entries} olay yüklendi")
+        # Yarım kalan satırın arkasına ekleme yapılmaması için bozuk günlük hemen sıkıştırılır
+        if bozuk or self._journal_entries >= JOURNAL_COMPACT_EVERY:
+            self.compact()
+
+    def _append_journal(self, event: Dict):
+        """
+        Olayı günlüğe tek satır olarak ekler (O(1)). Bellekteki durum ancak bu çağrı
+        başarılı olduktan sonra değiştirilir; yazım hatasında değişiklik uygulanmaz.
+        """
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self._lock, self._journal_lock():
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                if JOURNAL_FSYNC:
+                    os.fsync(f.fileno())
+            self._journal_entries += 1
+
+    def _maybe_compact(self):
+        """Günlük eşiği aştıysa anlık görüntüye sıkıştırır"""
+        if self._journal_entries >= JOURNAL_COMPACT_EVERY:
+            try:
+                self.compact()
+            except OSError as e:
+                # Günlük hâlâ tam; bir sonraki değişiklikte yeniden denenir
+                print(f"[REZERVASYON] Sıkıştırma başarısız: {e}")
+
+    @contextmanager
+    def _journal_lock(self):
+        """Günlük ekleme ve sıkıştırma için işlemler arası (fcntl) kilit"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        with open(self.journal_lock_file, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def compact(self):
+        """
+        Günlüğü anlık görüntüye sıkıştırır: dosya kilidi altında diskteki anlık görüntü ve
+        günlüğün tamamı (diğer işçilerin olayları dahil) okunur, yeni anlık görüntü atomik
+        yazılır (geçici dosya + os.replace), ardından günlük boşaltılır. Bellekteki liste ve
+        indeksler de bu birleşik durumla yenilenir.
+        """
+        with self._lock, self._journal_lock():
+            reservations = self._load_reservations()
+            apply_journal(reservations, self.journal_file)
+            # Diskte bulunmayan bellek kayıtları da korunur (anlık görüntü okunamazsa veri kaybolmaz)
+            bilinen = {r["id"] for r in reservations}
+            reservations.extend(r for r in self.reservations if r["id"] not in bilinen)
+
+            self.reservations = reservations
+            self._save_reservations()
+            with open(self.journal_file, 'w', encoding='utf-8') as f:
+                f.flush()
+                if JOURNAL_FSYNC:
+                    os.fsync(f.fileno())
+            self._journal_entries = 0
+            self._rebuild_indexes()
+
     def _save_reservations(self):
-        """Rezervasyonları dosyaya kaydet"""
-        with open(self.reservations_file, 'w', encoding='utf-8') as f:
+        """Rezervasyonların tam anlık görüntüsünü atomik olarak dosyaya kaydet"""
+        tmp_path = f"{self.reservations_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             json.dump(self.reservations, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.reservations_file)
 
     def create_reservation(self, user_data: Dict) -> Dict:
         """
@@ -72,6 +291,13 @@ class ReservationSystem:
             if not tesis:
                 return {"status": "error", "message": f"Tesis bulunamadı: {user_data['tesis_id']}"}
 
+            if not 0 <= user_data["saat"] < 24 or user_data["sure"] < 1:
+                return {"status": "error", "message": "Geçersiz saat veya süre"}
+            # Çakışma ve kapasite kontrolleri rezervasyon gününün saatlerini kapsar; gece yarısını
+            # aşan rezervasyonlar kabul edilmez
+            if user_data["saat"] + user_data["sure"] > 24:
+                return {"status": "error", "message": "Rezervasyon gece yarısını aşamaz"}
+
             # Tarih validasyonu (bugünden itibaren 30 güne kadar)
             rezervasyon_tarihi = datetime.strptime(user_data["tarih"], "%Y-%m-%d").date()
             bugun = datetime.now().date()
@@ -82,38 +308,35 @@ class ReservationSystem:
             if rezervasyon_tarihi > max_tarih:
                 return {"status": "error", "message": "30 günden fazla ileriye rezervasyon yapılamaz"}
 
-            # Çakışma kontrolü
-            if self._check_conflict(user_data):
-                return {"status": "error", "message": "Bu zaman diliminde çakışma var"}
+            with self._write_lock():
+                # Çakışma kontrolü
+                if self._check_conflict(user_data):
+                    return {"status": "error", "message": "Bu zaman diliminde çakışma var"}
 
-            # Kapasite kontrolü (basit yaklaşım)
-            mevcut_rezervasyonlar = self._get_reservations_for_time(
-                user_data["tesis_id"], user_data["tarih"], user_data["saat"]
-            )
-            toplam_kisi = sum(r["kisi_sayisi"] for r in mevcut_rezervasyonlar) + user_data["kisi_sayisi"]
-
-            if toplam_kisi > tesis["kapasite"] * 0.8:  # %80 kapasite limiti
-                return {"status": "error", "message": "Yetersiz kapasite"}
-
-            # Rezervasyon oluştur
-            reservation_id = str(uuid.uuid4())[:8]
-
-            reservation = {
-                "id": reservation_id,
-                "user_id": user_data["user_id"],
-                "tesis_id": user_data["tesis_id"],
-                "tesis_adi": tesis["isim"],
-                "tarih": user_data["tarih"],
-                "saat": user_data["saat"],
-                "sure": user_data["sure"],
-                "kisi_sayisi": user_data["kisi_sayisi"],
-                "durum": "aktif",
-                "olusturulma_tarihi": datetime.now().isoformat(),
-                "iptal_tarihi": None
-            }
+                # Kapasite kontrolü: rezervasyonun kapsadığı her saat için %80 limiti
+                if not self._check_capacity(user_data, tesis["kapasite"]):
+                    return {"status": "error", "message": "Yetersiz kapasite"}
 
-            self.reservations.append(reservation)
-            self._save_reservations()
+                # Rezervasyon oluştur
+                reservation_id = str(uuid.uuid4())[:8]
+
+                reservation = {
+                    "id": reservation_id,
+                    "user_id": user_data["user_id"],
+                    "tesis_id": user_data["tesis_id"],
+                    "tesis_adi": tesis["isim"],
+                    "tarih": user_data["tarih"],
+                    "saat": user_data["saat"],
+                    "sure": user_data["sure"],
+                    "kisi_sayisi": user_data["kisi_sayisi"],
+                    "durum": "aktif",
+                    "olusturulma_tarihi": datetime.now().isoformat(),
+                    "iptal_tarihi": None
+                }
+
+                self._persist_create(reservation)
+
+            self._on_reservations_changed(reservation)
 
             return {
                 "status": "success",
@@ -128,71 +351,165 @@ class ReservationSystem:
     def cancel_reservation(self, reservation_id: str, user_id: str) -> Dict:
         """Rezervasyon iptali"""
         try:
-            for reservation in self.reservations:
-                if reservation["id"] == reservation_id and reservation["user_id"] == user_id:
-                    if reservation["durum"] == "aktif":
-                        reservation["durum"] = "iptal_edildi"
-                        reservation["iptal_tarihi"] = datetime.now().isoformat()
-                        self._save_reservations()
+            with self._write_lock():
+                reservation = self.get_reservation(reservation_id)
+                if reservation is None or reservation["user_id"] != user_id:
+                    return {"status": "error", "message": "Rezervasyon bulunamadı"}
 
-                        return {"status": "success", "message": "Rezervasyon iptal edildi"}
+                if reservation["durum"] != "aktif":
+                    return {"status": "error", "message": "Rezervasyon zaten iptal edilmiş"}
 
-                    else:
-                        return {"status": "error", "message": "Rezervasyon zaten iptal edilmiş"}
+                self._persist_cancel(reservation, datetime.now().isoformat())
 
-            return {"status": "error", "message": "Rezervasyon bulunamadı"}
+            self._on_reservations_changed(reservation)
+
+            return {"status": "success", "message": "Rezervasyon iptal edildi"}
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def _on_reservations_changed(self, reservation: Dict):
+        """Rezervasyon oluşturulduğunda / iptal edildiğinde çağrılır"""
+        # Rezerve kişi sayısı özellik servisinde ve tahmin tablosunda yalnızca o tesis-gün
+        # kaydını etkiler (tablo satırı özellik servisinden okunduğu için önce o güncellenir)
+        try:
+            from .feature_service import feature_service
+            from ai.forecast_grid import invalidate_forecast_slot
+            feature_service.on_reservation_changed(reservation)
+            invalidate_forecast_slot(reservation["tesis_id"], reservation["tarih"])
+        except Exception as e:
+            print(f"Tahmin tablosu güncellenemedi: {e}")
+
+    def _write_lock(self):
+        """Kontrol + yazma adımlarını tek parça çalıştıran kilit"""
+        return self._lock
+
+    def _persist_create(self, reservation: Dict):
+        """Yeni rezervasyonu önce günlüğe, sonra belleğe yazar"""
+        self._append_journal({"op": "create", "rezervasyon": reservation})
+        self.reservations.append(reservation)
+        self._index(reservation)
+        self._maybe_compact()
+
+    def _persist_cancel(self, reservation: Dict, iptal_tarihi: str):
+        """İptali önce günlüğe, sonra belleğe yazar"""
+        self._append_journal({
+            "op": "cancel",
+            "id": reservation["id"],
+            "iptal_tarihi": iptal_tarihi
+        })
+        self._set_status(reservation, "iptal_edildi")
+        reservation["iptal_tarihi"] = iptal_tarihi
+        self._maybe_compact()
+
+    def get_reservation(self, reservation_id: str) -> Optional[Dict]:
+        """ID ile rezervasyon (yoksa None)"""
+        return self._by_id.get(reservation_id)
+
     def get_user_reservations(self, user_id: str) -> List[Dict]:
         """Kullanıcının rezervasyonları"""
-        return [r for r in self.reservations if r["user_id"] == user_id]
+        return list(self._by_user.get(user_id, []))
 
     def get_reservations_for_date(self, tesis_id: int, tarih: str) -> List[Dict]:
-        """Belirli tarih için tesis rezervasyonları"""
-        return [
-            r for r in self.reservations
-            if r["tesis_id"] == tesis_id and r["tarih"] == tarih and r["durum"] == "aktif"
-        ]
+        """Belirli tarih için tesis rezervasyonları (aktif)"""
+        return list(self._active_by_slot.get((tesis_id, tarih), {}).values())
 
-    def _check_conflict(self, new_reservation: Dict) -> bool:
-        """Rezervasyon çakışması kontrolü"""
-        mevcut_rezervasyonlar = self.get_reservations_for_date(
-            new_reservation["tesis_id"], new_reservation["tarih"]
-        )
+    def get_reservations_on(self, tarih: str) -> List[Dict]:
+        """Belirli tarihteki tüm rezervasyonlar (tüm tesisler, tüm durumlar)"""
+        return list(self._by_date.get(tarih, []))
 
-        new_start = new_reservation["saat"]
-        new_end = new_start + new_reservation["sure"]
+    def get_reservations_by_status(self, durum: str) -> List[Dict]:
+        """Belirli durumdaki rezervasyonlar ("aktif", "iptal_edildi")"""
+        return list(self._by_status.get(durum, {}).values())
 
-        for rez in mevcut_rezervasyonlar:
-            if rez["user_id"] == new_reservation["user_id"]:  # Aynı kullanıcı kontrolü
-                continue
+    def get_all_reservations(self) -> List[Dict]:
+        """Tüm rezervasyonlar (oluşturulma sırasıyla)"""
+        return list(self.reservations)
 
-            existing_start = rez["saat"]
-            existing_end = existing_start + rez["sure"]
+    def _find_slot(self, tesis_id: int, tarih: str) -> Optional[Dict]:
+        """(tesis, tarih) saatlik doluluk dizisi, hiç aktif rezervasyon yoksa None"""
+        return self._slots.get((tesis_id, tarih))
 
-            # Zaman çakışması kontrolü
-            if (new_start < existing_end and new_end > existing_start):
+    def _check_conflict(self, new_reservation: Dict) -> bool:
+        """Rezervasyon çakışması kontrolü: kapsanan saatlerde başka kullanıcı var mı (O(süre))"""
+        slot = self._find_slot(new_reservation["tesis_id"], new_reservation["tarih"])
+        if slot is None:
+            return False
+
+        user_id = new_reservation["user_id"]
+        for h in self._hours(new_reservation["saat"], new_reservation["sure"]):
+            users = slot["users"][h]
+            # Aynı kullanıcının kendi rezervasyonları çakışma sayılmaz
+            if len(users) - (1 if user_id in users else 0) > 0:
                 return True
 
         return False
 
+    def _check_capacity(self, new_reservation: Dict, kapasite: int, limit: float = 0.8) -> bool:
+        """Kapsanan tüm saatlerde toplam kişi sayısı kapasite limitinin altında mı (O(süre))"""
+        slot = self._find_slot(new_reservation["tesis_id"], new_reservation["tarih"])
+        mevcut = slot["kisi"] if slot else [0] * 24
+
+        for h in self._hours(new_reservation["saat"], new_reservation["sure"]):
+            if mevcut[h] + new_reservation["kisi_sayisi"] > kapasite * limit:
+                return False
+        return True
+
     def _get_reservations_for_time(self, tesis_id: int, tarih: str, saat: int) -> List[Dict]:
         """Belirli saat için rezervasyonları döndür"""
         reservations = self.get_reservations_for_date(tesis_id, tarih)
         return [r for r in reservations if r["saat"] <= saat < r["saat"] + r["sure"]]
 
+    def get_hourly_reserved(self, tesis_id: int, tarih: str) -> List[int]:
+        """Tesisin o günkü saatlik rezerve kişi sayıları (24 elemanlı liste)"""
+        slot = self._find_slot(tesis_id, tarih)
+        return list(slot["kisi"]) if slot else [0] * 24
+
+    def free_slots(self, tesis_id: int, tarih: str, user_id: Optional[str] = None,
+                   limit: float = 0.8) -> List[Dict]:
+        """
+        Rezervasyona açık saatler
+
+        Args:
+            tesis_id: Tesis ID
+            tarih: YYYY-MM-DD
+            user_id: Verilirse bu kullanıcının kendi rezervasyonları çakışma sayılmaz
+            limit: Kapasite limiti (varsayılan %80)
+
+        Returns:
+            [{"saat": int, "bos_kapasite": int}] - açılış saatleri içinde, başka kullanıcıyla
+            çakışmayan ve kapasitesi dolmamış saatler
+        """
+        from .tesisler import get_tesis_by_id, ACILIS_SAATI, KAPANIS_SAATI
+        tesis = get_tesis_by_id(tesis_id)
+        if not tesis:
+            return []
+
+        slot = self._find_slot(tesis_id, tarih)
+        max_kisi = int(tesis["kapasite"] * limit)
+        bos = []
+        for h in range(ACILIS_SAATI, KAPANIS_SAATI):
+            if slot is not None:
+                users = slot["users"][h]
+                if len(users) - (1 if user_id in users else 0) > 0:
+                    continue
+                kalan = max_kisi - slot["kisi"][h]
+            else:
+                kalan = max_kisi
+            if kalan > 0:
+                bos.append({"saat": h, "bos_kapasite": kalan})
+        return bos
+
     def get_reservation_stats(self) -> Dict:
         """Rezervasyon istatistikleri"""
-        aktif = len([r for r in self.reservations if r["durum"] == "aktif"])
-        iptal = len([r for r in self.reservations if r["durum"] == "iptal_edildi"])
+        aktif = len(self._by_status.get("aktif", {}))
+        iptal = len(self._by_status.get("iptal_edildi", {}))
 
-        # Tesis bazlı istatistikler
-        tesis_stats = {}
-        for tesis_id in set(r["tesis_id"] for r in self.reservations):
-            tesis_rez = [r for r in self.reservations if r["tesis_id"] == tesis_id and r["durum"] == "aktif"]
-            tesis_stats[tesis_id] = len(tesis_rez)
+        # Tesis bazlı istatistikler (aktif rezervasyon sayısı)
+        tesis_stats = {
+            tesis_id: self._active_tesis_counts[tesis_id]
+            for tesis_id in self._tesis_counts
+        }
 
         return {
             "toplam_rezervasyon": len(self.reservations),
@@ -201,8 +518,120 @@ class ReservationSystem:
             "tesis_bazli": tesis_stats
         }
 
+class SQLiteReservationSystem(ReservationSystem):
+    """
+    ReservationSystem ile aynı arayüz, SQLite arka ucu.
+    Bellekte kopya tutulmaz; sorgular indeksli SQL ile yapılır. Oluşturma ve iptal
+    BEGIN IMMEDIATE işlemi içinde çalıştığından çakışma/kapasite kontrolü ile yazma
+    arasında başka bir işçi araya giremez.
+    """
+
+    COLUMNS = ("id", "user_id", "tesis_id", "tesis_adi", "tarih", "saat", "sure",
+               "kisi_sayisi", "durum", "olusturulma_tarihi", "iptal_tarihi")
+
+    def __init__(self, storage=None):
+        self.data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+        self.reservations_file = os.path.join(self.data_dir, "rezervasyonlar.json")
+        self.journal_file = os.path.join(self.data_dir, "rezervasyonlar.journal.jsonl")
+        self.storage = storage or get_storage()
+        self._select = f"SELECT {', '.join(self.COLUMNS)} FROM rezervasyonlar"
+
+        self._migrate_from_json()
+
+    def _migrate_from_json(self):
+        """rezervasyonlar.json (+ günlük) içeriğini bir kez veritabanına aktarır"""
+        with self.storage.transaction() as conn:
+            if self.storage.is_migrated(conn, "rezervasyonlar"):
+                return
+
+            reservations = self._load_reservations() if os.path.exists(self.reservations_file) else []
+            apply_journal(reservations, self.journal_file)
+            conn.executemany(
+                f"INSERT OR IGNORE INTO rezervasyonlar ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                [tuple(r.get(c) for c in self.COLUMNS) for r in reservations]
+            )
+            self.storage.mark_migrated(conn, "rezervasyonlar", len(reservations))
+
+    def _write_lock(self):
+        return self.storage.transaction()
+
+    def _persist_create(self, reservation: Dict):
+        self.storage.connection().execute(
+            f"INSERT INTO rezervasyonlar ({', '.join(self.COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+            tuple(reservation[c] for c in self.COLUMNS)
+        )
+
+    def _persist_cancel(self, reservation: Dict, iptal_tarihi: str):
+        self.storage.connection().execute(
+            "UPDATE rezervasyonlar SET durum = 'iptal_edildi', iptal_tarihi = ? "
+            "WHERE id = ? AND durum = 'aktif'",
+            (iptal_tarihi, reservation["id"])
+        )
+        reservation["durum"] = "iptal_edildi"
+        reservation["iptal_tarihi"] = iptal_tarihi
+
+    def get_reservation(self, reservation_id: str) -> Optional[Dict]:
+        rows = self.storage.query(f"{self._select} WHERE id = ?", (reservation_id,))
+        return rows[0] if rows else None
+
+    def get_user_reservations(self, user_id: str) -> List[Dict]:
+        return self.storage.query(f"{self._select} WHERE user_id = ? ORDER BY sira", (user_id,))
+
+    def get_reservations_for_date(self, tesis_id: int, tarih: str) -> List[Dict]:
+        return self.storage.query(
+            f"{self._select} WHERE tesis_id = ? AND tarih = ? AND durum = 'aktif' ORDER BY sira",
+            (tesis_id, tarih)
+        )
+
+    def get_reservations_on(self, tarih: str) -> List[Dict]:
+        return self.storage.query(f"{self._select} WHERE tarih = ? ORDER BY sira", (tarih,))
+
+    def get_reservations_by_status(self, durum: str) -> List[Dict]:
+        return self.storage.query(f"{self._select} WHERE durum = ? ORDER BY sira", (durum,))
+
+    def get_all_reservations(self) -> List[Dict]:
+        return self.storage.query(f"{self._select} ORDER BY sira")
+
+    def _find_slot(self, tesis_id: int, tarih: str) -> Optional[Dict]:
+        """Saatlik doluluk dizisi o günün aktif rezervasyonlarından (indeksli sorgu) kurulur"""
+        reservations = self.get_reservations_for_date(tesis_id, tarih)
+        if not reservations:
+            return None
+
+        slot = {"kisi": [0] * 24, "users": [Counter() for _ in range(24)]}
+        for reservation in reservations:
+            self._add_to_slot(slot, reservation, +1)
+        return slot
+
+    def compact(self):
+        """SQLite arka ucunda günlük yoktur"""
+        pass
+
+    def get_reservation_stats(self) -> Dict:
+        toplam = self.storage.scalar("SELECT COUNT(*) FROM rezervasyonlar")
+        durumlar = dict(
+            (row["durum"], row["adet"]) for row in self.storage.query(
+                "SELECT durum, COUNT(*) AS adet FROM rezervasyonlar GROUP BY durum"
+            )
+        )
+        tesis_stats = {
+            row["tesis_id"]: row["aktif"] for row in self.storage.query(
+                "SELECT tesis_id, SUM(durum = 'aktif') AS aktif FROM rezervasyonlar "
+                "GROUP BY tesis_id ORDER BY MIN(sira)"
+            )
+        }
+
+        return {
+            "toplam_rezervasyon": toplam,
+            "aktif_rezervasyon": durumlar.get("aktif", 0),
+            "iptal_rezervasyon": durumlar.get("iptal_edildi", 0),
+            "tesis_bazli": tesis_stats
+        }
+
 # Global instance
-reservation_system = ReservationSystem()
+reservation_system = SQLiteReservationSystem() if use_sqlite() else ReservationSystem()
 
 def create_reservation(user_data):
     """Kolay kullanım için global fonksiyon"""
@@ -0,0 +1,243 @@
+"""
+Scheduler - Zamanlanmış Görevler (Gün Sonu, Yeniden Eğitim Kontrolü, Hata Raporu)
+
+Bu modül:
+- Her görevin bir sonraki çalışma zamanını hesaplar ve tam o ana kadar uyur
+  (periyodik yoklama yoktur, gece yarısı görevi kaçmaz veya iki kez çalışmaz)
+- Birden çok görevi tek bir thread üzerinde yönetir
+- Son çalışma zamanlarını data/scheduler_state.json dosyasında tutar; başlangıçta
+  kaçırılan görevleri bir kez çalıştırır (catch-up)
+- Saat kaynağı dışarıdan verilebilir (FakeClock ile testler beklemeden çalışır)
+"""
+
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+STATE_PATH = os.path.join(DATA_DIR, "scheduler_state.json")
+
+# Uzun uykular bu süreye bölünür (sistem saati ileri/geri alınırsa sapma sınırlı kalır)
+MAX_SLEEP_SECONDS = 300
+RETRAIN_CHECK_INTERVAL = float(os.getenv("RETRAIN_CHECK_INTERVAL", "3600"))
+ERROR_REPORT_HOUR = int(os.getenv("ERROR_REPORT_HOUR", "1"))
+
+
+class SystemClock:
+    """Gerçek saat"""
+
+    def now(self):
+        return datetime.now()
+
+    def wait_until(self, deadline, stop_event):
+        """deadline'a kadar (veya stop_event kurulana kadar) uyur; durdurulduysa True"""
+        seconds = (deadline - self.now()).total_seconds()
+        return stop_event.wait(min(max(seconds, 0), MAX_SLEEP_SECONDS))
+
+
+class FakeClock:
+    """Testler için saat: beklemek yerine zamanı deadline'a ilerletir"""
+
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance(self, **kwargs):
+        self.current += timedelta(**kwargs)
+
+    def wait_until(self, deadline, stop_event):
+        if deadline > self.current:
+            self.current = deadline
+        return stop_event.is_set()
+
+
+class DailyAt:
+    """Her gün belirli saatte çalışan görev takvimi"""
+
+    def __init__(self, hour=0, minute=0):
+        self.hour = hour
+        self.minute = minute
+
+    def previous(self, t):
+        """t anına kadar (t dahil) en son planlanan çalışma"""
+        candidate = t.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        return candidate if candidate <= t else candidate - timedelta(days=1)
+
+    def next_after(self, t):
+        """t anından sonraki ilk planlanan çalışma"""
+        return self.previous(t) + timedelta(days=1)
+
+
+class Every:
+    """Sabit aralıklarla çalışan görev takvimi"""
+
+    def __init__(self, seconds):
+        self.interval = timedelta(seconds=seconds)
+
+    def previous(self, t):
+        return t - self.interval
+
+    def next_after(self, t):
+        return t + self.interval
+
+
+class Scheduler:
+    def __init__(self, clock=None, state_path=STATE_PATH):
+        self.clock = clock or SystemClock()
+        self.state_path = state_path
+
+        self._lock = threading.Lock()
+        self._jobs = {}                 # isim -> {"func", "schedule", "next_run"}
+        self._state = self._load_state()  # isim -> son çalışma (ISO)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"[SCHEDULER] Durum kaydedilemedi: {e}")
+
+    def add_job(self, name, func, schedule, catch_up=True):
+        """
+        Görev ekler
+
+        Args:
+            name: Görev adı (durum dosyasındaki anahtar)
+            func: Çalıştırılacak fonksiyon; çalışma zamanını (datetime) argüman olarak alır
+            schedule: DailyAt veya Every
+            catch_up: Son planlanan çalışma kaçırıldıysa hemen bir kez çalıştır
+        """
+        now = self.clock.now()
+        last_run = self._state.get(name)
+
+        if last_run is None:
+            # İlk kez görülen görev: geçmişi telafi etmeye çalışma
+            self._state[name] = now.isoformat()
+            self._save_state()
+            next_run = schedule.next_after(now)
+        elif catch_up and datetime.fromisoformat(last_run) < schedule.previous(now):
+            next_run = now
+        else:
+            next_run = schedule.next_after(max(datetime.fromisoformat(last_run), schedule.previous(now)))
+
+        with self._lock:
+            self._jobs[name] = {"func": func, "schedule": schedule, "next_run": next_run}
+
+    def next_deadline(self):
+        """En yakın görev zamanı (görev yoksa None)"""
+        with self._lock:
+            return min((job["next_run"] for job in self._jobs.values()), default=None)
+
+    def run_pending(self):
+        """Zamanı gelmiş görevleri çalıştırır; çalışan görev adlarını döndürür"""
+        now = self.clock.now()
+        with self._lock:
+            due = [(name, job) for name, job in self._jobs.items() if job["next_run"] <= now]
+
+        ran = []
+        for name, job in sorted(due, key=lambda item: item[1]["next_run"]):
+            try:
+                job["func"](now)
+            except Exception as e:
+                print(f"[SCHEDULER] '{name}' görevi hata verdi: {e}")
+            job["next_run"] = job["schedule"].next_after(now)
+            self._state[name] = now.isoformat()
+            ran.append(name)
+
+        if ran:
+            self._save_state()
+        return ran
+
+    def run_until(self, end):
+        """Zamanı end anına kadar ilerleterek görevleri çalıştırır (FakeClock ile testler için)"""
+        ran = []
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > end:
+                self.clock.wait_until(end, self._stop_event)
+                return ran
+            self.clock.wait_until(deadline, self._stop_event)
+            ran.extend(self.run_pending())
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.run_pending()
+            deadline = self.next_deadline() or self.clock.now() + timedelta(seconds=MAX_SLEEP_SECONDS)
+            if self.clock.wait_until(deadline, self._stop_event):
+                break
+
+    def start(self):
+        """Görevleri arka plan thread'inde çalıştırmaya başlar"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arka plan thread'ini durdurur"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def get_status(self):
+        """Görevlerin son ve sonraki çalışma zamanları"""
+        with self._lock:
+            return {
+                name: {
+                    "son_calisma": self._state.get(name),
+                    "sonraki_calisma": job["next_run"].isoformat()
+                }
+                for name, job in self._jobs.items()
+            }
+
+
+def _daily_rollover(now):
+    from .qr_system import qr_system
+    qr_system.rollover_if_needed(now.date())
+
+
+def _retrain_check(now):
+    from .datalogger import check_retraining
+    check_retraining()
+
+
+def _error_report(now):
+    from ai.error_tracker import error_tracker
+    error_tracker.generate_performance_report()
+
+
+def register_default_jobs(scheduler):
+    """Gün sonu (CSV + sayaç devri), yeniden eğitim kontrolü ve hata raporu görevlerini ekler"""
+    scheduler.add_job("gunluk_kapanis", _daily_rollover, DailyAt(0, 0))
+    scheduler.add_job("yeniden_egitim_kontrolu", _retrain_check, Every(RETRAIN_CHECK_INTERVAL))
+    scheduler.add_job("hata_raporu", _error_report, DailyAt(ERROR_REPORT_HOUR, 0))
+    return scheduler
+
+
+# Global instance
+scheduler = Scheduler()
+
+
+def start_scheduler():
+    """Kolay kullanım için global fonksiyon"""
+    if not scheduler.get_status():
+        register_default_jobs(scheduler)
+    scheduler.start()
+    return scheduler
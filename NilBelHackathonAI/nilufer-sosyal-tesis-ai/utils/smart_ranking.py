@@ -16,7 +16,9 @@ import random
 # Yolları ayarla
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from ai.predict import predict_occupancy
+from ai.predict import predict_occupancy_batch, format_prediction
+from ai.forecast_grid import forecast_grid
+from utils.weather_service import get_weather_data
 from utils.tesisler import TESISLER, get_tesis_by_id
 from utils.events import event_manager
 
@@ -63,10 +65,14 @@ class SmartRanking:
         else:
             filtered_tesisler = TESISLER
 
-        for tesis in filtered_tesisler:
+        # Doluluk tahminlerini tüm tesisler için tek model çağrısı ile al
+        tahminler, weather = self._predict_all(filtered_tesisler)
+        if tahminler is None:
+            return []
+
+        for tesis, tahmin in zip(filtered_tesisler, tahminler):
             try:
-                # Doluluk tahmini al
-                prediction = predict_occupancy(tesis["tesis_id"])
+                prediction = format_prediction(tesis["tesis_id"], tahmin, weather)
                 doluluk_orani = float(prediction["doluluk"].replace('%', ''))
 
                 # Faktörleri hesapla
@@ -109,6 +115,25 @@ class SmartRanking:
 
         return ranked[:top_n]
 
+    def _predict_all(self, tesisler: List[Dict]):
+        """Verilen tesisler için toplu doluluk tahmini (tahminler, hava durumu)"""
+        weather = get_weather_data()
+
+        # Önceden hesaplanmış tablodan okunur; tablo hazır değilse veya tesisler kapalıysa canlı tahmin
+        tahminler = forecast_grid.lookup([t["tesis_id"] for t in tesisler])
+        if tahminler is not None:
+            return tahminler, weather
+
+        try:
+            tahminler = predict_occupancy_batch(
+                [t["tesis_id"] for t in tesisler],
+                {"sicaklik": weather["hava_sicakligi"], "yagis_var": weather["yagis_var"]}
+            )
+        except Exception as e:
+            print(f"Toplu tahmin hatası: {e}")
+            return None, weather
+        return tahminler, weather
+
     def _calculate_factors(self, tesis: Dict, doluluk_orani: float,
                         user_location: Tuple[float, float],
                         preferred_types: List[str],
@@ -190,20 +215,20 @@ class SmartRanking:
         """Belediye için yük dengeleme önerileri"""
         all_predictions = []
 
-        # Tüm tesisler için tahmin al
-        for tesis in TESISLER:
-            try:
-                prediction = predict_occupancy(tesis["tesis_id"])
-                doluluk = float(prediction["doluluk"].replace('%', ''))
+        # Tüm tesisler için tek seferde tahmin al
+        tahminler, _ = self._predict_all(TESISLER)
+        if tahminler is None:
+            return []
 
-                all_predictions.append({
-                    "tesis": tesis,
-                    "doluluk": doluluk,
-                    "kapasite": tesis["kapasite"],
-                    "kullanilan": (doluluk / 100) * tesis["kapasite"]
-                })
-            except:
-                continue
+        for tesis, tahmin in zip(TESISLER, tahminler):
+            doluluk = round(float(tahmin))
+
+            all_predictions.append({
+                "tesis": tesis,
+                "doluluk": doluluk,
+                "kapasite": tesis["kapasite"],
+                "kullanilan": (doluluk / 100) * tesis["kapasite"]
+            })
 
         # Doluluk oranına göre sırala
         sorted_by_usage = sorted(all_predictions, key=lambda x: x["doluluk"], reverse=True)
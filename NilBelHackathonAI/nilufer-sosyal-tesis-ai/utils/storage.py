@@ -0,0 +1,171 @@
+"""
+Storage - Paylaşılan SQLite Depolama Katmanı
+
+Bu modül:
+- Rezervasyon, etkinlik, model hata geçmişi ve QR giriş sayaçları için tek bir SQLite (WAL)
+  veritabanı sağlar
+- Birden çok uvicorn işçisinin aynı veriyi kayıp güncelleme olmadan paylaşmasını sağlar
+  (yazma işlemleri BEGIN IMMEDIATE ile sıraya girer)
+- Sık kullanılan sorgular için indeksleri oluşturur
+- JSON dosyalarından tek seferlik taşıma (migration) durumunu meta tablosunda tutar
+
+Arka uç NILUFER_STORAGE_BACKEND ortam değişkeni ile seçilir:
+    json   -> (varsayılan) data/*.json dosyaları
+    sqlite -> data/nilufer.db (NILUFER_SQLITE_PATH ile değiştirilebilir)
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+STORAGE_BACKEND = os.getenv("NILUFER_STORAGE_BACKEND", "json").lower()
+SQLITE_PATH = os.getenv("NILUFER_SQLITE_PATH", os.path.join(DATA_DIR, "nilufer.db"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("NILUFER_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    anahtar TEXT PRIMARY KEY,
+    deger TEXT
+);
+
+CREATE TABLE IF NOT EXISTS rezervasyonlar (
+    sira INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    tesis_id INTEGER NOT NULL,
+    tesis_adi TEXT,
+    tarih TEXT NOT NULL,
+    saat INTEGER NOT NULL,
+    sure INTEGER NOT NULL,
+    kisi_sayisi INTEGER NOT NULL,
+    durum TEXT NOT NULL,
+    olusturulma_tarihi TEXT,
+    iptal_tarihi TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_rez_slot ON rezervasyonlar (tesis_id, tarih, durum);
+CREATE INDEX IF NOT EXISTS ix_rez_user ON rezervasyonlar (user_id);
+CREATE INDEX IF NOT EXISTS ix_rez_tarih ON rezervasyonlar (tarih);
+CREATE INDEX IF NOT EXISTS ix_rez_durum ON rezervasyonlar (durum);
+
+CREATE TABLE IF NOT EXISTS etkinlikler (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tesis_id INTEGER,
+    tarih TEXT NOT NULL,
+    aktif INTEGER NOT NULL DEFAULT 1,
+    veri TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_etk_tesis_tarih ON etkinlikler (tesis_id, tarih);
+CREATE INDEX IF NOT EXISTS ix_etk_tarih ON etkinlikler (tarih);
+
+CREATE TABLE IF NOT EXISTS model_hatalari (
+    sira INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    tesis_id INTEGER,
+    predicted REAL,
+    actual REAL,
+    error REAL,
+    context TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_hata_timestamp ON model_hatalari (timestamp);
+
+CREATE TABLE IF NOT EXISTS qr_sayac (
+    tarih TEXT NOT NULL,
+    tesis_id INTEGER NOT NULL,
+    adet INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tarih, tesis_id)
+);
+"""
+
+
+class SQLiteStorage:
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # executescript kendi işlemini yönetir; tablolar IF NOT EXISTS ile idempotent
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        """İş parçacığına özel bağlantı (sqlite3 bağlantıları thread'ler arasında paylaşılmaz)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yazma işlemi: BEGIN IMMEDIATE ile yazma kilidini baştan alır, böylece
+        kontrol + yazma adımları tüm işçiler arasında tek parça çalışır
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            # İç içe çağrı: dıştaki işlemin parçası olarak çalış
+            yield conn
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def query(self, sql, params=()):
+        """Okuma sorgusu: satırları dict listesi olarak döndürür"""
+        return [dict(row) for row in self.connection().execute(sql, params)]
+
+    def scalar(self, sql, params=()):
+        """Tek değer döndüren okuma sorgusu"""
+        row = self.connection().execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def is_migrated(self, conn, name):
+        """Belirtilen JSON kaynağı daha önce taşındı mı (işlem içinde çağrılmalı)"""
+        row = conn.execute("SELECT 1 FROM meta WHERE anahtar = ?", (f"migrated:{name}",)).fetchone()
+        return row is not None
+
+    def mark_migrated(self, conn, name, count):
+        """Taşıma tamamlandı olarak işaretler"""
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (anahtar, deger) VALUES (?, ?)",
+            (f"migrated:{name}", str(count))
+        )
+        print(f"[STORAGE] {name}: JSON'dan {count} kayıt SQLite'a taşındı")
+
+    def close(self):
+        """Bu iş parçacığının bağlantısını kapatır"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Paylaşılan SQLiteStorage örneğini döndürür (ilk çağrıda oluşturulur)"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = SQLiteStorage()
+        return _storage
+
+
+def use_sqlite():
+    """SQLite arka ucu seçili mi"""
+    return STORAGE_BACKEND == "sqlite"
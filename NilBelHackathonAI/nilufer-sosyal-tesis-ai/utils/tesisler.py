@@ -1,6 +1,10 @@
 # Nilüfer Belediyesi Sosyal Tesisleri
 # Bu dosya tüm tesis bilgilerini merkezi olarak tutar
 
+# Tesislerin açık olduğu saat aralığı [ACILIS_SAATI, KAPANIS_SAATI)
+ACILIS_SAATI = 9
+KAPANIS_SAATI = 22
+
 TESISLER = [
     {"tesis_id": 1, "tesis_tipi": "kütüphane", "kapasite": 180, "isim": "Nilbel Koza Kütüphanesi"},
     {"tesis_id": 2, "tesis_tipi": "kütüphane", "kapasite": 60, "isim": "Şiir Kütüphanesi"},
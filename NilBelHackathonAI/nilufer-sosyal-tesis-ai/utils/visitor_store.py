@@ -0,0 +1,600 @@
+"""
+Visitor Store - Ziyaretçi Verileri İçin Sütunlu, Tarihe Göre Bölümlenmiş Depo
+
+Bu modül:
+- Gerçek ve sentetik ziyaretçi verilerini tipli sütunlarla Parquet dosyalarında tutar
+  (pyarrow yoksa uyarı verip aynı düzende CSV'ye düşer)
+- Gerçek veriyi data/<depo>/tarih=YYYY-MM-DD/ klasörlerine bölümler; okuyucular tarih
+  aralığına göre klasör, tesis listesine göre satır grubu eler
+- Yazımları bellekte biriktirir ve toplu olarak yeni bir parça dosyası şeklinde ekler
+  (geçici dosya + os.replace, birden çok işçi aynı anda yazabilir); tampon dolduğunda ve
+  en geç VISITOR_STORE_FLUSH_INTERVAL saniyede bir diske yazılır
+- Eski gercek_ziyaretci.csv / sentetik_ziyaretci.csv dosyalarını ilk kullanımda bir kez içe aktarır
+- Toplam kayıt sayısını diske yazım sırasında güncellenen bir yan dosyada
+  (data/<depo>.sayac.json) tutar; sayım ve yeniden eğitim eşiği kontrolü dosyaları okumadan
+  O(1) yapılır. Sayaç yalnızca diskteki kayıtları sayar, böylece tetiklenen eğitim eşiği
+  geçiren kayıtları görür
+"""
+
+import os
+import csv
+import glob
+import json
+import atexit
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import pyarrow  # noqa: F401
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    pq = None
+    PARQUET_AVAILABLE = False
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+VISITOR_STORE_FORMAT = os.getenv("VISITOR_STORE_FORMAT", "parquet")
+VISITOR_STORE_BUFFER = int(os.getenv("VISITOR_STORE_BUFFER", "200"))
+# Tampondaki kayıtlar en geç bu kadar saniye sonra yazılır
+VISITOR_STORE_FLUSH_INTERVAL = float(os.getenv("VISITOR_STORE_FLUSH_INTERVAL", "5"))
+
+# Gerçek ziyaretçi verisi (modelin beklediği format)
+VISITOR_SCHEMA = {
+    "timestamp": "datetime64[ns]",
+    "tesis_id": "int16",
+    "saat": "int8",
+    "gun": "int8",
+    "hafta_sonu": "int8",
+    "resmi_tatil": "int8",
+    "etkinlik_var": "int8",
+    "sinav_haftasi": "int8",
+    "rezervasyon_sayisi": "int32",
+    "sicaklik": "float64",
+    "yagis_var": "int8",
+    "doluluk_orani": "float64",
+}
+
+# Sentetik eğitim verisi (zaman damgası yoktur)
+SYNTHETIC_SCHEMA = {
+    "tesis_id": "int16",
+    "saat": "int8",
+    "hafta_sonu": "int8",
+    "resmi_tatil": "int8",
+    "etkinlik_var": "int8",
+    "sinav_haftasi": "int8",
+    "rezervasyon_sayisi": "int32",
+    "sicaklik": "float64",
+    "yagis_var": "int8",
+    "ziyaretci_sayisi": "int32",
+    "doluluk_orani": "float64",
+}
+
+# log_real_data_entry'nin eski CSV satır formatı
+_LEGACY_REAL_ROW = ["tesis_id", "tarih", "saat", "gun_adi", "is_weekend", "sicaklik", "yagis", "doluluk_orani"]
+
+_TUM = "tum"  # Bölümlenmeyen depoların tek klasörü
+
+
+class RecordCounter:
+    """
+    Kayıt sayacı yan dosyası. Tüm işçiler aynı dosyayı dosya kilidi altında günceller.
+
+    Dosya içeriği:
+        {"toplam": 1234, "esikler": {"data_logger": 1200, "retrain": 1200}}
+
+    "esikler" her tüketicinin en son sahiplendiği eşik değerini tutar; böylece sayaç bir
+    eşiğin üzerinden atlasa veya iki yazar aynı anda geçse bile eşik tam olarak bir kez
+    tetiklenir.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """İşlemler arası (fcntl) ve thread'ler arası kilit"""
+        with self._thread_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, state):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def migrate(self, import_legacy, compute_total):
+        """
+        Eski veri aktarımını ve sayacın ilk hesaplanmasını tek kilit altında yapar
+
+        Aynı anda başlayan işçilerden yalnızca biri aktarım yapar; diğerleri kilidi bekler ve
+        sayacı aktarım bittikten sonra görür.
+
+        Args:
+            import_legacy: Aktarımı yapıp aktarılan kayıt sayısını döndürür (yapılmışsa 0)
+            compute_total: Diskteki toplam kayıt sayısını döndürür
+        """
+        with self._locked():
+            state = self._load()
+            imported = import_legacy()
+            if state is None:
+                self._save({"toplam": int(compute_total()), "esikler": {}})
+            elif imported:
+                # Sayaç önceki başarısız bir aktarım denemesi sırasında oluşmuş olabilir
+                state["toplam"] += int(imported)
+                self._save(state)
+
+    def value(self):
+        """Toplam kayıt sayısı"""
+        state = self._load()
+        return state["toplam"] if state else 0
+
+    def add(self, n):
+        """Toplamı n artırır, yeni toplamı döndürür"""
+        with self._locked():
+            state = self._load() or {"toplam": 0, "esikler": {}}
+            state["toplam"] += int(n)
+            self._save(state)
+            return state["toplam"]
+
+    def reset(self, total=0):
+        """Toplamı verilen değere ayarlar (sahiplenilmiş eşikler yeni toplamı aşamaz)"""
+        with self._locked():
+            state = self._load() or {"esikler": {}}
+            state["toplam"] = int(total)
+            for name, esik in state["esikler"].items():
+                state["esikler"][name] = min(esik, state["toplam"])
+            self._save(state)
+
+    def claim(self, name, every):
+        """
+        Toplam, tüketicinin son tetiklenmesinden bu yana bir 'every' eşiğini geçtiyse
+        eşiği sahiplenir
+
+        Args:
+            name: Tüketici adı (ör. "data_logger")
+            every: Eşik aralığı (ör. 100 kayıtta bir)
+
+        Returns:
+            int: Geçilen eşik değeri (tetiklenmeliyse), aksi halde None
+        """
+        with self._locked():
+            state = self._load() or {"toplam": 0, "esikler": {}}
+            esik = state["toplam"] // every * every
+            son = state["esikler"].get(name)
+
+            if son is not None and esik <= son:
+                return None
+            state["esikler"][name] = esik
+            self._save(state)
+            # İlk kez görülen tüketici: geçmiş eşikleri tetikleme, yalnızca başlangıcı kaydet
+            return esik if son is not None and esik > 0 else None
+
+
+class VisitorStore:
+    def __init__(self, name, schema, partition_by_date=True, legacy_csv=None,
+                 buffer_size=VISITOR_STORE_BUFFER, fmt=VISITOR_STORE_FORMAT, data_dir=DATA_DIR,
+                 flush_interval=VISITOR_STORE_FLUSH_INTERVAL):
+        self.name = name
+        self.schema = schema
+        self.partition_by_date = partition_by_date
+        self.legacy_csv = legacy_csv
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.fmt = fmt
+        if fmt == "parquet" and not PARQUET_AVAILABLE:
+            print(f"[VISITOR STORE] UYARI: pyarrow kurulu değil, {name} deposu CSV parça dosyalarına "
+                  f"düşüyor (Parquet satır grubu elemesi kullanılamaz). 'pip install pyarrow' önerilir.")
+            self.fmt = "csv"
+        self.root = os.path.join(data_dir, name)
+        # Yan dosya depo klasörünün dışında tutulur (replace klasörü silip yeniden oluşturur)
+        self.counter = RecordCounter(os.path.join(data_dir, f"{name}.sayac.json"))
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._migrated = False
+        self._flusher = None
+        self._stop_event = threading.Event()
+
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------ yazma
+
+    def append(self, rows):
+        """
+        Kayıt(lar)ı tampona ekler; tampon dolunca diske yazar
+
+        Args:
+            rows: dict, dict listesi veya DataFrame
+        """
+        self._ensure_migrated()
+        if isinstance(rows, dict):
+            rows = [rows]
+        elif not isinstance(rows, list):
+            # DataFrame: büyük toplu yazımlar tampona alınmadan doğrudan yazılır
+            # (yazılamayan bölümler tampona alınır)
+            self.counter.add(self._write(rows))
+            return
+
+        with self._lock:
+            self._buffer.extend(rows)
+            dolu = len(self._buffer) >= self.buffer_size
+        self.start_flusher()
+
+        if dolu:
+            self.flush()
+
+    def flush(self):
+        """Tampondaki kayıtları yeni parça dosyaları olarak yazar ve sayaca ekler"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+
+        import pandas as pd
+        self._ensure_migrated()
+        try:
+            written = self._write(pd.DataFrame(rows))
+        except Exception as e:
+            print(f"[VISITOR STORE] {self.name} yazılamadı, kayıtlar tamponda bekliyor: {e}")
+            with self._lock:
+                self._buffer[:0] = rows
+            return 0
+        # Kayıtlar yalnızca diske yazıldıktan sonra sayılır (yazılamayan bölümler sayılmaz)
+        self.counter.add(written)
+        return written
+
+    def pending(self):
+        """Bu süreçte diske yazılmayı bekleyen kayıt sayısı"""
+        with self._lock:
+            return len(self._buffer)
+
+    def start_flusher(self):
+        """Tampondaki kayıtları flush_interval aralıklarla yazan thread'i (bir kez) başlatır"""
+        if self._flusher is not None or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+
+            def flush_job():
+                while not self._stop_event.wait(self.flush_interval):
+                    self.flush()
+
+            self._flusher = threading.Thread(target=flush_job, name=f"visitor-store-{self.name}", daemon=True)
+            self._flusher.start()
+
+    def _write(self, df):
+        """
+        Tabloyu parça dosyalarına yazar, diske ulaşan satır sayısını döndürür
+
+        Her bölüm ayrı bir parça dosyasıdır; yazılamayan bölümlerin satırları tamponun başına
+        alınır ve sonraki flush'ta yeniden denenir. Yazılmış bölümler tekrar yazılmaz.
+        """
+        df = self.normalize(df)
+        if df.empty:
+            return 0
+
+        if self.partition_by_date:
+            tarihler = df["timestamp"].dt.strftime("%Y-%m-%d")
+            parts = [(self._partition_dir(tarih), part) for tarih, part in df.groupby(tarihler, sort=True)]
+        else:
+            parts = [(self._partition_dir(None), df)]
+
+        written, failed = 0, []
+        for directory, part in parts:
+            try:
+                self._write_part(directory, part)
+                written += len(part)
+            except Exception as e:
+                print(f"[VISITOR STORE] {self.name}/{os.path.basename(directory)} yazılamadı, "
+                      f"{len(part)} kayıt tamponda bekliyor: {e}")
+                failed.extend(part.to_dict("records"))
+
+        if failed:
+            with self._lock:
+                self._buffer[:0] = failed
+            self.start_flusher()
+        return written
+
+    def _write_part(self, directory, df):
+        """Tek parça dosyası: önce geçici isimle yazılır, sonra yerine taşınır"""
+        os.makedirs(directory, exist_ok=True)
+        base = f"part-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}.{self.fmt}"
+        tmp_path = os.path.join(directory, f".{base}.tmp")
+
+        if self.fmt == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_csv(tmp_path, index=False, date_format="%Y-%m-%dT%H:%M:%S.%f")
+        os.replace(tmp_path, os.path.join(directory, base))
+
+    def replace(self, df):
+        """Depoyu verilen tabloyla değiştirir (ör. sentetik veri yeniden üretildiğinde)"""
+        with self._lock:
+            self._buffer = []
+            if os.path.isdir(self.root):
+                shutil.rmtree(self.root)
+            self._mark_migrated()
+        self.counter.reset(self._write(df))
+        self._migrated = True
+
+    def compact(self, tarih=None):
+        """Bir bölümdeki (veya tüm bölümlerdeki) parça dosyalarını tek dosyada birleştirir"""
+        import pandas as pd
+        self.flush()
+        directories = [self._partition_dir(tarih)] if tarih or not self.partition_by_date else self._partition_dirs()
+        for directory in directories:
+            files = self._files(directory)
+            if len(files) <= 1:
+                continue
+            merged = pd.concat([self._read_file(f) for f in files], ignore_index=True)
+            self._write_part(directory, merged)
+            for f in files:
+                os.remove(f)
+
+    # ------------------------------------------------------------------ okuma
+
+    def read(self, start=None, end=None, tesis_ids=None, columns=None):
+        """
+        Kayıtları okur
+
+        Args:
+            start, end: Dahil tarih aralığı (YYYY-MM-DD, date veya datetime); bölüm klasörleri
+                        bu aralığa göre elenir
+            tesis_ids: Yalnızca bu tesislerin satırları (Parquet'te satır grubu filtresi)
+            columns: Okunacak sütunlar (varsayılan: şemanın tamamı)
+
+        Returns:
+            pd.DataFrame (tipli sütunlar)
+        """
+        import pandas as pd
+        self.flush()
+        self._ensure_migrated()
+
+        columns = list(columns or self.schema)
+        tesis_ids = [int(t) for t in tesis_ids] if tesis_ids is not None else None
+
+        frames = []
+        for directory in self._partition_dirs(start, end):
+            for path in self._files(directory):
+                frames.append(self._read_file(path, columns, tesis_ids))
+
+        if not frames:
+            return self.normalize(pd.DataFrame(columns=columns))[columns]
+        return pd.concat(frames, ignore_index=True)
+
+    def list_parts(self):
+        """
+        Bölüm başına parça dosyaları (artımlı okuyucular yalnızca yeni dosyaları işler)
+
+        Returns:
+            dict: {"tarih=YYYY-MM-DD" veya "tum": [dosya adları]}
+        """
+        self.flush()
+        self._ensure_migrated()
+        return {
+            os.path.basename(directory): [os.path.basename(f) for f in self._files(directory)]
+            for directory in self._partition_dirs()
+        }
+
+    def read_parts(self, partition, files, columns=None):
+        """Bir bölümdeki belirli parça dosyalarını okur (list_parts çıktısıyla birlikte kullanılır)"""
+        import pandas as pd
+        columns = list(columns or self.schema)
+        frames = [self._read_file(os.path.join(self.root, partition, f), columns) for f in files]
+        if not frames:
+            return self.normalize(pd.DataFrame(columns=columns))[columns]
+        return pd.concat(frames, ignore_index=True)
+
+    def _read_file(self, path, columns=None, tesis_ids=None):
+        import pandas as pd
+        columns = list(columns or self.schema)
+        read_cols = columns if tesis_ids is None or "tesis_id" in columns else columns + ["tesis_id"]
+
+        if path.endswith(".parquet"):
+            filters = [("tesis_id", "in", tesis_ids)] if tesis_ids is not None else None
+            df = pd.read_parquet(path, columns=read_cols, filters=filters)
+        else:
+            df = self.normalize(pd.read_csv(path, usecols=lambda c: c in read_cols))
+            if tesis_ids is not None:
+                df = df[df["tesis_id"].isin(tesis_ids)]
+        return df[columns].reset_index(drop=True)
+
+    def count(self):
+        """Toplam kayıt sayısı (yan dosyadan, O(1); bu süreçte yazılmayı bekleyenler dahil)"""
+        self._ensure_migrated()
+        return self.counter.value() + self.pending()
+
+    def claim_threshold(self, name, every):
+        """
+        Kayıt sayısı 'every' katlarından birini geçtiyse eşiği bir kez sahiplenir (bkz. RecordCounter.claim)
+
+        Tampondaki kayıtlar bir eşiği geçiriyorsa önce diske yazılır; eşik sahiplenildiğinde
+        onu geçiren kayıtlar diskte, ayrı süreçte çalışan eğitim tarafından okunabilir durumdadır.
+        """
+        self._ensure_migrated()
+        bekleyen = self.pending()
+        if bekleyen:
+            toplam = self.counter.value()
+            if (toplam + bekleyen) // every > toplam // every:
+                self.flush()
+        return self.counter.claim(name, every)
+
+    def recount(self):
+        """Sayacı dosyaları tarayarak yeniden hesaplar (dosyalar elle değiştirildiyse)"""
+        self.flush()
+        self._ensure_migrated()
+        total = self._scan_count()
+        self.counter.reset(total)
+        return total
+
+    def _scan_count(self):
+        """Diskteki kayıtları sayar (Parquet'te yalnızca dosya altbilgileri okunur)"""
+        total = 0
+        for directory in self._partition_dirs():
+            for path in self._files(directory):
+                if path.endswith(".parquet"):
+                    total += pq.ParquetFile(path).metadata.num_rows
+                else:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        total += max(sum(1 for _ in f) - 1, 0)
+        return total
+
+    # ------------------------------------------------------------------ yardımcılar
+
+    def normalize(self, df):
+        """Şemadaki sütunları seçer, eksikleri 0 ile doldurur ve tipleri uygular"""
+        import pandas as pd
+        df = df.copy()
+        for column, dtype in self.schema.items():
+            if column not in df.columns:
+                df[column] = pd.NaT if dtype.startswith("datetime") else 0
+            if dtype.startswith("datetime"):
+                df[column] = pd.to_datetime(df[column], format="ISO8601")
+            else:
+                df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0).astype(dtype)
+        if "timestamp" in self.schema:
+            df = df[df["timestamp"].notna()]
+        return df[list(self.schema)].reset_index(drop=True)
+
+    def _partition_dir(self, tarih):
+        return os.path.join(self.root, f"tarih={tarih}" if tarih else _TUM)
+
+    def _partition_dirs(self, start=None, end=None):
+        if not os.path.isdir(self.root):
+            return []
+        if not self.partition_by_date:
+            return [self._partition_dir(None)]
+
+        start = str(start)[:10] if start is not None else None
+        end = str(end)[:10] if end is not None else None
+        dirs = []
+        for entry in sorted(os.listdir(self.root)):
+            if not entry.startswith("tarih="):
+                continue
+            tarih = entry[len("tarih="):]
+            if (start and tarih < start) or (end and tarih > end):
+                continue
+            dirs.append(os.path.join(self.root, entry))
+        return dirs
+
+    def _files(self, directory):
+        return sorted(glob.glob(os.path.join(directory, "part-*")))
+
+    def _marker_path(self):
+        return os.path.join(self.root, ".migrated")
+
+    def _mark_migrated(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._marker_path(), 'w', encoding='utf-8') as f:
+            f.write(datetime.now().isoformat())
+
+    def _ensure_migrated(self):
+        """
+        Eski CSV dosyasını (varsa) depoya bir kez aktarır ve kayıt sayacını hazırlar
+
+        Aktarım sayaç dosya kilidi altında yapılır; işaret dosyası yalnızca kayıtlar yazıldıktan
+        sonra oluşturulur, aktarım başarısız olursa sonraki erişimde yeniden denenir.
+        """
+        if self._migrated:
+            return
+        try:
+            # Sayaç yoksa (ilk çalıştırma veya eski kurulum) aktarımdan sonra diskteki kayıtlardan hesaplanır
+            self.counter.migrate(self._import_legacy, self._scan_count)
+        except Exception as e:
+            print(f"[VISITOR STORE] {self.name} eski veri aktarımı başarısız, yeniden denenecek: {e}")
+            return
+        self._migrated = True
+
+    def _import_legacy(self):
+        """Eski CSV'yi depoya yazar ve işaret dosyasını oluşturur; aktarılan kayıt sayısını döndürür"""
+        if os.path.exists(self._marker_path()):
+            return 0
+
+        written = 0
+        if self.legacy_csv and os.path.exists(self.legacy_csv):
+            written = self._write(self._read_legacy_csv(self.legacy_csv))
+            print(f"[VISITOR STORE] {os.path.basename(self.legacy_csv)} -> {self.name}: {written} kayıt aktarıldı")
+        self._mark_migrated()
+        return written
+
+    def _read_legacy_csv(self, path):
+        """
+        Eski CSV'yi okur. gercek_ziyaretci.csv iki farklı satır formatı içerebilir
+        (log_qr_entry'nin 12 sütunlu ve log_real_data_entry'nin 8 sütunlu satırları).
+        """
+        import pandas as pd
+        if not self.partition_by_date:
+            return self.normalize(pd.read_csv(path))
+
+        rows = []
+        atlanan = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None) or list(VISITOR_SCHEMA)
+            for values in reader:
+                if len(values) == len(header) and header[0] == "timestamp":
+                    rows.append(dict(zip(header, values)))
+                elif len(values) == len(_LEGACY_REAL_ROW):
+                    try:
+                        rows.append(_from_legacy_real_row(dict(zip(_LEGACY_REAL_ROW, values))))
+                    except ValueError:
+                        atlanan += 1
+        if atlanan:
+            print(f"[VISITOR STORE] {os.path.basename(path)}: {atlanan} bozuk satır atlandı")
+        return self.normalize(pd.DataFrame(rows))
+
+
+def _from_legacy_real_row(row):
+    """log_real_data_entry'nin eski satırını standart şemaya çevirir"""
+    ts = datetime.strptime(row["tarih"], "%Y-%m-%d").replace(hour=int(row["saat"]))
+    return {
+        "timestamp": ts.isoformat(),
+        "tesis_id": row["tesis_id"],
+        "saat": row["saat"],
+        "gun": ts.weekday() + 1,
+        "hafta_sonu": row["is_weekend"],
+        "sicaklik": row["sicaklik"],
+        "yagis_var": row["yagis"],
+        "doluluk_orani": row["doluluk_orani"],
+    }
+
+
+# Global instances
+real_visitor_store = VisitorStore(
+    "gercek_ziyaretci", VISITOR_SCHEMA,
+    legacy_csv=os.path.join(DATA_DIR, "gercek_ziyaretci.csv")
+)
+synthetic_visitor_store = VisitorStore(
+    "sentetik_ziyaretci", SYNTHETIC_SCHEMA, partition_by_date=False,
+    legacy_csv=os.path.join(DATA_DIR, "sentetik_ziyaretci.csv")
+)
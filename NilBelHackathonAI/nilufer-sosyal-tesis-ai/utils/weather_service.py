@@ -1,20 +1,24 @@
 import os
+import json
+import asyncio
+import bisect
 import random
-import pickle
-import pandas as pd
-import numpy as np
+import threading
+import time
 import requests
-from datetime import datetime
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_absolute_error, r2_score
+from datetime import datetime, timedelta
+
+# Not: pandas/numpy/sklearn yalnızca aşağıdaki MVP eğitim fonksiyonlarında kullanılır.
+# API süreci hava durumu için bu modülü import ettiğinde yüklenmemeleri için
+# fonksiyon içinde import edilirler.
 
 # --- 1. AYARLAR VE TANIMLAMALAR ---
 # Bursa/Nilüfer koordinatları
 LAT = 40.1885
 LON = 29.0610
-API_KEY = "30f76dc3e1ef1ae6ae0e1ea0010927b4"
-BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
+API_KEY = os.getenv("OPENWEATHER_API_KEY", "30f76dc3e1ef1ae6ae0e1ea0010927b4")
+# Testlerde yerel stub sunucuya yönlendirmek için OPENWEATHER_BASE_URL kullanılabilir
+BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5/weather")
 
 # Nilüfer Belediyesi sosyal tesisleri
 TESISLER = [
@@ -25,22 +29,537 @@ TESISLER = [
 ]
 
 # --- 2. HAVA DURUMU SERVİSİ ---
+# Önbellek ayarları (ortam değişkenleri ile değiştirilebilir)
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))      # Taze kabul süresi (sn)
+WEATHER_MAX_BACKOFF = float(os.getenv("WEATHER_MAX_BACKOFF", "900"))  # Hata sonrası en uzun bekleme (sn)
+
+def fetch_weather_data(base_url=None, timeout=5):
+    """
+    Canlı hava durumunu OpenWeather API'den doğrudan (önbelleksiz) çeker.
+    Testlerde base_url yerel bir stub sunucuya yönlendirilebilir.
+
+    Raises:
+        Exception: API'ye ulaşılamazsa veya yanıt geçersizse
+    """
+    params = {"lat": LAT, "lon": LON, "appid": API_KEY, "units": "metric", "lang": "tr"}
+    response = requests.get(base_url or BASE_URL, params=params, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    return {"hava_sicakligi": data["main"]["temp"], "yagis_var": 1 if "rain" in data else 0}
+
+# Bursa için aylık iklim ortalamaları (MGM uzun yıllar): (ortalama sıcaklık °C, yağışlı gün oranı)
+BURSA_KLIMATOLOJI = {
+    1: (5.3, 0.39), 2: (6.3, 0.39), 3: (8.6, 0.32), 4: (12.9, 0.30),
+    5: (17.6, 0.23), 6: (22.1, 0.13), 7: (24.4, 0.06), 8: (24.0, 0.06),
+    9: (20.0, 0.13), 10: (15.2, 0.23), 11: (10.6, 0.30), 12: (7.1, 0.39),
+}
+LAST_GOOD_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "son_hava_durumu.json")
+LAST_GOOD_MAX_AGE = float(os.getenv("WEATHER_LAST_GOOD_MAX_AGE", str(24 * 3600)))
+
+class FallbackWeatherProvider:
+    """
+    OpenWeather'a ulaşılamadığında deterministik hava durumu sağlar
+
+    1. Son başarılı okuma (diskte saklanır, LAST_GOOD_MAX_AGE süresince geçerli)
+    2. Yoksa Bursa aylık klimatoloji tablosu
+
+    Dönen okumalar kaynağı ("kaynak") ve yaşı ("yas_saniye") ile damgalanır.
+    Aynı koşullarda her çağrı aynı sonucu verir; tahminler önbelleğe alınabilir.
+    """
+
+    def __init__(self, path=LAST_GOOD_PATH, max_age=LAST_GOOD_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._last_good = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def remember(self, reading, fetched_at=None):
+        """Başarılı okumayı bellekte ve diskte saklar"""
+        record = {
+            "hava_sicakligi": reading["hava_sicakligi"],
+            "yagis_var": reading["yagis_var"],
+            "zaman": fetched_at or time.time()
+        }
+        self._last_good = record
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[WEATHER] Son okuma kaydedilemedi: {e}")
+
+    def climatology(self, when=None):
+        """Bursa aylık klimatoloji tablosundan okuma"""
+        when = when or datetime.now()
+        sicaklik, yagisli_gun_orani = BURSA_KLIMATOLOJI[when.month]
+        return {
+            "hava_sicakligi": sicaklik,
+            "yagis_var": 1 if yagisli_gun_orani >= 0.35 else 0,
+            "kaynak": "klimatoloji",
+            "yas_saniye": None
+        }
+
+    def get(self, now=None):
+        """Son bilinen iyi okuma (yeterince yeniyse) veya klimatoloji"""
+        now = now or time.time()
+        last = self._last_good
+        if last is not None and now - last["zaman"] <= self.max_age:
+            return {
+                "hava_sicakligi": last["hava_sicakligi"],
+                "yagis_var": last["yagis_var"],
+                "kaynak": "son_bilinen",
+                "yas_saniye": round(now - last["zaman"])
+            }
+        return self.climatology(datetime.fromtimestamp(now))
+
+async def async_fetch_weather_data(base_url=None):
+    """
+    fetch_weather_data'nın asenkron karşılığı; paylaşılan bağlantı havuzunu kullanır.
+
+    Raises:
+        Exception: API'ye ulaşılamazsa veya yanıt geçersizse
+    """
+    from .http_client import get_async_client
+
+    params = {"lat": LAT, "lon": LON, "appid": API_KEY, "units": "metric", "lang": "tr"}
+    response = await get_async_client().get(base_url or BASE_URL, params=params)
+    response.raise_for_status()
+    data = response.json()
+    return {"hava_sicakligi": data["main"]["temp"], "yagis_var": 1 if "rain" in data else 0}
+
+class WeatherCache:
+    """
+    OpenWeather sonuçları için TTL önbelleği
+
+    - Taze okuma varsa doğrudan döner (hit)
+    - Süresi dolmuşsa eski okumayı döner ve yenilemeyi arka planda başlatır (stale)
+    - Hiç okuma yoksa senkron olarak çeker (miss); başarısızsa FallbackWeatherProvider
+    - Arka plan iş parçacığı TTL dolmadan okumayı yeniler
+    - Başarısız isteklerden sonra üstel geri çekilme (backoff) uygular
+    """
+
+    def __init__(self, fetcher=fetch_weather_data, ttl=WEATHER_CACHE_TTL,
+                 max_backoff=WEATHER_MAX_BACKOFF, base_url=None, auto_start=True,
+                 fallback=None, async_fetcher=async_fetch_weather_data):
+        self.fetcher = fetcher
+        self.async_fetcher = async_fetcher
+        self.fallback = fallback or FallbackWeatherProvider()
+        self.ttl = ttl
+        self.max_backoff = max_backoff
+        self.base_url = base_url
+        self.auto_start = auto_start
+
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = None       # time.monotonic() değeri
+        self._refreshing = False
+        self._failures = 0
+        self._next_retry = 0.0
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._async_lock = None
+
+        self.stats = {"hit": 0, "miss": 0, "stale": 0, "fallback": 0, "refresh_ok": 0, "refresh_fail": 0}
+
+    def _age(self, now):
+        return None if self._fetched_at is None else now - self._fetched_at
+
+    def _store_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            backoff = min(self.max_backoff, 5 * 2 ** (self._failures - 1))
+            self._next_retry = time.monotonic() + backoff
+            self.stats["refresh_fail"] += 1
+        print(f"[WEATHER] Hava durumu alınamadı ({self._failures}. hata, {backoff:.0f} sn sonra tekrar): {error}")
+
+    def _store_success(self, value):
+        with self._lock:
+            self._value = value
+            self._fetched_at = time.monotonic()
+            self._failures = 0
+            self._next_retry = 0.0
+            self.stats["refresh_ok"] += 1
+
+    def refresh(self):
+        """Okumayı hemen yeniler. Başarılıysa True döner"""
+        try:
+            value = self.fetcher(base_url=self.base_url)
+        except Exception as e:
+            self._store_failure(e)
+            return False
+
+        self.fallback.remember(value)
+        self._store_success(value)
+        return True
+
+    async def arefresh(self):
+        """refresh'in asenkron karşılığı; olay döngüsünü bloklamaz"""
+        try:
+            value = await self.async_fetcher(base_url=self.base_url)
+        except Exception as e:
+            self._store_failure(e)
+            return False
+
+        self._store_success(value)
+        # Son okumanın diske yazılması döngü dışında yapılır
+        await asyncio.get_running_loop().run_in_executor(None, self.fallback.remember, value)
+        return True
+
+    def _refresh_in_background(self):
+        """Yenileme zaten sürmüyorsa ve backoff süresi dolduysa arka planda yeniler"""
+        with self._lock:
+            if self._refreshing or time.monotonic() < self._next_retry:
+                return
+            self._refreshing = True
+
+        def job():
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=job, daemon=True).start()
+
+    def _snapshot(self, now):
+        """Okuma ve yaşını aynı anda alır (configure() arada önbelleği boşaltabilir)"""
+        with self._lock:
+            if self._value is None or self._fetched_at is None:
+                return None, None
+            return self._value, now - self._fetched_at
+
+    @staticmethod
+    def _stamped(value, age, kaynak="openweather"):
+        return {**value, "kaynak": kaynak, "yas_saniye": round(age)}
+
+    def get(self):
+        """
+        Hava durumu okumasını döndürür:
+        {"hava_sicakligi", "yagis_var", "kaynak", "yas_saniye"}
+        """
+        if self.auto_start:
+            self.start()
+
+        value, age = self._snapshot(time.monotonic())
+
+        if value is not None and age < self.ttl:
+            self.stats["hit"] += 1
+            return self._stamped(value, age)
+
+        if value is not None and age <= self.fallback.max_age:
+            self.stats["stale"] += 1
+            self._refresh_in_background()
+            return self._stamped(value, age, "son_bilinen")
+
+        self.stats["miss"] += 1
+        if time.monotonic() >= self._next_retry and self.refresh():
+            value, age = self._snapshot(time.monotonic())
+            if value is not None:
+                return self._stamped(value, age)
+
+        # API hatası durumunda son bilinen okuma veya Bursa klimatolojisi (deterministik)
+        self.stats["fallback"] += 1
+        return self.fallback.get()
+
+    async def aget(self):
+        """
+        get'in asenkron karşılığı. Taze/eski okumalar bellekten döner;
+        okuma yoksa paylaşılan asenkron HTTP havuzu üzerinden çekilir.
+        """
+        if self.auto_start:
+            self.start()
+
+        value, age = self._snapshot(time.monotonic())
+
+        if value is not None and age < self.ttl:
+            self.stats["hit"] += 1
+            return self._stamped(value, age)
+
+        if value is not None and age <= self.fallback.max_age:
+            self.stats["stale"] += 1
+            self._refresh_in_background()
+            return self._stamped(value, age, "son_bilinen")
+
+        self.stats["miss"] += 1
+        # Eşzamanlı miss'ler tek bir istek paylaşır (aynı anda yüzlerce istek API'ye gitmez)
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            if self._fetched_at is None and time.monotonic() >= self._next_retry:
+                await self.arefresh()
+
+        value, age = self._snapshot(time.monotonic())
+        if value is not None:
+            return self._stamped(value, age)
+
+        self.stats["fallback"] += 1
+        return self.fallback.get()
+
+    def _run(self):
+        """Arka plan yenileyici: TTL dolmadan (veya backoff bitince) okumayı yeniler"""
+        while not self._stop.is_set():
+            now = time.monotonic()
+            age = self._age(now)
+            if self._failures:
+                wait = max(0.0, self._next_retry - now)
+            elif age is None:
+                # İlk okuma get() tarafından (miss) yapılır
+                wait = self.ttl * 0.9
+            else:
+                wait = max(0.0, self.ttl * 0.9 - age)
+
+            if wait > 0:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                continue
+
+            self.refresh()
+
+    def start(self):
+        """Arka plan yenileyiciyi başlatır (zaten çalışıyorsa bir şey yapmaz)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="weather-refresher")
+            self._thread.start()
+
+    def stop(self):
+        """Arka plan yenileyiciyi durdurur"""
+        self._stop.set()
+        self._wakeup.set()
+
+    def configure(self, base_url=None, ttl=None):
+        """Uç nokta veya TTL değiştirir (ör. testlerde yerel stub sunucu) ve önbelleği boşaltır"""
+        with self._lock:
+            if base_url is not None:
+                self.base_url = base_url
+            if ttl is not None:
+                self.ttl = ttl
+            self._value = None
+            self._fetched_at = None
+            self._failures = 0
+            self._next_retry = 0.0
+        self._wakeup.set()
+
+    def get_stats(self):
+        """Önbellek sayaçları ve durum bilgisi"""
+        age = self._age(time.monotonic())
+        return {
+            **self.stats,
+            "ttl_saniye": self.ttl,
+            "okuma_yasi_saniye": None if age is None else round(age, 1),
+            "ardisik_hata": self._failures
+        }
+
+# Global instance
+weather_cache = WeatherCache()
+
 def get_weather_data():
-    """Canlı hava durumunu OpenWeather API'den çeker."""
+    """Hava durumunu önbellekten döndürür (gerekirse OpenWeather API'den çeker)."""
+    return weather_cache.get()
+
+async def aget_weather_data():
+    """get_weather_data'nın asenkron (olay döngüsünü bloklamayan) karşılığı."""
+    return await weather_cache.aget()
+
+def get_weather_cache_stats():
+    """Kolay kullanım için global fonksiyon"""
+    return weather_cache.get_stats()
+
+# --- Saatlik hava tahmini (OpenWeather 5 gün / 3 saat) ---
+FORECAST_URL = os.getenv("OPENWEATHER_FORECAST_URL", "https://api.openweathermap.org/data/2.5/forecast")
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", "3600"))
+FORECAST_STEP_SECONDS = 3 * 3600
+
+def fetch_forecast_data(base_url=None, timeout=5):
+    """
+    OpenWeather 5 günlük / 3 saatlik tahmini çeker
+
+    Returns:
+        list: Zamana göre sıralı [{"zaman": unix saniye, "hava_sicakligi", "yagis_var"}]
+
+    Raises:
+        Exception: API'ye ulaşılamazsa veya yanıt geçersizse
+    """
     params = {"lat": LAT, "lon": LON, "appid": API_KEY, "units": "metric", "lang": "tr"}
-    try:
-        response = requests.get(BASE_URL, params=params, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            return {"hava_sicakligi": data["main"]["temp"], "yagis_var": 1 if "rain" in data else 0}
-    except:
-        pass
-    # API hatası durumunda Bursa kış fallback verisi
-    return {"hava_sicakligi": round(random.uniform(2, 8), 1), "yagis_var": random.choice([0, 1])}
+    response = requests.get(base_url or FORECAST_URL, params=params, timeout=timeout)
+    response.raise_for_status()
+    points = [
+        {
+            "zaman": int(item["dt"]),
+            "hava_sicakligi": float(item["main"]["temp"]),
+            "yagis_var": 1 if item.get("rain") else 0
+        }
+        for item in response.json()["list"]
+    ]
+    return sorted(points, key=lambda p: p["zaman"])
+
+class HourlyForecast:
+    """
+    Saatlik hava tahmini
+
+    - 3 saatlik tahmin noktaları arasında sıcaklık doğrusal enterpole edilir, yağış
+      saatin düştüğü 3 saatlik bloktan alınır
+    - Tahmin noktaları FORECAST_CACHE_TTL boyunca bellekte tutulur; süresi dolunca yenileme
+      arka planda yapılır ve bu sırada eski noktalar kullanılır
+    - İçinde bulunulan saat için anlık okuma (WeatherCache) kullanılır
+    - Tahmin alınamazsa veya ufkun dışındaysa Bursa klimatolojisine düşülür
+    """
+
+    def __init__(self, fetcher=fetch_forecast_data, ttl=FORECAST_CACHE_TTL, base_url=None,
+                 current=None, fallback=None, max_backoff=WEATHER_MAX_BACKOFF):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.base_url = base_url
+        self.current = current or weather_cache
+        self.fallback = fallback or self.current.fallback
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._points = None
+        self._fetched_at = None       # time.monotonic() değeri
+        self._refreshing = False      # Süren yenileme (tek seferde bir API çağrısı)
+        self._failures = 0
+        self._next_retry = 0.0
+
+        self.stats = {"hit": 0, "refresh_ok": 0, "refresh_fail": 0}
+
+    def _get_points(self):
+        """
+        Tahmin noktaları; alınamazsa elde olan veya None
+
+        Süresi dolmuş noktalar varsa yenileme arka planda yapılır ve beklemeden eski noktalar
+        döner. Aynı anda yalnızca bir yenileme yapılır (API çağrısı kilit dışında); yenileme
+        sürerken diğer çağıranlar elde olan noktaları alır.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._fetched_at is not None and now - self._fetched_at < self.ttl:
+                self.stats["hit"] += 1
+                return self._points
+            if self._refreshing or now < self._next_retry:
+                return self._points
+            self._refreshing = True
+            points = self._points
+
+        if points is not None:
+            threading.Thread(target=self._refresh, daemon=True).start()
+            return points
+        return self._refresh()
+
+    def _refresh(self):
+        """Tahmin noktalarını API'den yeniler (yalnızca _refreshing bayrağını alan çağırır)"""
+        try:
+            points = self.fetcher(base_url=self.base_url)
+        except Exception as e:
+            with self._lock:
+                self._failures += 1
+                backoff = min(self.max_backoff, 5 * 2 ** (self._failures - 1))
+                self._next_retry = time.monotonic() + backoff
+                self.stats["refresh_fail"] += 1
+                self._refreshing = False
+            print(f"[WEATHER] Hava tahmini alınamadı ({self._failures}. hata, {backoff:.0f} sn sonra tekrar): {e}")
+            return self._points
+
+        with self._lock:
+            self._points = points
+            self._fetched_at = time.monotonic()
+            self._failures = 0
+            self._next_retry = 0.0
+            self.stats["refresh_ok"] += 1
+            self._refreshing = False
+        return points
+
+    def _interpolate(self, points, zaman):
+        """zaman (unix sn) için tahmin; noktaların kapsamı dışındaysa None"""
+        if not points or zaman < points[0]["zaman"] or zaman >= points[-1]["zaman"] + FORECAST_STEP_SECONDS:
+            return None
+        times = [p["zaman"] for p in points]
+        i = bisect.bisect_right(times, zaman) - 1
+        left = points[i]
+        if i + 1 < len(points):
+            right = points[i + 1]
+            oran = (zaman - left["zaman"]) / (right["zaman"] - left["zaman"])
+            sicaklik = left["hava_sicakligi"] + (right["hava_sicakligi"] - left["hava_sicakligi"]) * oran
+        else:
+            sicaklik = left["hava_sicakligi"]
+        return {"hava_sicakligi": round(sicaklik, 1), "yagis_var": left["yagis_var"], "kaynak": "tahmin"}
+
+    def get(self, start, hours):
+        """
+        start saatinden itibaren saat başına hava durumu
+
+        Args:
+            start (datetime): Başlangıç (saat başına yuvarlanır)
+            hours (int): Saat sayısı
+
+        Returns:
+            list: Her saat için {"hava_sicakligi", "yagis_var", "kaynak"}
+        """
+        start = start.replace(minute=0, second=0, microsecond=0)
+        return self.get_many([start + timedelta(hours=h) for h in range(hours)])
+
+    def get_many(self, times):
+        """Verilen saatlerin (datetime listesi, ardışık olması gerekmez) hava durumu"""
+        current_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+        points = self._get_points()
+
+        result = []
+        for when in times:
+            when = when.replace(minute=0, second=0, microsecond=0)
+            if when == current_hour:
+                reading = self.current.get()
+                result.append({"hava_sicakligi": reading["hava_sicakligi"],
+                               "yagis_var": reading["yagis_var"], "kaynak": reading.get("kaynak", "anlik")})
+                continue
+
+            reading = self._interpolate(points, when.timestamp())
+            if reading is None:
+                climatology = self.fallback.climatology(when)
+                reading = {"hava_sicakligi": climatology["hava_sicakligi"],
+                           "yagis_var": climatology["yagis_var"], "kaynak": "klimatoloji"}
+            result.append(reading)
+        return result
+
+    def get_stats(self):
+        age = None if self._fetched_at is None else time.monotonic() - self._fetched_at
+        return {
+            **self.stats,
+            "ttl_saniye": self.ttl,
+            "nokta_sayisi": len(self._points or []),
+            "okuma_yasi_saniye": None if age is None else round(age, 1),
+            "ardisik_hata": self._failures
+        }
+
+# Global instance
+hourly_forecast = HourlyForecast()
+
+def get_hourly_forecast(start, hours):
+    """Kolay kullanım için global fonksiyon"""
+    return hourly_forecast.get(start, hours)
+
+def get_hourly_forecast_for(times):
+    """Kolay kullanım için global fonksiyon"""
+    return hourly_forecast.get_many(times)
 
 # --- 3. SENTETİK VERİ ÜRETİCİ (MVP Yaklaşımı) ---
 def generate_data(kayit_sayisi=2000):
     """Proje dökümanı Madde 6.2'ye uygun sentetik veri üretir."""
+    import numpy as np
+    import pandas as pd
+
     data = []
     for _ in range(kayit_sayisi):
         tesis = random.choice(TESISLER)
@@ -71,6 +590,10 @@ def generate_data(kayit_sayisi=2000):
 # --- 4. MODEL EĞİTİMİ (Multi-Linear Regression) ---
 # Modelin matematiksel temeli: $Y = \beta_0 + \beta_1 X_1 + \beta_2 X_2 + \dots + \epsilon$
 def train_ai_model(df):
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.metrics import r2_score
+
     features = ["tesis_id", "saat", "gun", "hafta_sonu", "resmi_tatil", "etkinlik_var", 
                 "sinav_haftasi", "rezervasyon_sayisi", "onceki_gun_ziyaretci", "hava_sicakligi", "yagis_var"]
     X = df[features]
@@ -90,6 +613,8 @@ def train_ai_model(df):
 
 # --- 5. CANLI TAHMİN MEKANİZMASI ---
 def predict_live(model, scaler, features, tesis_id=1):
+    import pandas as pd
+
     weather = get_weather_data()
     simdi = datetime.now()
     